@@ -0,0 +1,49 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from droid.test_framework import DeviceController
+from droid.types import Configuration
+from benchmarks.fake_adb import FakeAdb
+
+COMMANDS = [
+    "getprop ro.product.manufacturer",
+    "getprop ro.product.model",
+    "getprop ro.build.version.release",
+    "settings get global wifi_on",
+    "settings get global mobile_data",
+]
+
+def measure(fake: FakeAdb, action) -> dict:
+    invocations = fake.invocations()
+    start = time.perf_counter()
+    action()
+    return {"seconds": time.perf_counter() - start, "round_trips": fake.invocations() - invocations}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare sequential and batched adb shell commands")
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated adb latency per invocation")
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir, FakeAdb(latency=args.latency) as fake:
+        # Configuration creates test_results/<run_id> in the working directory
+        os.chdir(workdir)
+        try:
+            device = DeviceController(Configuration(device_id="fake-device", app_package="com.example.app",
+                                                    app_activity="com.example.app.MainActivity"))
+            sequential = measure(fake, lambda: [device.execute_command(f"shell {command}") for command in COMMANDS])
+            batched = measure(fake, lambda: device.execute_batch(COMMANDS))
+        finally:
+            os.chdir(cwd)
+    print(json.dumps({
+        "latency": args.latency,
+        "commands": len(COMMANDS),
+        "sequential": sequential,
+        "batched": batched,
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
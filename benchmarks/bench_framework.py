@@ -0,0 +1,165 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+from droid.test_framework import AppAnalyzer, DeviceController, TestRunner
+from droid.plugins import BasePlugin
+from droid.test_framework.artifact_store import ArtifactStore
+from droid.test_framework.report import ReportSink, render_text_report
+from droid.test_framework.stats import summarize
+from droid.types import Configuration
+from benchmarks.fake_adb import FakeAdb
+
+COMMAND = "shell getprop ro.product.model"
+
+class CommandPlugin(BasePlugin):
+    concurrency_safe = True
+
+    def run(self, device: DeviceController) -> dict:
+        return {"model": device.execute_command(COMMAND)}
+
+class SerialCommandPlugin(CommandPlugin):
+    concurrency_safe = False
+
+def configuration(**overrides) -> Configuration:
+    settings = dict(device_id="fake-device", app_package="com.example.app",
+                    app_activity="com.example.app.MainActivity", plugins=["example_plugin"],
+                    test_cases=["example_test"], logcat=False, history=False)
+    settings.update(overrides)
+    return Configuration(**settings)
+
+def measure(action: Callable[[], None], repeat: int, setup: Optional[Callable[[], None]] = None) -> Dict[str, float]:
+    durations = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        action()
+        durations.append(time.perf_counter() - start)
+    return summarize(durations)
+
+def close_runner(runner: TestRunner) -> None:
+    for session in runner.sessions:
+        session.analyzer.close()
+    runner.report.close()
+
+def bench_runner_init(repeat: int) -> dict:
+    def init() -> None:
+        close_runner(TestRunner(configuration(), verbose=False))
+    # The first construction pays for importing plugin and test modules
+    cold = measure(init, 1)
+    return {"cold": cold, "warm": measure(init, repeat)}
+
+def bench_commands(fake: FakeAdb, repeat: int) -> dict:
+    results = {}
+    for mode in ("subprocess", "socket"):
+        device = DeviceController(configuration(connection_mode=mode, adb_port=fake.port))
+        invocations = fake.invocations()
+        timing = measure(lambda: device.execute_command(COMMAND), repeat)
+        timing["overhead"] = timing["median"] - fake.latency
+        timing["round_trips"] = fake.invocations() - invocations
+        results[mode] = timing
+    return results
+
+def bench_analyzer(plugin_counts: List[int], repeat: int) -> dict:
+    device = DeviceController(configuration())
+    results = {}
+    for plugin_class in (CommandPlugin, SerialCommandPlugin):
+        by_count = {}
+        for count in plugin_counts:
+            analyzer = AppAnalyzer(device, [plugin_class() for _ in range(count)])
+            try:
+                by_count[str(count)] = measure(analyzer.analyze_behavior, repeat)
+            finally:
+                analyzer.close()
+        results["concurrent" if plugin_class.concurrency_safe else "sequential"] = by_count
+    return results
+
+def bench_artifacts(workdir: str, artifact_count: int, artifact_kb: int, repeat: int) -> dict:
+    runner = TestRunner(configuration(), verbose=False)
+    results = {}
+    try:
+        for mode in ("move", "store"):
+            store = ArtifactStore(os.path.join(workdir, "store"), compress_threshold=artifact_kb * 1024) \
+                if mode == "store" else None
+            runner.artifact_store = store
+            captures = os.path.join(workdir, "captures")
+            result: dict = {}
+
+            def capture() -> None:
+                # Fresh content each time, so the store never deduplicates
+                os.makedirs(captures, exist_ok=True)
+                result.clear()
+                result["screens"] = {}
+                for index in range(artifact_count):
+                    path = os.path.join(captures, f"artifact_{index}.bin")
+                    with open(path, 'wb') as f:
+                        f.write(os.urandom(artifact_kb * 1024))
+                    result["screens"][f"artifact_{index}"] = path
+
+            results[mode] = measure(lambda: runner._save_artifacts("BenchTest", result, runner.config.run_dir),
+                                    repeat, setup=capture)
+            if store is not None:
+                results[mode]["flush"] = measure(store.close, 1)["median"]
+    finally:
+        runner.artifact_store = None
+        close_runner(runner)
+    return results
+
+def bench_report(workdir: str, test_count: int, repeat: int) -> dict:
+    run_dir = os.path.join(workdir, "report_run")
+    os.makedirs(run_dir, exist_ok=True)
+    sink = ReportSink(os.path.join(run_dir, "report.jsonl"))
+    sink.run_started("bench", "com.example.app", "com.example.app.MainActivity", {"fake-device": "Fake Device"}, {})
+    for index in range(test_count):
+        sink.test_completed(index, f"Test{index}", f"Test{index}", "fake-device", 1.0,
+                            {"status": "passed", "metrics": {"total_time": index, "p90": index * 1.5}})
+    sink.run_completed("bench", float(test_count))
+    sink.close()
+    return {"tests": test_count, **measure(lambda: render_text_report(run_dir), repeat)}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time the framework's own overhead against a fake adb")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated adb latency per invocation")
+    parser.add_argument("--repeat", type=int, default=20, help="Iterations per benchmark")
+    parser.add_argument("--plugins", default="1,4,16", help="Comma-separated plugin counts for analyze_behavior")
+    parser.add_argument("--artifacts", type=int, default=20, help="Artifacts saved per iteration")
+    parser.add_argument("--artifact-kb", type=int, default=256, help="Size of each artifact")
+    parser.add_argument("--tests", type=int, default=500, help="Test records in the rendered report")
+    parser.add_argument("--output", help="Also write the JSON results to this file")
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir, FakeAdb(latency=args.latency, server=True) as fake:
+        # Configuration creates test_results/<run_id> in the working directory
+        os.chdir(workdir)
+        try:
+            results = {
+                "environment": {
+                    "python": sys.version.split()[0],
+                    "platform": platform.platform(),
+                    "latency": args.latency,
+                    "repeat": args.repeat,
+                    "unit": "seconds",
+                },
+                "runner_init": bench_runner_init(args.repeat),
+                "command": bench_commands(fake, args.repeat),
+                "analyze_behavior": bench_analyzer([int(count) for count in args.plugins.split(",")], args.repeat),
+                "save_artifacts": bench_artifacts(workdir, args.artifacts, args.artifact_kb, args.repeat),
+                "report": bench_report(workdir, args.tests, args.repeat),
+            }
+        finally:
+            os.chdir(cwd)
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + "\n")
+    print(output)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,212 @@
+import os
+import re
+import shutil
+import socketserver
+import stat
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, Optional
+
+# Device-side commands answered from canned responses instead of a real device. Everything else in a
+# shell command line (pipes, grep, echo, $?) is executed by the host's /bin/sh.
+DEVICE_COMMANDS = ("getprop", "settings", "svc", "dumpsys", "am", "pm", "input", "pidof", "screencap", "wm",
+                   "uiautomator", "logcat")
+
+DEFAULT_RESPONSES: Dict[str, str] = {
+    "getprop ro.product.manufacturer": "Google\n",
+    "getprop ro.product.model": "Pixel 7\n",
+    "getprop ro.build.version.release": "14\n",
+    "settings get global wifi_on": "1\n",
+    "settings get global mobile_data": "1\n",
+    "dumpsys power": "  mWakefulness=Awake\n",
+    "dumpsys activity activities": "  mResumedActivity: ActivityRecord{1 u0 com.example.app/.MainActivity t1}\n",
+    "dumpsys connectivity": "Active default network: 100\n",
+    "am start -W": "Status: ok\nLaunchState: COLD\nTotalTime: 500\nWaitTime: 510\nComplete\n",
+    "pidof": "4321\n",
+    "wm size": "Physical size: 1080x2400\n",
+}
+
+STUB_TEMPLATE = """#!/bin/sh
+args=$(printf '%s' "$*" | tr -c 'A-Za-z0-9._-' '_')
+name=$(basename "$0")
+while [ -n "$args" ]; do
+    if [ -f "$FAKE_ADB_ROOT/responses/${name}__$args" ]; then cat "$FAKE_ADB_ROOT/responses/${name}__$args"; exit 0; fi
+    case "$args" in *_*) args=${args%_*} ;; *) args= ;; esac
+done
+[ -f "$FAKE_ADB_ROOT/responses/$name" ] && cat "$FAKE_ADB_ROOT/responses/$name"
+exit 0
+"""
+
+def response_file_name(command: str) -> str:
+    name, _, args = command.partition(" ")
+    return f"{name}__{re.sub(r'[^A-Za-z0-9._-]', '_', args)}" if args else name
+
+def run_device_command(root: str, command: str, capture: bool = False) -> subprocess.CompletedProcess:
+    env = dict(os.environ, PATH=f"{os.path.join(root, 'stubs')}{os.pathsep}{os.environ.get('PATH', '')}")
+    return subprocess.run(["/bin/sh", "-c", command], env=env, capture_output=capture)
+
+def log_invocation(root: str, line: str) -> None:
+    with open(os.path.join(root, "invocations.log"), 'a') as f:
+        f.write(line + "\n")
+
+# Serves the adb server's smart-socket protocol (host:transport, then a shell,v2 / shell / exec service)
+# for connection_mode "socket", answering from the same stubs and latency as the fake binary
+class FakeAdbServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, fake: 'FakeAdb') -> None:
+        super().__init__(("127.0.0.1", 0), FakeAdbRequestHandler)
+        self.fake = fake
+        self.log_lock = threading.Lock()
+        self.thread = threading.Thread(target=self.serve_forever, name="fake-adb-server", daemon=True)
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def start(self) -> None:
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+class FakeAdbRequestHandler(socketserver.BaseRequestHandler):
+    server: FakeAdbServer
+
+    def handle(self) -> None:
+        transport = self._read_request()
+        if not transport.startswith("host:transport:"):
+            self._fail(f"unsupported host request {transport}")
+            return
+        self.request.sendall(b"OKAY")
+        service = self._read_request()
+        root = self.server.fake.root
+        with self.server.log_lock:
+            log_invocation(root, f"-s {transport[len('host:transport:'):]} {service}")
+        time.sleep(self.server.fake.latency)
+        if service.startswith("shell,v2,raw:"):
+            self.request.sendall(b"OKAY")
+            result = run_device_command(root, service[len("shell,v2,raw:"):], capture=True)
+            for packet_id, payload in ((1, result.stdout), (2, result.stderr), (3, bytes([result.returncode & 0xFF]))):
+                self.request.sendall(struct.pack("<BI", packet_id, len(payload)) + payload)
+        elif service.startswith("shell:"):
+            self.request.sendall(b"OKAY")
+            result = run_device_command(root, service[len("shell:"):], capture=True)
+            self.request.sendall(result.stdout + result.stderr)
+        elif service.startswith("exec:"):
+            self.request.sendall(b"OKAY")
+            self.request.sendall(run_device_command(root, service[len("exec:"):], capture=True).stdout)
+        else:
+            self._fail(f"unsupported service {service}")
+
+    def _read_request(self) -> str:
+        length = int(self._recv_exact(4), 16)
+        return self._recv_exact(length).decode()
+
+    def _recv_exact(self, size: int) -> bytes:
+        buffer = bytearray()
+        while len(buffer) < size:
+            chunk = self.request.recv(size - len(buffer))
+            if not chunk:
+                raise ConnectionError("client closed the connection")
+            buffer += chunk
+        return bytes(buffer)
+
+    def _fail(self, message: str) -> None:
+        data = message.encode()
+        self.request.sendall(b"FAIL" + f"{len(data):04x}".encode() + data)
+
+# Puts a scriptable `adb` on PATH that answers from canned responses after a configurable latency.
+# Responses match the longest prefix of a device command's arguments, so "am start -W" answers any
+# `am start -W -n ...`. Every invocation is logged so callers can count adb round trips.
+# With server=True it also listens as an adb server on an ephemeral port (see `port`).
+class FakeAdb:
+    def __init__(self, responses: Optional[Dict[str, str]] = None, latency: float = 0.0, server: bool = False) -> None:
+        self.responses = dict(DEFAULT_RESPONSES if responses is None else responses)
+        self.latency = latency
+        self.root: Optional[str] = None
+        self.server: Optional[FakeAdbServer] = FakeAdbServer(self) if server else None
+        self.saved_environ: Dict[str, Optional[str]] = {}
+
+    def __enter__(self) -> 'FakeAdb':
+        self.root = tempfile.mkdtemp(prefix="fake_adb_")
+        bin_dir = os.path.join(self.root, "bin")
+        stub_dir = os.path.join(self.root, "stubs")
+        os.makedirs(bin_dir)
+        os.makedirs(stub_dir)
+        os.makedirs(os.path.join(self.root, "responses"))
+        self._write_executable(os.path.join(bin_dir, "adb"),
+                               f"#!/bin/sh\nexec \"{sys.executable}\" \"{os.path.abspath(__file__)}\" \"$@\"\n")
+        for command in DEVICE_COMMANDS:
+            self._write_executable(os.path.join(stub_dir, command), STUB_TEMPLATE)
+        for command, output in self.responses.items():
+            self.set_response(command, output)
+        self._set_env("PATH", f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}")
+        self._set_env("FAKE_ADB_ROOT", self.root)
+        self._set_env("FAKE_ADB_LATENCY", str(self.latency))
+        if self.server is not None:
+            self.server.start()
+        return self
+
+    @property
+    def port(self) -> int:
+        return self.server.port
+
+    def __exit__(self, *_) -> None:
+        if self.server is not None:
+            self.server.stop()
+        for key, value in self.saved_environ.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def set_response(self, command: str, output: str) -> None:
+        with open(os.path.join(self.root, "responses", response_file_name(command)), 'w') as f:
+            f.write(output)
+
+    def set_latency(self, latency: float) -> None:
+        self.latency = latency
+        os.environ["FAKE_ADB_LATENCY"] = str(latency)
+
+    def invocations(self) -> int:
+        log_path = os.path.join(self.root, "invocations.log")
+        if not os.path.exists(log_path):
+            return 0
+        with open(log_path) as f:
+            return sum(1 for _ in f)
+
+    def _set_env(self, key: str, value: str) -> None:
+        self.saved_environ.setdefault(key, os.environ.get(key))
+        os.environ[key] = value
+
+    def _write_executable(self, path: str, content: str) -> None:
+        with open(path, 'w') as f:
+            f.write(content)
+        os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+def main(argv: list) -> int:
+    root = os.environ["FAKE_ADB_ROOT"]
+    log_invocation(root, " ".join(argv))
+    time.sleep(float(os.environ.get("FAKE_ADB_LATENCY", "0")))
+    while argv and argv[0] in ("-s", "-H", "-P"):
+        argv = argv[2:]
+    if not argv:
+        return 1
+    command, args = argv[0], argv[1:]
+    if command in ("shell", "exec-out"):
+        return run_device_command(root, " ".join(args)).returncode
+    if command == "logcat":
+        return subprocess.run([os.path.join(root, "stubs", "logcat")] + args).returncode
+    # pull, push, install, uninstall, emu, reverse, forward
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,9 +1,27 @@
-from .base_plugin import BasePlugin
-from .example_plugin import ExamplePlugin
-from .screenshot_plugin import ScreenShotPlugin
+import importlib
+
+from .base_plugin import AsyncBasePlugin, BasePlugin
+
+# Plugins are imported on first access, so importing the package does not pay for every plugin's dependencies
+_LAZY_CLASSES = {
+    'ExamplePlugin': '.example_plugin',
+    'ScreenShotPlugin': '.screenshot_plugin',
+    'ScreenRecordPlugin': '.screen_record_plugin',
+    'ResourceSamplerPlugin': '.resource_sampler_plugin',
+    'UiHierarchyPlugin': '.ui_hierarchy_plugin',
+}
+
+def __getattr__(name: str):
+    if name in _LAZY_CLASSES:
+        return getattr(importlib.import_module(_LAZY_CLASSES[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 __all__ = [
+    'AsyncBasePlugin',
     'BasePlugin',
     'ExamplePlugin',
-    'ScreenShotPlugin'
+    'ScreenShotPlugin',
+    'ScreenRecordPlugin',
+    'ResourceSamplerPlugin',
+    'UiHierarchyPlugin'
 ]
\ No newline at end of file
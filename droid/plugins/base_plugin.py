@@ -1,15 +1,42 @@
 from abc import ABC, abstractmethod
 import logging
+from typing import Any, Dict, Optional
 
-from droid.test_framework import DeviceController
+from droid.test_framework import AsyncDeviceController, DeviceController
+from droid.types import Configuration
 
 class PluginError(Exception):
     pass
 
 class BasePlugin(ABC):
+    # Plugins that do not share mutable state between runs may be run on the analyzer's thread pool
+    concurrency_safe: bool = False
+    # Per-plugin timeout in seconds for concurrent runs, falls back to Configuration.plugin_timeout
+    timeout: Optional[float] = None
+
     def __init__(self) -> None:
         self.logger = logging.getLogger(__name__)
 
     @abstractmethod
     def run(self, device: DeviceController) -> dict:
+        pass
+
+    def get_options(self, config: Configuration) -> Dict[str, Any]:
+        return config.options_for(self.__class__.__module__)
+
+    def attach(self, device: DeviceController) -> None:
+        # Called once when the plugin is bound to a device, e.g. to subscribe to device events
+        pass
+
+    def detach(self, device: DeviceController) -> None:
+        pass
+
+    def flush(self) -> None:
+        # Called after each test case, before its artifacts are saved; wait for background work here
+        pass
+
+class AsyncBasePlugin(BasePlugin):
+    # Awaited on the event loop by the async runner; concurrency_safe and timeout apply as for BasePlugin
+    @abstractmethod
+    async def run(self, device: AsyncDeviceController) -> dict:
         pass
\ No newline at end of file
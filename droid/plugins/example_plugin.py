@@ -2,6 +2,8 @@ from .base_plugin import BasePlugin, PluginError
 from droid.test_framework import DeviceController
 
 class ExamplePlugin(BasePlugin):
+    concurrency_safe = True
+
     def run(self, _: DeviceController) -> dict:
         try:
             self.logger.info("Example plugin check passed")
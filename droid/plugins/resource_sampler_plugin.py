@@ -0,0 +1,159 @@
+import logging
+import math
+import re
+import threading
+import time
+from array import array
+from typing import Dict, Optional, Tuple
+
+from droid.plugins.base_plugin import BasePlugin, PluginError
+from droid.test_framework import DeviceController
+from droid.test_framework.device_controller import DeviceControllerError
+
+class ResourceSamplerError(PluginError):
+    pass
+
+MEMINFO_PATTERN = re.compile(r"TOTAL PSS:\s+(\d+)|^\s*TOTAL\s+(\d+)", re.MULTILINE)
+FRAMES_PATTERN = re.compile(r"Total frames rendered:\s+(\d+)")
+JANKY_PATTERN = re.compile(r"Janky frames:\s+(\d+)")
+
+COLUMNS = ("timestamp", "pss_kb", "cpu_percent", "frames", "janky_frames")
+
+class ResourceSamplerPlugin(BasePlugin):
+    concurrency_safe = True
+
+    def __init__(self) -> None:
+        self.logger = logging.getLogger(__name__)
+        self.device: Optional[DeviceController] = None
+        self.lock = threading.Lock()
+        # One typed array per column keeps hour-long sampling at a few bytes per value
+        self.samples: Dict[str, array] = {column: array('d') for column in COLUMNS}
+        self.checkpoint = 0
+        # Last (frames, janky) counters summarized, so a window also counts frames rendered since the previous one
+        self.previous_frames: Optional[Tuple[float, float]] = None
+        self.previous_cpu: Optional[tuple] = None
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def attach(self, device: DeviceController) -> None:
+        self.device = device
+        self.interval = float(self.get_options(device.config).get('interval', 1.0))
+        device.subscribe("app_launching", self._on_app_launching)
+        device.subscribe("app_stopped", self._on_app_stopped)
+
+    def detach(self, device: DeviceController) -> None:
+        device.unsubscribe("app_launching", self._on_app_launching)
+        device.unsubscribe("app_stopped", self._on_app_stopped)
+        self._stop_sampling()
+
+    def run(self, device: DeviceController) -> dict:
+        try:
+            with self.lock:
+                start, end = self.checkpoint, len(self.samples["timestamp"])
+                self.checkpoint = end
+                window = {column: values[start:end] for column, values in self.samples.items()}
+            summary, self.previous_frames = self._summarize(window, self.previous_frames)
+            return summary
+        except Exception as e:
+            self.logger.error(f"Failed to summarize resource samples: {str(e)}")
+            raise ResourceSamplerError(f"Failed to summarize resource samples: {str(e)}")
+
+    def _on_app_launching(self, package_name: str, **_) -> None:
+        if self.device is None or package_name != self.device.config.app_package or self.thread is not None:
+            return
+        self.previous_cpu = None
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._sample_loop, args=(self.stop_event,),
+                                       name=f"resource-sampler-{self.device.device_id}", daemon=True)
+        self.thread.start()
+        self.logger.info(f"Started resource sampling every {self.interval} seconds")
+
+    def _on_app_stopped(self, package_name: str, **_) -> None:
+        if self.device is not None and package_name == self.device.config.app_package:
+            self._stop_sampling()
+
+    def _stop_sampling(self) -> None:
+        thread, self.thread = self.thread, None
+        if thread is not None:
+            self.stop_event.set()
+            thread.join()
+
+    def _sample_loop(self, stop_event: threading.Event) -> None:
+        next_tick = time.monotonic()
+        while not stop_event.is_set():
+            try:
+                self._sample()
+            except DeviceControllerError as e:
+                self.logger.warning(f"Dropped resource sample: {str(e)}")
+            next_tick += self.interval
+            stop_event.wait(max(0.0, next_tick - time.monotonic()))
+
+    def _sample(self) -> None:
+        package = self.device.config.app_package
+        # All probes go out as one batched shell invocation per tick; pidof -s picks one pid when the app
+        # runs several processes
+        meminfo, cpu, gfxinfo = (result.output for result in self.device.execute_batch([
+            f"dumpsys meminfo {package}",
+            f"cat /proc/$(pidof -s {package})/stat; grep '^cpu' /proc/stat",
+            f"dumpsys gfxinfo {package}",
+        ]))
+        frames = self._first_int(FRAMES_PATTERN, gfxinfo)
+        janky = self._first_int(JANKY_PATTERN, gfxinfo)
+        row = (time.time(), self._parse_pss(meminfo), self._parse_cpu(cpu), frames, janky)
+        with self.lock:
+            for column, value in zip(COLUMNS, row):
+                self.samples[column].append(value)
+
+    def _parse_pss(self, meminfo: str) -> float:
+        match = MEMINFO_PATTERN.search(meminfo)
+        if match is None:
+            return math.nan
+        return float(match.group(1) or match.group(2))
+
+    def _parse_cpu(self, output: str) -> float:
+        process_ticks = None
+        total_ticks = None
+        cores = 0
+        for line in output.splitlines():
+            if line.startswith("cpu "):
+                total_ticks = sum(int(value) for value in line.split()[1:])
+            elif line.startswith("cpu"):
+                cores += 1
+            elif ")" in line:
+                # Fields after the parenthesised command name start at field 3 (state); utime and stime are 14 and 15
+                fields = line.rsplit(")", 1)[1].split()
+                if len(fields) > 12:
+                    process_ticks = int(fields[11]) + int(fields[12])
+        if process_ticks is None or total_ticks is None:
+            self.previous_cpu = None
+            return math.nan
+        previous, self.previous_cpu = self.previous_cpu, (process_ticks, total_ticks)
+        if previous is None or process_ticks < previous[0] or total_ticks <= previous[1]:
+            return math.nan
+        return 100.0 * (process_ticks - previous[0]) / (total_ticks - previous[1]) * max(cores, 1)
+
+    def _first_int(self, pattern: re.Pattern, text: str) -> float:
+        match = pattern.search(text)
+        return float(match.group(1)) if match else math.nan
+
+    def _summarize(self, window: Dict[str, array],
+                   previous: Optional[Tuple[float, float]]) -> Tuple[dict, Optional[Tuple[float, float]]]:
+        pss = [value for value in window["pss_kb"] if not math.isnan(value)]
+        cpu = [value for value in window["cpu_percent"] if not math.isnan(value)]
+        frames = janky = 0.0
+        # gfxinfo counters are cumulative per process, a drop means the app restarted
+        for total, jank in zip(window["frames"], window["janky_frames"]):
+            if math.isnan(total) or math.isnan(jank):
+                continue
+            if previous is not None and total >= previous[0]:
+                frames += total - previous[0]
+                janky += jank - previous[1]
+            previous = (total, jank)
+        return {
+            "samples": len(window["timestamp"]),
+            "peak_pss_kb": max(pss) if pss else None,
+            "avg_cpu_percent": sum(cpu) / len(cpu) if cpu else None,
+            "peak_cpu_percent": max(cpu) if cpu else None,
+            "frames": int(frames),
+            "janky_frames_percent": 100.0 * janky / frames if frames else None,
+        }, previous
@@ -0,0 +1,160 @@
+import itertools
+import logging
+import os
+import threading
+import time
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Deque, List, Optional, Tuple
+
+from droid.plugins.base_plugin import BasePlugin, PluginError
+from droid.test_framework import DeviceController
+from droid.test_framework.device_controller import DeviceControllerError
+from droid.test_framework.screenshot import encode_png, parse_raw_screencap
+
+class ScreenRecordError(PluginError):
+    pass
+
+class ScreenRecordPlugin(BasePlugin):
+    concurrency_safe = True
+
+    def __init__(self) -> None:
+        self.logger = logging.getLogger(__name__)
+        self.sequence = itertools.count()
+        self.device: Optional[DeviceController] = None
+        self.lock = threading.Lock()
+        self.frames: Deque[Tuple[float, bytes]] = deque()
+        self.buffered_bytes = 0
+        self.frames_captured = 0
+        self.frames_skipped = 0
+        self.last_hash: Optional[int] = None
+        self.recording_path: Optional[str] = None
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="recording-writer")
+        self.pending: List[Future] = []
+
+    def attach(self, device: DeviceController) -> None:
+        self.device = device
+        options = self.get_options(device.config)
+        self.fps = float(options.get('fps', 5))
+        self.max_memory = int(options.get('max_memory_mb', 256)) * 1024 * 1024
+        self.window_seconds = float(options.get('window_seconds', 10))
+        device.subscribe("app_launching", self._on_app_launching)
+        device.subscribe("app_stopped", self._on_app_stopped)
+
+    def detach(self, device: DeviceController) -> None:
+        device.unsubscribe("app_launching", self._on_app_launching)
+        device.unsubscribe("app_stopped", self._on_app_stopped)
+        self._stop_recording()
+        self.flush()
+        self.writer.shutdown()
+
+    def run(self, device: DeviceController) -> dict:
+        try:
+            with self.lock:
+                if self.thread is None:
+                    return {"recording": None, "frames_captured": self.frames_captured,
+                            "frames_skipped": self.frames_skipped}
+                if self.recording_path is None:
+                    recording_file = f"recording_{int(time.time() * 1000)}_{next(self.sequence)}.zip"
+                    self.recording_path = os.path.join(device.config.run_dir, recording_file)
+                return {
+                    "recording": self.recording_path,
+                    "frames_captured": self.frames_captured,
+                    "frames_skipped": self.frames_skipped,
+                    "frames_buffered": len(self.frames),
+                    "buffered_bytes": self.buffered_bytes,
+                }
+        except Exception as e:
+            self.logger.error(f"Failed to report screen recording: {str(e)}")
+            raise ScreenRecordError(f"Failed to report screen recording: {str(e)}")
+
+    def flush(self) -> None:
+        # A recording still running at the end of a test case is written out so its artifact exists
+        self._stop_recording()
+        pending, self.pending = self.pending, []
+        for future in pending:
+            try:
+                future.result()
+            except Exception as e:
+                self.logger.error(f"Failed to write screen recording: {str(e)}")
+
+    def _on_app_launching(self, package_name: str, **_) -> None:
+        if self.device is None or package_name != self.device.config.app_package:
+            return
+        self._stop_recording()
+        with self.lock:
+            self.frames.clear()
+            self.buffered_bytes = 0
+            self.frames_captured = 0
+            self.frames_skipped = 0
+            self.last_hash = None
+            self.stop_event = threading.Event()
+            self.thread = threading.Thread(target=self._capture_loop, args=(self.stop_event,),
+                                           name=f"screen-record-{self.device.device_id}", daemon=True)
+            self.thread.start()
+        self.logger.info(f"Started screen recording at {self.fps} fps")
+
+    def _on_app_stopped(self, package_name: str, **_) -> None:
+        if self.device is not None and package_name == self.device.config.app_package:
+            self._stop_recording()
+
+    def _stop_recording(self) -> None:
+        # The event is taken together with its thread, since starting a recording replaces both
+        with self.lock:
+            thread, self.thread = self.thread, None
+            stop_event = self.stop_event
+        if thread is None:
+            return
+        stop_event.set()
+        thread.join()
+        with self.lock:
+            now = time.monotonic()
+            frames = [(timestamp, raw) for timestamp, raw in self.frames if now - timestamp <= self.window_seconds]
+            self.frames.clear()
+            self.buffered_bytes = 0
+            path, self.recording_path = self.recording_path, None
+        if path is None:
+            path = os.path.join(self.device.config.run_dir,
+                                f"recording_{int(time.time() * 1000)}_{next(self.sequence)}.zip")
+        self.logger.info(f"Stopped screen recording, writing {len(frames)} frames to {path}")
+        self.pending.append(self.writer.submit(self._write_recording, frames, path))
+
+    def _capture_loop(self, stop_event: threading.Event) -> None:
+        interval = 1.0 / self.fps
+        next_tick = time.monotonic()
+        while not stop_event.is_set():
+            try:
+                raw = self.device.capture_screenshot_bytes(raw=True)
+                self._add_frame(time.monotonic(), raw)
+            except DeviceControllerError as e:
+                self.logger.warning(f"Dropped screen recording frame: {str(e)}")
+            next_tick += interval
+            stop_event.wait(max(0.0, next_tick - time.monotonic()))
+
+    def _add_frame(self, timestamp: float, raw: bytes) -> None:
+        frame_hash = zlib.crc32(raw)
+        with self.lock:
+            self.frames_captured += 1
+            if frame_hash == self.last_hash:
+                self.frames_skipped += 1
+                return
+            self.last_hash = frame_hash
+            self.frames.append((timestamp, raw))
+            self.buffered_bytes += len(raw)
+            while self.frames and (self.buffered_bytes > self.max_memory
+                                   or timestamp - self.frames[0][0] > self.window_seconds):
+                _, evicted = self.frames.popleft()
+                self.buffered_bytes -= len(evicted)
+
+    def _write_recording(self, frames: List[Tuple[float, bytes]], path: str) -> str:
+        start = frames[0][0] if frames else 0.0
+        with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_STORED) as archive:
+            for index, (timestamp, raw) in enumerate(frames):
+                offset_ms = int((timestamp - start) * 1000)
+                archive.writestr(f"frame_{index:05d}_{offset_ms}ms.png", encode_png(parse_raw_screencap(raw)))
+        self.logger.info(f"Screen recording saved: {path}")
+        return path
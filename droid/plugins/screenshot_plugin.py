@@ -1,31 +1,69 @@
 from abc import ABC, abstractmethod
+import itertools
 import logging
 import time
 import os
+from concurrent.futures import Future
+from typing import List, Optional, Tuple
 
 from droid.plugins.base_plugin import BasePlugin, PluginError
 from droid.test_framework import DeviceController
+from droid.test_framework.screenshot import ScreenshotEncoder
 
 class ScreenShotError(PluginError):
     pass
 
 class ScreenShotPlugin(BasePlugin):
+    concurrency_safe = True
+
     def __init__(self) -> None:
         self.logger = logging.getLogger(__name__)
+        self.sequence = itertools.count()
+        self.encoder: Optional[ScreenshotEncoder] = None
+        # Raw captures are reported before their PNG is written, so each result is checked again in flush()
+        self.pending: List[Tuple[Future, dict]] = []
 
     def run(self, device: DeviceController) -> dict:
         try:
             result = {}
-            path = self._capture_screenshot(device)
+            path, encoding = self._capture_screenshot(device)
             result['screenshot'] = path
+            if encoding is not None:
+                self.pending.append((encoding, result))
             return result
         except Exception as e:
             self.logger.error(f"Failed to capture screenshot: {str(e)}")
             raise ScreenShotError(f"Failed to capture screenshot: {str(e)}")
 
-    def _capture_screenshot(self, device: DeviceController) -> str:
-        screenshot_file = f"screenshot_{int(time.time())}.png"
-        device.capture_screenshot(screenshot_file)
-        full_path = os.path.join(device.config.run_dir, screenshot_file)
+    def _capture_screenshot(self, device: DeviceController) -> Tuple[str, Optional[Future]]:
+        # Millisecond timestamp plus a sequence number keeps burst captures from colliding
+        screenshot_file = f"screenshot_{int(time.time() * 1000)}_{next(self.sequence)}.png"
+        encoding = None
+        if self.get_options(device.config).get('format', 'png') == 'raw':
+            full_path = os.path.join(device.config.run_dir, screenshot_file)
+            if self.encoder is None:
+                self.encoder = ScreenshotEncoder()
+            encoding = self.encoder.submit(device.capture_screenshot_bytes(raw=True), full_path)
+        else:
+            full_path = device.capture_screenshot(screenshot_file)
         self.logger.info(f"Screenshot captured: {full_path}")
-        return full_path
+        return full_path, encoding
+
+    def flush(self) -> None:
+        if self.encoder is not None:
+            self.encoder.flush()
+        pending, self.pending = self.pending, []
+        for encoding, result in pending:
+            error = encoding.exception()
+            if error is None:
+                continue
+            # The result already names the PNG, which was never written; drop the path and report why
+            path, result['screenshot'] = result['screenshot'], None
+            result['error'] = f"Failed to encode screenshot: {str(error)}"
+            if os.path.exists(path):
+                os.remove(path)
+
+    def detach(self, device: DeviceController) -> None:
+        if self.encoder is not None:
+            self.encoder.close()
+            self.encoder = None
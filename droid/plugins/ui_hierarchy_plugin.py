@@ -0,0 +1,60 @@
+import itertools
+import json
+import logging
+import os
+import time
+from typing import Optional
+
+from droid.plugins.base_plugin import BasePlugin, PluginError
+from droid.test_framework import DeviceController
+from droid.test_framework.ui_hierarchy import COLUMNS, UiHierarchy
+
+class UiHierarchyPluginError(PluginError):
+    pass
+
+class UiHierarchyPlugin(BasePlugin):
+    # Keeps the previous dump to store only the subtrees that changed since, so runs must not overlap
+    def __init__(self) -> None:
+        self.logger = logging.getLogger(__name__)
+        self.sequence = itertools.count()
+        self.hierarchy: Optional[UiHierarchy] = None
+        self.previous_file: Optional[str] = None
+
+    def run(self, device: DeviceController) -> dict:
+        try:
+            options = self.get_options(device.config)
+            previous = self.hierarchy
+            self.hierarchy = device.dump_ui_hierarchy()
+            result = {"nodes": len(self.hierarchy)}
+            # e.g. queries: {offline_banner: {resource_id: "com.example.app:id/offline_banner"}}
+            queries = options.get('queries', {})
+            if queries:
+                result["matches"] = {name: len(self.hierarchy.find(**query)) for name, query in queries.items()}
+            if options.get('store', True):
+                result.update(self._store(device, previous))
+            return result
+        except Exception as e:
+            self.logger.error(f"Failed to dump UI hierarchy: {str(e)}")
+            raise UiHierarchyPluginError(f"Failed to dump UI hierarchy: {str(e)}")
+
+    def _store(self, device: DeviceController, previous: Optional[UiHierarchy]) -> dict:
+        # The first dump of a test is stored whole as a table of COLUMNS rows in document order; later
+        # dumps only as their diff against the one before
+        hierarchy_file = f"ui_hierarchy_{int(time.time() * 1000)}_{next(self.sequence)}.json"
+        full_path = os.path.join(device.config.run_dir, hierarchy_file)
+        if previous is None or self.previous_file is None:
+            document = {"rotation": self.hierarchy.rotation, "columns": COLUMNS, "nodes": self.hierarchy.to_table()}
+            stored = len(self.hierarchy)
+        else:
+            changes = self.hierarchy.diff(previous)
+            document = {"base": self.previous_file, "rotation": self.hierarchy.rotation, "columns": COLUMNS, **changes}
+            stored = sum(len(change["nodes"]) for change in changes["replaced"]) + len(changes["updated"])
+        with open(full_path, 'w', encoding='utf-8') as f:
+            json.dump(document, f, separators=(",", ":"))
+        self.previous_file = hierarchy_file
+        self.logger.info(f"UI hierarchy stored: {full_path} ({stored} of {len(self.hierarchy)} nodes)")
+        return {"ui_hierarchy": full_path, "stored_nodes": stored, "full": "base" not in document}
+
+    def flush(self) -> None:
+        # Each test case starts from a full dump, since its artifacts are saved into their own directory
+        self.previous_file = None
\ No newline at end of file
@@ -1,9 +1,25 @@
-from .base_test import BaseTest
-from .network_test import NetworkTest
-from .example_test import ExampleTest
+import importlib
+
+from .base_test import AsyncBaseTest, BaseTest
+
+# Test cases are imported on first access, so importing the package does not pay for every test's dependencies
+_LAZY_CLASSES = {
+    'ExampleTest': '.example_test',
+    'NetworkTest': '.network_test',
+    'NetworkMatrixTest': '.network_matrix_test',
+    'StartupTest': '.startup_test',
+}
+
+def __getattr__(name: str):
+    if name in _LAZY_CLASSES:
+        return getattr(importlib.import_module(_LAZY_CLASSES[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 __all__ = [
+    'AsyncBaseTest',
     'BaseTest',
     'ExampleTest',
-    'NetworkTest'
+    'NetworkTest',
+    'NetworkMatrixTest',
+    'StartupTest'
 ]
\ No newline at end of file
@@ -1,7 +1,9 @@
 from abc import ABC, abstractmethod
 import logging
+from typing import Any, Dict
 
-from droid.test_framework import DeviceController, AppAnalyzer
+from droid.test_framework import AsyncAppAnalyzer, AsyncDeviceController, DeviceController, AppAnalyzer
+from droid.types import Configuration
 
 class TestError(Exception):
     pass
@@ -12,4 +14,13 @@ class BaseTest(ABC):
 
     @abstractmethod
     def run(self, device: DeviceController, analyzer: AppAnalyzer) -> dict:
+        pass
+
+    def get_options(self, config: Configuration) -> Dict[str, Any]:
+        return config.options_for(self.__class__.__module__)
+
+class AsyncBaseTest(BaseTest):
+    # Run by the async runner (main.py --async) on the event loop
+    @abstractmethod
+    async def run(self, device: AsyncDeviceController, analyzer: AsyncAppAnalyzer) -> dict:
         pass
\ No newline at end of file
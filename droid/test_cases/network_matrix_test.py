@@ -0,0 +1,93 @@
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .base_test import BaseTest, TestError
+from droid.test_framework import DeviceController, AppAnalyzer
+from droid.test_framework.network_shaping import NetworkProfile, NetworkShaper
+from droid.test_framework.stats import summarize
+
+DEFAULT_PROFILES = ["wifi", "lte", "3g", "edge"]
+# Logged by the system when the app calls Activity.reportFullyDrawn(), e.g.
+# "Fully drawn com.example.app/.MainActivity: +1s234ms"
+FULLY_DRAWN_PATTERN = re.compile(r"Fully drawn ([\w.]+)/\S+: \+(?:(\d+)s)?(\d+)ms")
+
+class NetworkMatrixTest(BaseTest):
+    def run(self, device: DeviceController, analyzer: AppAnalyzer):
+        try:
+            options = self.get_options(device.config)
+            profiles = [NetworkProfile.from_option(option) for option in options.get('profiles', DEFAULT_PROFILES)]
+            iterations = int(options.get('iterations', 3))
+            fully_drawn = bool(options.get('fully_drawn', False)) and analyzer.logcat is not None
+            timeout = float(options.get('interactive_timeout', 30))
+            app_package = device.config.app_package
+            ready_activity = options.get('ready_activity', device.config.app_activity)
+
+            device.wait_for_device()
+            device.unlock_screen()
+            device.enable_network()
+            device.wait_for_network(enabled=True)
+
+            shaper = NetworkShaper(device, options.get('mode', 'auto'), int(options.get('proxy_port', 8119)))
+            results: dict = {}
+            try:
+                for profile in profiles:
+                    self.logger.info(f"Measuring time to interactive on network profile {profile.name}")
+                    shaper.apply(profile)
+                    shaper.stats()
+                    samples: Dict[str, List[float]] = {"time_to_interactive": [], "total_time": []}
+                    sources = set()
+                    for _ in range(iterations):
+                        tti, total_time, source = self._launch(device, analyzer, ready_activity, fully_drawn, timeout)
+                        samples["time_to_interactive"].append(tti)
+                        if total_time is not None:
+                            samples["total_time"].append(total_time)
+                        sources.add(source)
+                    results[profile.name] = {
+                        "profile": {"latency_ms": profile.latency_ms, "down_kbps": profile.down_kbps,
+                                    "up_kbps": profile.up_kbps, "loss": profile.loss},
+                        "shaping": shaper.mode,
+                        "source": "/".join(sorted(sources)),
+                        **{name: summarize(values) for name, values in samples.items() if values},
+                    }
+                    if shaper.mode == "proxy":
+                        results[profile.name]["proxy"] = shaper.stats()
+                    if options.get('analyze', True):
+                        results[profile.name]["analysis"] = analyzer.analyze_behavior()
+                    device.force_stop_app(app_package)
+            finally:
+                shaper.reset()
+            return results
+        except Exception as e:
+            self.logger.error(f"Network matrix test failed: {str(e)}")
+            raise TestError(f"Network matrix test failed: {str(e)}")
+
+    def _launch(self, device: DeviceController, analyzer: AppAnalyzer, ready_activity: str, fully_drawn: bool,
+                timeout: float) -> Tuple[float, Optional[float], str]:
+        # Time to interactive in milliseconds: the system's reportFullyDrawn() timing when the app reports
+        # it, otherwise the wall-clock time until the ready activity is resumed
+        app_package = device.config.app_package
+        device.force_stop_app(app_package)
+        device.wait_for_app_stopped(app_package)
+        checkpoint = analyzer.logcat.checkpoint() if fully_drawn else 0
+        start = time.monotonic()
+        launch = device.launch_app(app_package, device.config.app_activity, wait=True)
+        device.wait_for_activity(app_package, ready_activity, timeout)
+        resumed = (time.monotonic() - start) * 1000
+        total_time = float(launch["TotalTime"]) if "TotalTime" in launch else None
+        if fully_drawn:
+            reported = self._wait_fully_drawn(analyzer, checkpoint, app_package, start + timeout)
+            if reported is not None:
+                return reported, total_time, "fully_drawn"
+            self.logger.warning(f"{app_package} did not report fully drawn within {timeout} seconds")
+        return resumed, total_time, "resumed"
+
+    def _wait_fully_drawn(self, analyzer: AppAnalyzer, checkpoint: int, app_package: str,
+                          deadline: float) -> Optional[float]:
+        while time.monotonic() < deadline:
+            for record in analyzer.logcat.query(since=checkpoint):
+                match = FULLY_DRAWN_PATTERN.search(record.message)
+                if match and match.group(1) == app_package:
+                    return int(match.group(2) or 0) * 1000.0 + int(match.group(3))
+            time.sleep(0.2)
+        return None
\ No newline at end of file
@@ -1,5 +1,3 @@
-import time 
-
 from .base_test import BaseTest, TestError
 from droid.test_framework import DeviceController, AppAnalyzer
 
@@ -13,28 +11,29 @@ class NetworkTest(BaseTest):
             self.logger.info("Testing offline behavior...")
             device.wait_for_device()
             device.unlock_screen()
+            device.wait_for_screen_on()
             device.disable_network()
-            time.sleep(2)  
-            
+            device.wait_for_network(enabled=False)
+
             self.logger.info("Launching app in offline mode...")
-            device.launch_app(app_package, app_activity)
-            time.sleep(5)  
-            
+            device.launch_app(app_package, app_activity, wait=True)
+            device.wait_for_activity(app_package, app_activity)
+
             results['offline'] = analyzer.analyze_behavior()
-            
+
             self.logger.info("Closing app...")
             device.force_stop_app(app_package)
-            time.sleep(2)  
+            device.wait_for_app_stopped(app_package)
 
             self.logger.info("Enabling network...")
             device.wait_for_device()
             device.enable_network()
-            time.sleep(5)  
-            
+            device.wait_for_network(enabled=True)
+
             self.logger.info("Launching app in online mode...")
-            device.launch_app(app_package, app_activity)
-            time.sleep(5)  
-            
+            device.launch_app(app_package, app_activity, wait=True)
+            device.wait_for_activity(app_package, app_activity)
+
             results['online'] = analyzer.analyze_behavior()
 
             self.logger.info("Closing app...")
@@ -0,0 +1,121 @@
+import glob
+import json
+import os
+import statistics
+from typing import Dict, List, Optional
+
+from .base_test import BaseTest, TestError
+from droid.test_framework import DeviceController, AppAnalyzer
+from droid.test_framework.artifact_store import open_artifact, read_manifest
+from droid.test_framework.stats import mann_whitney_greater, summarize
+
+METRICS_FILE = "startup_metrics.json"
+TIMING_KEYS = {"TotalTime": "total_time", "WaitTime": "wait_time"}
+
+class StartupTest(BaseTest):
+    def run(self, device: DeviceController, analyzer: AppAnalyzer):
+        try:
+            options = self.get_options(device.config)
+            iterations = int(options.get('iterations', 10))
+            warmup = int(options.get('warmup', 2))
+            modes = options.get('modes', ['cold', 'warm', 'hot'])
+            confidence = float(options.get('confidence', 0.95))
+            app_package = device.config.app_package
+
+            device.wait_for_device()
+            device.unlock_screen()
+            if options.get('clear_data', False):
+                device.clear_app_data(app_package)
+
+            samples: Dict[str, Dict[str, List[float]]] = {}
+            for mode in modes:
+                self.logger.info(f"Measuring {mode} start: {warmup} warm-up + {iterations} measured launches")
+                samples[mode] = self._measure(device, mode, iterations, warmup)
+
+            results: dict = {}
+            for mode, timings in samples.items():
+                results[mode] = {name: summarize(values, confidence) for name, values in timings.items() if values}
+
+            baseline = self._load_baseline(device, options.get('baseline_run'))
+            if baseline is not None:
+                for mode, timings in samples.items():
+                    if mode in baseline and timings.get('total_time') and baseline[mode].get('total_time'):
+                        results[mode]['regression'] = self._compare(
+                            timings['total_time'], baseline[mode]['total_time'],
+                            float(options.get('alpha', 0.05)), float(options.get('regression_threshold', 0.05))
+                        )
+
+            metrics_path = os.path.join(device.config.run_dir, METRICS_FILE)
+            with open(metrics_path, 'w') as f:
+                json.dump({"samples": samples, "summary": results}, f, indent=2)
+            results['metrics'] = metrics_path
+            device.force_stop_app(app_package)
+            return results
+        except Exception as e:
+            self.logger.error(f"Startup test failed: {str(e)}")
+            raise TestError(f"Startup test failed: {str(e)}")
+
+    def _measure(self, device: DeviceController, mode: str, iterations: int, warmup: int) -> Dict[str, List[float]]:
+        app_package = device.config.app_package
+        app_activity = device.config.app_activity
+        timings: Dict[str, List[float]] = {name: [] for name in TIMING_KEYS.values()}
+        # Warm and hot starts need the process (and for hot, the activity) alive beforehand
+        if mode != 'cold':
+            device.launch_app(app_package, app_activity, wait=True)
+        for iteration in range(warmup + iterations):
+            if mode == 'cold':
+                device.force_stop_app(app_package)
+                device.wait_for_app_stopped(app_package)
+            elif mode == 'warm':
+                device.execute_command("shell input keyevent 4")  # Back button destroys the activity
+                device.wait_for_app_stopped(app_package)
+            elif mode == 'hot':
+                device.execute_command("shell input keyevent 3")  # Home button backgrounds the activity
+                device.wait_for_app_stopped(app_package)
+            else:
+                raise TestError(f"Unknown startup mode: {mode}")
+            launch = device.launch_app(app_package, app_activity, wait=True)
+            device.wait_for_activity(app_package, app_activity)
+            if iteration < warmup:
+                continue
+            for key, name in TIMING_KEYS.items():
+                if key in launch:
+                    timings[name].append(float(launch[key]))
+        return timings
+
+    def _load_baseline(self, device: DeviceController, baseline_run: Optional[str]) -> Optional[dict]:
+        if not baseline_run:
+            return None
+        # YAML reads unquoted run ids such as 20240101_120000 as integers; they need quoting in configs
+        baseline_run = str(baseline_run)
+        if not os.path.isdir(baseline_run):
+            baseline_run = os.path.join("test_results", baseline_run)
+        # Metrics files stay in the run directory, or are referenced from it when the artifact store is enabled
+        candidates = [(path, path) for path in sorted(glob.glob(os.path.join(baseline_run, "**", METRICS_FILE),
+                                                               recursive=True))]
+        candidates += [(os.path.join(record["run_dir"], METRICS_FILE), record["path"])
+                       for record in read_manifest(baseline_run) if record.get("name") == METRICS_FILE]
+        # Prefer the baseline measured on the same device when the earlier run used a device pool
+        device_dir = os.path.basename(device.config.run_dir)
+        preferred = [candidate for candidate in candidates if f"{os.sep}{device_dir}{os.sep}" in candidate[0]]
+        if not candidates:
+            self.logger.warning(f"No startup baseline found in {baseline_run}")
+            return None
+        path = (preferred or candidates)[0][1]
+        self.logger.info(f"Comparing against startup baseline: {path}")
+        with open_artifact(path) as f:
+            return json.load(f)["samples"]
+
+    def _compare(self, current: List[float], baseline: List[float], alpha: float, threshold: float) -> dict:
+        _, p_value = mann_whitney_greater(current, baseline)
+        baseline_median = statistics.median(baseline)
+        change = (statistics.median(current) - baseline_median) / baseline_median if baseline_median else 0.0
+        regressed = p_value < alpha and change > threshold
+        if regressed:
+            self.logger.warning(f"Startup regression: median {change:+.1%} vs baseline (p={p_value:.4f})")
+        return {
+            "baseline_median": baseline_median,
+            "median_change": change,
+            "p_value": p_value,
+            "regressed": regressed,
+        }
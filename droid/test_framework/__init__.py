@@ -1,9 +1,15 @@
 from .device_controller import DeviceController
+from .async_device_controller import AsyncDeviceController
 from .app_analyzer import AppAnalyzer
+from .async_app_analyzer import AsyncAppAnalyzer
 from .test_runner import TestRunner
+from .async_test_runner import AsyncTestRunner
 
 __all__ = [
     'DeviceController',
+    'AsyncDeviceController',
     'AppAnalyzer',
-    'TestRunner'
+    'AsyncAppAnalyzer',
+    'TestRunner',
+    'AsyncTestRunner'
 ]
\ No newline at end of file
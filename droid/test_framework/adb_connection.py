@@ -0,0 +1,143 @@
+import socket
+import struct
+import logging
+from typing import BinaryIO, Optional, Tuple
+
+class AdbConnectionError(Exception):
+    pass
+
+class AdbServiceError(AdbConnectionError):
+    pass
+
+# Packet ids of the adb "shell,v2" protocol: [id:u8][length:u32le][payload]
+SHELL_V2_STDOUT = 1
+SHELL_V2_STDERR = 2
+SHELL_V2_EXIT = 3
+
+LEGACY_EXIT_MARKER = "__droid_sherlock_exit__"
+
+# Each command opens a localhost connection to the running adb server, which keeps the device
+# transport open, so no adb client process or device handshake is paid per call.
+class AdbSocketConnection:
+    def __init__(self, serial: str, host: str = "127.0.0.1", port: int = 5037, timeout: float = 30.0) -> None:
+        self.serial = serial
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.shell_v2: Optional[bool] = None
+        self.logger = logging.getLogger(__name__)
+
+    def shell(self, command: str) -> Tuple[int, str, str]:
+        if self.shell_v2 is not False:
+            try:
+                sock = self._open(f"shell,v2,raw:{command}")
+            except AdbServiceError:
+                if self.shell_v2:
+                    raise
+                self.logger.info(f"Device {self.serial} does not support shell v2, using legacy shell protocol")
+                self.shell_v2 = False
+            else:
+                self.shell_v2 = True
+                return self._read_shell_v2(sock)
+        return self._legacy_shell(command)
+
+    def exec_out(self, command: str, stream: Optional[BinaryIO] = None) -> bytes:
+        sock = self._open(f"exec:{command}")
+        try:
+            if stream is None:
+                return self._read_until_eof(sock)
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    return b""
+                stream.write(chunk)
+        finally:
+            sock.close()
+
+    def _read_shell_v2(self, sock: socket.socket) -> Tuple[int, str, str]:
+        stdout, stderr = bytearray(), bytearray()
+        exit_code = None
+        try:
+            while exit_code is None:
+                header = self._recv_exact(sock, 5, allow_eof=True)
+                if header is None:
+                    break
+                packet_id, length = struct.unpack("<BI", header)
+                payload = self._recv_exact(sock, length)
+                if packet_id == SHELL_V2_STDOUT:
+                    stdout += payload
+                elif packet_id == SHELL_V2_STDERR:
+                    stderr += payload
+                elif packet_id == SHELL_V2_EXIT:
+                    exit_code = payload[0] if payload else 0
+        finally:
+            sock.close()
+        if exit_code is None:
+            raise AdbConnectionError("Shell session closed before reporting an exit status")
+        return exit_code, stdout.decode(errors="replace"), stderr.decode(errors="replace")
+
+    def _legacy_shell(self, command: str) -> Tuple[int, str, str]:
+        sock = self._open(f"shell:{command}; echo {LEGACY_EXIT_MARKER}$?")
+        try:
+            output = self._read_until_eof(sock).decode(errors="replace").replace("\r\n", "\n")
+        finally:
+            sock.close()
+        body, marker, status = output.rpartition(LEGACY_EXIT_MARKER)
+        if not marker:
+            raise AdbConnectionError("Shell session closed before reporting an exit status")
+        try:
+            exit_code = int(status.strip())
+        except ValueError:
+            raise AdbConnectionError(f"Malformed exit status from legacy shell: {status!r}")
+        return exit_code, body, ""
+
+    def _open(self, service: str) -> socket.socket:
+        try:
+            sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        except OSError as e:
+            raise AdbConnectionError(f"Cannot reach adb server at {self.host}:{self.port}: {str(e)}")
+        try:
+            self._request(sock, f"host:transport:{self.serial}")
+        except Exception:
+            sock.close()
+            raise
+        try:
+            self._request(sock, service)
+        except AdbConnectionError as e:
+            sock.close()
+            raise AdbServiceError(str(e))
+        return sock
+
+    def _request(self, sock: socket.socket, payload: str) -> None:
+        data = payload.encode()
+        try:
+            sock.sendall(f"{len(data):04x}".encode() + data)
+            status = self._recv_exact(sock, 4)
+            if status == b"OKAY":
+                return
+            if status == b"FAIL":
+                length = int(self._recv_exact(sock, 4), 16)
+                message = self._recv_exact(sock, length).decode(errors="replace")
+                raise AdbConnectionError(f"adb server rejected '{payload}': {message}")
+        except OSError as e:
+            raise AdbConnectionError(f"adb server connection failed: {str(e)}")
+        raise AdbConnectionError(f"Unexpected adb server response to '{payload}': {status!r}")
+
+    def _recv_exact(self, sock: socket.socket, size: int, allow_eof: bool = False) -> Optional[bytes]:
+        buffer = bytearray()
+        while len(buffer) < size:
+            chunk = sock.recv(size - len(buffer))
+            if not chunk:
+                if allow_eof and not buffer:
+                    return None
+                raise AdbConnectionError("adb server closed the connection unexpectedly")
+            buffer += chunk
+        return bytes(buffer)
+
+    def _read_until_eof(self, sock: socket.socket) -> bytes:
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                return b"".join(chunks)
+            chunks.append(chunk)
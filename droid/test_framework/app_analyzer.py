@@ -1,19 +1,45 @@
 import time
 import os
-from typing import List
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+from typing import Dict, List, Optional, Tuple
 import logging
 
+from . import tracing
 from .device_controller import DeviceController
+from .logcat import LogcatMonitor
+from .report import ReportSink
+from .tracing import Tracer
 from droid.plugins import BasePlugin
 
 class AppAnalyzerError(Exception):
     pass
 
 class AppAnalyzer:
-    def __init__(self, device: DeviceController, plugins: List[BasePlugin]) -> None:
+    def __init__(self, device: DeviceController, plugins: List[BasePlugin],
+                 logcat: Optional[LogcatMonitor] = None) -> None:
         self.device = device
         self.plugins = plugins
+        self.logcat = logcat
+        self.logcat_checkpoint = 0
+        self.report: Optional[ReportSink] = None
+        self.tracer: Optional[Tracer] = None
+        self.test_name: Optional[str] = None
         self.logger = logging.getLogger(__name__)
+        for plugin in plugins:
+            try:
+                plugin.attach(self._plugin_device(plugin))
+            except Exception as e:
+                self.logger.error(f"Plugin {plugin.__class__.__name__} failed to attach: {str(e)}")
+        concurrent_plugins = [plugin for plugin in plugins if plugin.concurrency_safe]
+        self.executor: Optional[ThreadPoolExecutor] = None
+        # Last future per plugin index; a plugin that timed out keeps its worker until it returns, so it is
+        # not submitted again before then and the pool needs one worker per plugin
+        self.running: Dict[int, Future] = {}
+        if concurrent_plugins:
+            self.executor = ThreadPoolExecutor(max_workers=len(concurrent_plugins), thread_name_prefix="plugin")
+
+    def _plugin_device(self, plugin: BasePlugin) -> DeviceController:
+        return self.device
 
     def analyze_behavior(self) -> dict:
         try:
@@ -23,6 +49,8 @@ class AppAnalyzer:
             results = {}
             plugin_results = self._run_plugins()
             results.update(plugin_results)
+            if self.logcat is not None:
+                results['logcat'] = self._check_logcat()
 
             self.logger.info("App behavior analysis completed successfully")
             return results
@@ -31,15 +59,101 @@ class AppAnalyzer:
             self.logger.error(f"App behavior analysis failed: {str(e)}")
             raise AppAnalyzerError(f"App behavior analysis failed: {str(e)}")
 
+    def _check_logcat(self) -> dict:
+        summary, self.logcat_checkpoint = self.logcat.take_events(self.logcat_checkpoint)
+        if summary['crash'] or summary['anr']:
+            self.logger.warning(f"Logcat reported {summary['crash']} crashes and {summary['anr']} ANRs since last analysis")
+        return summary
+
     def _run_plugins(self) -> dict:
+        futures: Dict[int, Future] = {}
+        results_by_index = {}
+        for index, plugin in enumerate(self.plugins):
+            if plugin.concurrency_safe:
+                future = self._submit(index, plugin)
+                if future is None:
+                    results_by_index[index] = self._still_running(plugin)
+                else:
+                    futures[index] = future
+
+        for index, plugin in enumerate(self.plugins):
+            if not plugin.concurrency_safe:
+                results_by_index[index] = self._run_plugin(plugin)
+
+        # The timeouts start once the sequential plugins are done, so slow sequential plugins do not use them up
+        waiting_since = time.monotonic()
+        for index, future in futures.items():
+            plugin = self.plugins[index]
+            timeout = self._plugin_timeout(plugin)
+            remaining = max(0.0, waiting_since + timeout - time.monotonic())
+            try:
+                result, duration = future.result(timeout=remaining)
+                results_by_index[index] = self._record_plugin(plugin, duration, result)
+            except TimeoutError:
+                results_by_index[index] = self._timed_out(plugin, timeout)
+
         plugin_results = {}
-        for plugin in self.plugins:
+        for index, plugin in enumerate(self.plugins):
+            plugin_results[plugin.__class__.__name__] = results_by_index[index]
+        return plugin_results
+
+    def _submit(self, index: int, plugin: BasePlugin) -> Optional[Future]:
+        previous = self.running.get(index)
+        if self.executor is None or (previous is not None and not previous.done()):
+            return None
+        self.running[index] = self.executor.submit(self._execute_plugin, plugin)
+        return self.running[index]
+
+    def _still_running(self, plugin: BasePlugin) -> dict:
+        self.logger.error(f"Plugin {plugin.__class__.__name__} is still running from an earlier analysis point")
+        return self._record_plugin(plugin, 0.0, {"error": "Skipped, still running from an earlier analysis point"})
+
+    def _plugin_timeout(self, plugin: BasePlugin) -> float:
+        return plugin.timeout if plugin.timeout is not None else self.device.config.plugin_timeout
+
+    def _timed_out(self, plugin: BasePlugin, timeout: float) -> dict:
+        self.logger.error(f"Plugin {plugin.__class__.__name__} timed out after {timeout} seconds")
+        return self._record_plugin(plugin, timeout, {"error": f"Timed out after {timeout} seconds"})
+
+    def _run_plugin(self, plugin: BasePlugin) -> dict:
+        result, duration = self._execute_plugin(plugin)
+        return self._record_plugin(plugin, duration, result)
+
+    def _execute_plugin(self, plugin: BasePlugin) -> Tuple[dict, float]:
+        # Not recorded here: a plugin that times out is recorded once as timed out, and whatever its
+        # worker returns later is dropped
+        start_time = time.monotonic()
+        with tracing.span(self.tracer, plugin.__class__.__name__, "plugin", test=self.test_name,
+                          device=self.device.device_id) as span:
             try:
                 self.logger.info(f"Running plugin: {plugin.__class__.__name__}")
-                result = plugin.run(self.device)
-                plugin_results[plugin.__class__.__name__] = result
+                result = plugin.run(self._plugin_device(plugin))
                 self.logger.info(f"Plugin {plugin.__class__.__name__} completed successfully")
             except Exception as e:
                 self.logger.error(f"Plugin {plugin.__class__.__name__} failed: {str(e)}")
-                plugin_results[plugin.__class__.__name__] = {"error": str(e)}
-        return plugin_results
\ No newline at end of file
+                result = {"error": str(e)}
+                span["error"] = str(e)
+        return result, time.monotonic() - start_time
+
+    def _record_plugin(self, plugin: BasePlugin, duration: float, result: dict) -> dict:
+        if self.report is not None:
+            self.report.plugin_completed(self.test_name, self.device.device_id, plugin.__class__.__name__,
+                                         duration, result)
+        return result
+
+    def flush(self) -> None:
+        for plugin in self.plugins:
+            try:
+                plugin.flush()
+            except Exception as e:
+                self.logger.error(f"Plugin {plugin.__class__.__name__} failed to flush: {str(e)}")
+
+    def close(self) -> None:
+        for plugin in self.plugins:
+            try:
+                plugin.detach(self._plugin_device(plugin))
+            except Exception as e:
+                self.logger.error(f"Plugin {plugin.__class__.__name__} failed to detach: {str(e)}")
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
\ No newline at end of file
@@ -0,0 +1,128 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import IO, Dict, Iterator, List, Optional, Set
+
+ARTIFACT_DIR = "artifacts"
+MANIFEST_FILE = "artifacts.jsonl"
+# Formats that are compressed already and gain nothing from gzip
+COMPRESSED_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp", ".gz", ".zip", ".mp4", ".apk")
+
+class ArtifactStoreError(Exception):
+    pass
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def read_manifest(run_dir: str) -> Iterator[dict]:
+    # Manifests of pooled runs live in the per-device directories
+    for directory, _, files in os.walk(run_dir):
+        if MANIFEST_FILE in files:
+            with open(os.path.join(directory, MANIFEST_FILE), encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        yield {**json.loads(line), "run_dir": directory}
+                    except json.JSONDecodeError:
+                        continue
+
+def open_artifact(path: str) -> IO[bytes]:
+    return gzip.open(path, 'rb') if path.endswith(".gz") else open(path, 'rb')
+
+class ArtifactStore:
+    # Keeps one copy of each distinct artifact under objects/<first two hex digits>/<sha256><ext>,
+    # and records which run, test and result key referenced it in the run directory's artifacts.jsonl
+    def __init__(self, root: str, compress_threshold: int = 1 << 20, workers: int = 2) -> None:
+        self.root = root
+        self.compress_threshold = compress_threshold
+        self.logger = logging.getLogger(__name__)
+        self.lock = threading.Lock()
+        self.compressing: Set[str] = set()
+        self.pending: List[Future] = []
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="artifact-compress")
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+
+    def object_path(self, digest: str, extension: str) -> str:
+        return os.path.join(self.root, "objects", digest[:2], f"{digest[2:]}{extension}")
+
+    def add(self, path: str, run_dir: str, test_name: str, key: str) -> str:
+        # Returns where the artifact ends up. For a compressed artifact that is the .gz path, which only
+        # exists once flush() has waited for the background compression
+        try:
+            size = os.path.getsize(path)
+            digest = file_digest(path)
+            extension = os.path.splitext(path)[1].lower()
+            stored = self.object_path(digest, extension)
+            compress = size >= self.compress_threshold and extension not in COMPRESSED_EXTENSIONS
+            final_path = f"{stored}.gz" if compress else stored
+            with self.lock:
+                if os.path.exists(stored) or os.path.exists(f"{stored}.gz"):
+                    os.remove(path)
+                    if not os.path.exists(stored) and digest not in self.compressing:
+                        final_path, compress = f"{stored}.gz", False
+                    self.logger.info(f"Deduplicated artifact {os.path.basename(path)} ({digest[:12]})")
+                else:
+                    os.makedirs(os.path.dirname(stored), exist_ok=True)
+                    shutil.move(path, stored)
+                if compress and not os.path.exists(final_path) and digest not in self.compressing:
+                    self.compressing.add(digest)
+                    self.pending.append(self.executor.submit(self._compress, digest, stored))
+            self._reference(run_dir, {
+                "test": test_name,
+                "key": key,
+                "name": os.path.basename(path),
+                "sha256": digest,
+                "size": size,
+                "path": final_path,
+            })
+            return final_path
+        except OSError as e:
+            raise ArtifactStoreError(f"Failed to store artifact {path}: {str(e)}")
+
+    def _reference(self, run_dir: str, record: Dict[str, object]) -> None:
+        with self.lock:
+            with open(os.path.join(run_dir, MANIFEST_FILE), 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + "\n")
+
+    def _compress(self, digest: str, stored: str) -> None:
+        temporary = f"{stored}.gz.tmp"
+        try:
+            with open(stored, 'rb') as source, gzip.open(temporary, 'wb', compresslevel=6) as target:
+                shutil.copyfileobj(source, target, 1 << 20)
+            # add() checks which copy exists under the lock, so it never sees the object between the two steps
+            with self.lock:
+                os.replace(temporary, f"{stored}.gz")
+                os.remove(stored)
+            self.logger.info(f"Compressed artifact {os.path.basename(stored)}")
+        except OSError as e:
+            self.logger.error(f"Failed to compress artifact {stored}: {str(e)}")
+            if os.path.exists(temporary):
+                os.remove(temporary)
+        finally:
+            with self.lock:
+                self.compressing.discard(digest)
+
+    def resolve(self, digest: str, extension: str = "") -> Optional[str]:
+        stored = self.object_path(digest, extension)
+        for candidate in (stored, f"{stored}.gz"):
+            if os.path.exists(candidate):
+                return candidate
+        return None
+
+    def flush(self) -> None:
+        with self.lock:
+            pending, self.pending = self.pending, []
+        for future in pending:
+            future.result()
+
+    def close(self) -> None:
+        self.flush()
+        self.executor.shutdown(wait=True)
\ No newline at end of file
@@ -0,0 +1,96 @@
+import asyncio
+import time
+from typing import Awaitable, Dict, List, Tuple
+
+from . import tracing
+from .app_analyzer import AppAnalyzer, AppAnalyzerError
+from .device_controller import DeviceController
+from droid.plugins import AsyncBasePlugin, BasePlugin
+
+class AsyncAppAnalyzer(AppAnalyzer):
+    # Async plugins are awaited on the event loop; synchronous plugins run on worker threads against
+    # the controller's synchronous twin, so existing plugins work unchanged
+    def _plugin_device(self, plugin: BasePlugin) -> DeviceController:
+        return self.device if isinstance(plugin, AsyncBasePlugin) else self.device.sync
+
+    async def analyze_behavior(self) -> dict:
+        try:
+            self.logger.info("Starting app behavior analysis")
+            await self.device.wait_for_device()
+
+            results = {}
+            plugin_results = await self._run_plugins_async()
+            results.update(plugin_results)
+            if self.logcat is not None:
+                results['logcat'] = self._check_logcat()
+
+            self.logger.info("App behavior analysis completed successfully")
+            return results
+
+        except Exception as e:
+            self.logger.error(f"App behavior analysis failed: {str(e)}")
+            raise AppAnalyzerError(f"App behavior analysis failed: {str(e)}")
+
+    async def _run_plugins_async(self) -> dict:
+        loop = asyncio.get_running_loop()
+        concurrent: Dict[int, Awaitable[dict]] = {}
+        sequential: List[int] = []
+        results_by_index = {}
+        for index, plugin in enumerate(self.plugins):
+            if isinstance(plugin, AsyncBasePlugin):
+                concurrent[index] = self._with_timeout(plugin, self._run_async_plugin(plugin))
+            elif plugin.concurrency_safe:
+                future = self._submit(index, plugin)
+                if future is None:
+                    results_by_index[index] = self._still_running(plugin)
+                else:
+                    concurrent[index] = self._with_timeout(plugin, asyncio.wrap_future(future))
+            else:
+                sequential.append(index)
+
+        # Plugins that are not concurrency safe run one after another, alongside the concurrent ones
+        async def run_sequential() -> Dict[int, dict]:
+            return {index: await loop.run_in_executor(None, self._run_plugin, self.plugins[index]) for index in sequential}
+
+        sequential_results, *concurrent_results = await asyncio.gather(run_sequential(), *concurrent.values())
+        results_by_index.update(sequential_results)
+        results_by_index.update(zip(concurrent, concurrent_results))
+
+        plugin_results = {}
+        for index, plugin in enumerate(self.plugins):
+            plugin_results[plugin.__class__.__name__] = results_by_index[index]
+        return plugin_results
+
+    async def _with_timeout(self, plugin: BasePlugin, awaitable: Awaitable[Tuple[dict, float]]) -> dict:
+        timeout = self._plugin_timeout(plugin)
+        try:
+            result, duration = await asyncio.wait_for(awaitable, timeout)
+        except asyncio.TimeoutError:
+            return self._timed_out(plugin, timeout)
+        return self._record_plugin(plugin, duration, result)
+
+    async def _run_async_plugin(self, plugin: AsyncBasePlugin) -> Tuple[dict, float]:
+        start_time = time.monotonic()
+        with tracing.span(self.tracer, plugin.__class__.__name__, "plugin", asyncio.current_task(),
+                          test=self.test_name, device=self.device.device_id) as span:
+            try:
+                self.logger.info(f"Running plugin: {plugin.__class__.__name__}")
+                result = await plugin.run(self.device)
+                self.logger.info(f"Plugin {plugin.__class__.__name__} completed successfully")
+            except Exception as e:
+                self.logger.error(f"Plugin {plugin.__class__.__name__} failed: {str(e)}")
+                result = {"error": str(e)}
+                span["error"] = str(e)
+        return result, time.monotonic() - start_time
+
+class SyncAnalyzerAdapter:
+    # Handed to synchronous tests running on a worker thread; analysis is scheduled back onto the event loop
+    def __init__(self, analyzer: AsyncAppAnalyzer, loop: asyncio.AbstractEventLoop) -> None:
+        self.analyzer = analyzer
+        self.loop = loop
+
+    def analyze_behavior(self) -> dict:
+        return asyncio.run_coroutine_threadsafe(self.analyzer.analyze_behavior(), self.loop).result()
+
+    def __getattr__(self, name: str):
+        return getattr(self.analyzer, name)
\ No newline at end of file
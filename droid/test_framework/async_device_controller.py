@@ -0,0 +1,315 @@
+import asyncio
+import logging
+import os
+import shlex
+import time
+from typing import Any, Awaitable, BinaryIO, Callable, Dict, List, Optional, Sequence, Union
+
+from droid.types import Configuration
+from . import conditions, tracing
+from .conditions import AsyncPredicate, PollStrategy
+from .device_controller import (CURRENT_ACTIVITY_COMMAND, DEVICE_PROPERTY_COMMANDS, DISABLE_NETWORK_COMMANDS,
+                                ENABLE_NETWORK_COMMANDS, NETWORK_CONNECTED_COMMAND, NETWORK_STATE_COMMANDS,
+                                SCREEN_STATE_COMMAND, UNLOCK_COMMANDS, CommandResult, DeviceController,
+                                DeviceControllerError, build_batch_script, format_device_info, launch_command,
+                                parse_batch_output, parse_device_properties, parse_launch_timings,
+                                parse_network_connected, parse_network_state, parse_screen_on, restore_commands)
+from .tracing import Tracer
+from .ui_hierarchy import UiHierarchy, UiHierarchyError, parse_ui_hierarchy
+
+# Runs adb with asyncio.create_subprocess_exec, so one event loop can drive many devices without a thread
+# per blocking call. Commands are passed as argument lists; nothing goes through a host shell.
+class AsyncDeviceController:
+    def __init__(self, config: Configuration, sync: Optional[DeviceController] = None) -> None:
+        self.device_id = config.device_id
+        self.config = config
+        self.logger = logging.getLogger(__name__)
+        # Synchronous twin handed to plugins and tests written against DeviceController. Both share
+        # event listeners, cached properties and state, and the liveness timestamp.
+        self.sync = sync or DeviceController(config)
+        self.listeners = self.sync.listeners
+        self.state = self.sync.state
+
+    @property
+    def last_seen(self) -> Optional[float]:
+        return self.sync.last_seen
+
+    @property
+    def tracer(self) -> Optional[Tracer]:
+        return self.sync.tracer
+
+    @tracer.setter
+    def tracer(self, tracer: Optional[Tracer]) -> None:
+        self.sync.tracer = tracer
+
+    def subscribe(self, event: str, callback: Callable[..., None]) -> None:
+        self.sync.subscribe(event, callback)
+
+    def unsubscribe(self, event: str, callback: Callable[..., None]) -> None:
+        self.sync.unsubscribe(event, callback)
+
+    async def _notify(self, event: str, **kwargs) -> None:
+        # Listeners are synchronous and may call back into the device, so they run off the event loop
+        await asyncio.to_thread(self.sync._notify, event, **kwargs)
+
+    async def execute(self, *args: str, stdout: Union[int, BinaryIO] = asyncio.subprocess.PIPE) -> bytes:
+        full_args = ["adb", "-s", self.device_id, *args]
+        full_command = shlex.join(full_args)
+        with tracing.span(self.tracer, shlex.join(args), "adb", asyncio.current_task(), device=self.device_id):
+            try:
+                self.logger.debug(f"Executing command: {full_command}")
+                process = await asyncio.create_subprocess_exec(*full_args, stdout=stdout, stderr=asyncio.subprocess.PIPE)
+            except OSError as e:
+                error_msg = f"Error executing command: {full_command}\nError message: {str(e)}"
+                self.logger.error(error_msg)
+                raise DeviceControllerError(error_msg)
+            try:
+                output, error = await process.communicate()
+            except asyncio.CancelledError:
+                process.kill()
+                raise
+            if process.returncode != 0:
+                error_msg = f"Error executing command: {full_command}\nError message: {error.decode(errors='replace')}"
+                self.logger.error(error_msg)
+                raise DeviceControllerError(error_msg)
+            self.sync.last_seen = time.monotonic()
+            return output or b""
+
+    async def execute_command(self, command: str) -> str:
+        # Accepts the same command strings as DeviceController.execute_command
+        if self.sync.connection is not None:
+            return await asyncio.to_thread(self.sync.execute_command, command)
+        output = (await self.execute(*shlex.split(command))).decode(errors="replace")
+        self.logger.debug(f"Command output: {output}")
+        return output
+
+    async def shell(self, command: str) -> str:
+        # A single argument after `shell` reaches the device shell verbatim
+        if self.sync.connection is not None:
+            return await asyncio.to_thread(self.sync._execute_shell_command, command)
+        output = (await self.execute("shell", command)).decode(errors="replace")
+        self.logger.debug(f"Command output: {output}")
+        return output
+
+    async def execute_batch(self, commands: Sequence[str]) -> List[CommandResult]:
+        script = build_batch_script(commands)
+        return parse_batch_output(commands, script, await self.shell(script))
+
+    async def _check_batch(self, commands: Sequence[str]) -> List[CommandResult]:
+        results = await self.execute_batch(commands)
+        for command, result in zip(commands, results):
+            if not result.ok:
+                raise DeviceControllerError(f"Command failed with exit code {result.exit_code}: {command}")
+        return results
+
+    async def exec_out(self, command: str, stream: Optional[BinaryIO] = None) -> bytes:
+        if self.sync.connection is not None:
+            return await asyncio.to_thread(self.sync.exec_out, command, stream)
+        return await self.execute("exec-out", *shlex.split(command),
+                                  stdout=stream if stream is not None else asyncio.subprocess.PIPE)
+
+    async def _cached(self, key: str, loader: Callable[[], Awaitable[Any]], max_age: Optional[float]) -> Any:
+        found, value = self.state.get(key, max_age)
+        if not found:
+            value = await loader()
+            self.state.set(key, value)
+        return value
+
+    async def launch_app(self, package_name: str, activity_name: str, wait: bool = False) -> Dict[str, int]:
+        try:
+            self.state.invalidate("current_activity")
+            await self._notify("app_launching", package_name=package_name, activity_name=activity_name)
+            output = await self.shell(launch_command(package_name, activity_name, wait))
+            self.state.invalidate("current_activity")
+            self.logger.info(f"Launched app: {package_name}/{activity_name}")
+            await self._notify("app_launched", package_name=package_name, activity_name=activity_name)
+            if not wait:
+                return {}
+            timings = parse_launch_timings(output)
+            self.logger.info(f"Launch timings: {timings}")
+            return timings
+        except DeviceControllerError as e:
+            raise DeviceControllerError(f"Failed to launch app: {str(e)}")
+
+    async def force_stop_app(self, package_name: str) -> None:
+        try:
+            await self.shell(f"am force-stop {package_name}")
+            self.state.invalidate("current_activity")
+            self.logger.info(f"Force stopped app: {package_name}")
+            await self._notify("app_stopped", package_name=package_name)
+        except DeviceControllerError as e:
+            raise DeviceControllerError(f"Failed to force stop app: {str(e)}")
+
+    async def get_current_activity(self, max_age: Optional[float] = None) -> str:
+        try:
+            return await self._cached("current_activity", lambda: self.shell(CURRENT_ACTIVITY_COMMAND), max_age)
+        except DeviceControllerError as e:
+            raise DeviceControllerError(f"Failed to get current activity: {str(e)}")
+
+    async def capture_screenshot(self, filename: str) -> str:
+        path = os.path.join(self.config.run_dir, filename)
+        try:
+            with open(path, 'wb') as f:
+                await self.exec_out("screencap -p", f)
+            self.logger.info(f"Captured screenshot: {filename}")
+            return path
+        except (DeviceControllerError, OSError) as e:
+            if os.path.exists(path):
+                os.remove(path)
+            raise DeviceControllerError(f"Failed to capture screenshot: {str(e)}")
+
+    async def capture_screenshot_bytes(self, raw: bool = False) -> bytes:
+        try:
+            return await self.exec_out("screencap" if raw else "screencap -p")
+        except DeviceControllerError as e:
+            raise DeviceControllerError(f"Failed to capture screenshot: {str(e)}")
+
+    async def dump_ui_hierarchy(self) -> UiHierarchy:
+        if self.sync.connection is not None:
+            return await asyncio.to_thread(self.sync.dump_ui_hierarchy)
+        try:
+            output = await self.exec_out("uiautomator dump /dev/tty")
+            # Parsing thousands of nodes takes long enough to keep it off the event loop
+            return await asyncio.to_thread(parse_ui_hierarchy, output)
+        except (DeviceControllerError, UiHierarchyError) as e:
+            raise DeviceControllerError(f"Failed to dump UI hierarchy: {str(e)}")
+
+    async def is_screen_on(self, max_age: Optional[float] = None) -> bool:
+        async def load() -> bool:
+            return parse_screen_on(await self.shell(SCREEN_STATE_COMMAND))
+        try:
+            return await self._cached("screen_on", load, max_age)
+        except DeviceControllerError as e:
+            raise DeviceControllerError(f"Failed to check screen state: {str(e)}")
+
+    async def unlock_screen(self) -> None:
+        try:
+            self.state.invalidate("screen_on", "current_activity")
+            await self._check_batch(UNLOCK_COMMANDS)
+            self.state.invalidate("screen_on", "current_activity")
+            self.logger.info("Unlocked device screen")
+        except DeviceControllerError as e:
+            raise DeviceControllerError(f"Failed to unlock screen: {str(e)}")
+
+    async def clear_app_data(self, package_name: str) -> None:
+        try:
+            await self.shell(f"pm clear {package_name}")
+            self.state.invalidate("current_activity")
+            self.logger.info(f"Cleared app data: {package_name}")
+        except DeviceControllerError as e:
+            raise DeviceControllerError(f"Failed to clear app data: {str(e)}")
+
+    async def install_app(self, apk_path: str) -> None:
+        try:
+            await self.execute("install", apk_path)
+            self.logger.info(f"Installed app from: {apk_path}")
+        except DeviceControllerError as e:
+            raise DeviceControllerError(f"Failed to install app: {str(e)}")
+
+    async def uninstall_app(self, package_name: str) -> None:
+        try:
+            await self.execute("uninstall", package_name)
+            self.logger.info(f"Uninstalled app: {package_name}")
+        except DeviceControllerError as e:
+            raise DeviceControllerError(f"Failed to uninstall app: {str(e)}")
+
+    async def disable_network(self) -> None:
+        try:
+            self.state.invalidate("network_state", "network_connected")
+            await self._check_batch(DISABLE_NETWORK_COMMANDS)
+            self.state.invalidate("network_state", "network_connected")
+            self.logger.info("Disabled network connections")
+        except DeviceControllerError as e:
+            raise DeviceControllerError(f"Failed to disable network: {str(e)}")
+
+    async def enable_network(self) -> None:
+        try:
+            self.state.invalidate("network_state", "network_connected")
+            await self._check_batch(ENABLE_NETWORK_COMMANDS)
+            self.state.invalidate("network_state", "network_connected")
+            self.logger.info("Enabled network connections")
+        except DeviceControllerError as e:
+            raise DeviceControllerError(f"Failed to enable network: {str(e)}")
+
+    async def restore_defaults(self, package_name: str) -> None:
+        try:
+            self.state.invalidate()
+            await self._check_batch(restore_commands(package_name))
+            self.state.invalidate()
+            self.logger.info(f"Enabled network connections and force stopped app: {package_name}")
+            await self._notify("app_stopped", package_name=package_name)
+        except DeviceControllerError as e:
+            raise DeviceControllerError(f"Failed to restore device defaults: {str(e)}")
+
+    async def get_network_state(self, max_age: Optional[float] = None) -> str:
+        async def load() -> str:
+            return parse_network_state(await self._check_batch(NETWORK_STATE_COMMANDS))
+        try:
+            return await self._cached("network_state", load, max_age)
+        except DeviceControllerError as e:
+            raise DeviceControllerError(f"Failed to get network state: {str(e)}")
+
+    async def is_network_connected(self, max_age: Optional[float] = None) -> bool:
+        async def load() -> bool:
+            return parse_network_connected(await self.shell(NETWORK_CONNECTED_COMMAND))
+        try:
+            return await self._cached("network_connected", load, max_age)
+        except DeviceControllerError:
+            return False
+
+    async def get_device_properties(self) -> Dict[str, str]:
+        if self.sync.properties is not None:
+            return self.sync.properties
+        try:
+            self.sync.properties = parse_device_properties(await self._check_batch(DEVICE_PROPERTY_COMMANDS))
+            return self.sync.properties
+        except DeviceControllerError as e:
+            raise DeviceControllerError(f"Failed to get device properties: {str(e)}")
+
+    async def get_screen_size(self) -> str:
+        return (await self.get_device_properties())["screen_size"]
+
+    async def get_device_info(self) -> str:
+        try:
+            return format_device_info(await self.get_device_properties())
+        except DeviceControllerError as e:
+            raise DeviceControllerError(f"Failed to get device info: {str(e)}")
+
+    async def wait_until(self, predicate: AsyncPredicate, timeout: float = 30, poll: Optional[PollStrategy] = None,
+                         description: str = "condition") -> float:
+        with tracing.span(self.tracer, description, "wait", asyncio.current_task(), device=self.device_id):
+            start_time = time.monotonic()
+            for delay in (poll or PollStrategy()).delays(timeout):
+                await asyncio.sleep(delay)
+                try:
+                    if await predicate(self):
+                        elapsed = time.monotonic() - start_time
+                        self.logger.info(f"Reached {description} after {elapsed:.2f} seconds")
+                        return elapsed
+                except DeviceControllerError as e:
+                    self.logger.debug(f"Still waiting for {description}: {str(e)}")
+            raise DeviceControllerError(f"Timed out after {timeout} seconds waiting for {description}")
+
+    async def wait_for_activity(self, package_name: str, activity_name: Optional[str] = None,
+                                timeout: float = 30) -> float:
+        return await self.wait_until(conditions.async_activity_resumed(package_name, activity_name), timeout,
+                                     description=f"resumed activity {package_name}/{activity_name or ''}")
+
+    async def wait_for_app_stopped(self, package_name: str, timeout: float = 30) -> float:
+        return await self.wait_until(conditions.async_negate(conditions.async_activity_resumed(package_name)), timeout,
+                                     description=f"{package_name} stopped")
+
+    async def wait_for_network(self, enabled: bool, timeout: float = 30) -> float:
+        state = "enabled" if enabled else "disabled"
+        return await self.wait_until(conditions.async_network_state(enabled), timeout, description=f"network {state}")
+
+    async def wait_for_screen_on(self, timeout: float = 30) -> float:
+        return await self.wait_until(conditions.async_screen_awake(), timeout, description="screen awake")
+
+    async def wait_for_device(self, timeout: int = 60) -> None:
+        if self.last_seen is not None and time.monotonic() - self.last_seen < self.config.liveness_window:
+            return
+        try:
+            await self.wait_until(conditions.async_device_responsive(), timeout, description="device ready")
+        except DeviceControllerError:
+            raise DeviceControllerError(f"Device not ready after {timeout} seconds")
\ No newline at end of file
@@ -0,0 +1,135 @@
+import asyncio
+import os
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import tracing
+from .test_runner import DeviceSession, TestRunner, TestRunnerError
+from .async_device_controller import AsyncDeviceController
+from .async_app_analyzer import AsyncAppAnalyzer, SyncAnalyzerAdapter
+from .logcat import LogcatMonitor
+from droid.types import Configuration
+from droid.test_cases import AsyncBaseTest, BaseTest
+
+class AsyncTestRunner(TestRunner):
+    # Drives every device from one event loop. Async tests and plugins are awaited directly; synchronous
+    # ones run on a shared thread pool against each controller's synchronous twin.
+    supports_async = True
+
+    def _create_session(self, device_id: str) -> DeviceSession:
+        config = self.config.for_device(device_id) if self.pooled else self.config
+        device = self._initialize_device_controller(config)
+        device.tracer = self.tracer
+        plugins = [plugin_class() for plugin_class in self.plugin_classes]
+        logcat = None
+        if config.logcat:
+            logcat = LogcatMonitor(device.sync, config.app_package, os.path.join(config.run_dir, "logcat.txt.gz"))
+        analyzer = AsyncAppAnalyzer(device, plugins, logcat)
+        analyzer.report = self.report
+        analyzer.tracer = self.tracer
+        return DeviceSession(config, device, analyzer, logcat)
+
+    def _initialize_device_controller(self, config: Configuration) -> AsyncDeviceController:
+        try:
+            return AsyncDeviceController(config)
+        except Exception as e:
+            raise TestRunnerError(f"Failed to initialize AsyncDeviceController: {str(e)}")
+
+    def run(self) -> None:
+        asyncio.run(self.run_async())
+
+    async def run_async(self) -> None:
+        loop = asyncio.get_running_loop()
+        # Enough threads for every device to run a synchronous test and all of its synchronous plugins at once
+        loop.set_default_executor(ThreadPoolExecutor(
+            max_workers=len(self.sessions) * (len(self.plugin_classes) + 2), thread_name_prefix="sync"
+        ))
+        try:
+            self.logger.info(f"Starting test run {self.config.run_id}")
+            start_time = time.monotonic()
+            task = asyncio.current_task()
+            with self._phase("device_info", task):
+                await asyncio.gather(*(session.device.wait_for_device() for session in self.sessions))
+                infos = await asyncio.gather(*(session.device.get_device_info() for session in self.sessions))
+                devices = {}
+                for session, device_info in zip(self.sessions, infos):
+                    devices[session.config.device_id] = device_info
+                    self.logger.info(f"Device info: {device_info}")
+                    if session.logcat is not None:
+                        session.logcat.start()
+            self.report.run_started(self.config.run_id, self.config.app_package, self.config.app_activity,
+                                    devices, self.config.metadata, self.config.pool_mode)
+
+            with self._phase("tests", task):
+                await self._schedule_async()
+            if self.artifact_store is not None:
+                with self._phase("artifact_flush", task):
+                    await loop.run_in_executor(None, self.artifact_store.flush)
+
+            self.report.run_completed(self.config.run_id, time.monotonic() - start_time)
+            with self._phase("report", task):
+                self._generate_report()
+            with self._phase("history", task):
+                self._record_history()
+            self.logger.info(f"Test run {self.config.run_id} completed. Results saved in {self.config.run_dir}")
+        except Exception as e:
+            self.logger.error(f"Test run failed: {str(e)}")
+            raise TestRunnerError(f"Test run failed: {str(e)}")
+        finally:
+            await self.cleanup_async()
+
+    async def _schedule_async(self) -> None:
+        await asyncio.gather(*(self._run_session_async(session, work)
+                               for session, work in zip(self.sessions, self._work_queues())))
+
+    async def _run_session_async(self, session: DeviceSession, work: queue.Queue) -> None:
+        for index, test_class in self._take_work(work):
+            result_name = self._result_name(session, test_class)
+            start_time = time.monotonic()
+            with tracing.span(self.tracer, result_name, "test", asyncio.current_task(), device=session.config.device_id):
+                test_result = await self._run_test_case_async(session, test_class())
+            self._test_completed(session, index, test_class, time.monotonic() - start_time, test_result)
+
+    async def _run_test_case_async(self, session: DeviceSession, test_case: BaseTest) -> dict:
+        loop = asyncio.get_running_loop()
+        task = asyncio.current_task()
+        test_name = self._test_started(session, test_case)
+        try:
+            await session.device.wait_for_device()
+            with self._phase("execute", task, test=test_name):
+                if isinstance(test_case, AsyncBaseTest):
+                    test_result = await test_case.run(session.device, session.analyzer)
+                else:
+                    test_result = await loop.run_in_executor(
+                        None, test_case.run, session.device.sync, SyncAnalyzerAdapter(session.analyzer, loop)
+                    )
+            with self._phase("plugin_flush", task, test=test_name):
+                await loop.run_in_executor(None, session.analyzer.flush)
+            with self._phase("save_artifacts", task, test=test_name):
+                self._save_test_artifacts(test_name, test_result, session.config.run_dir)
+            with self._phase("visual_diff", task, test=test_name):
+                await loop.run_in_executor(None, self._check_visual_diff, session, test_name, test_result)
+        except Exception as e:
+            test_result = self._test_failed(test_name, e)
+        return test_result
+
+    async def cleanup_async(self) -> None:
+        self.logger.info("Performing test run cleanup")
+        with self._phase("cleanup", asyncio.current_task()):
+            await asyncio.gather(*(self._cleanup_session(session) for session in self.sessions))
+            if self.artifact_store is not None:
+                await asyncio.get_running_loop().run_in_executor(None, self.artifact_store.close)
+        self.report.close()
+        self._export_trace()
+
+    async def _cleanup_session(self, session: DeviceSession) -> None:
+        loop = asyncio.get_running_loop()
+        # Detaching plugins and stopping logcat join background threads
+        await loop.run_in_executor(None, session.analyzer.close)
+        if session.logcat is not None:
+            await loop.run_in_executor(None, session.logcat.stop)
+        try:
+            await session.device.restore_defaults(self.config.app_package)
+        except Exception as e:
+            self.logger.error(f"Error during cleanup of device {session.config.device_id}: {str(e)}")
\ No newline at end of file
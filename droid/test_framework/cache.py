@@ -0,0 +1,38 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+T = TypeVar('T')
+
+class TTLCache:
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        self.entries: Dict[str, Tuple[float, Any]] = {}
+        self.lock = threading.Lock()
+
+    def get(self, key: str, max_age: Optional[float] = None) -> Tuple[bool, Any]:
+        max_age = self.ttl if max_age is None else max_age
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry is not None and time.monotonic() - entry[0] < max_age:
+            return True, entry[1]
+        return False, None
+
+    def set(self, key: str, value: Any) -> None:
+        with self.lock:
+            self.entries[key] = (time.monotonic(), value)
+
+    def get_or_load(self, key: str, loader: Callable[[], T], max_age: Optional[float] = None) -> T:
+        found, value = self.get(key, max_age)
+        if found:
+            return value
+        value = loader()
+        self.set(key, value)
+        return value
+
+    def invalidate(self, *keys: str) -> None:
+        with self.lock:
+            if not keys:
+                self.entries.clear()
+            for key in keys:
+                self.entries.pop(key, None)
\ No newline at end of file
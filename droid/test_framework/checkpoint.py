@@ -0,0 +1,81 @@
+import json
+import os
+import threading
+from typing import List, Optional, Set, Tuple
+
+CHECKPOINT_FILE = "checkpoint.json"
+
+class CheckpointError(Exception):
+    pass
+
+class Checkpoint:
+    # Progress of a run, rewritten atomically after every finished test so that a run killed at any point
+    # can be resumed. Tests that ended in an error are recorded but not treated as done, so a resume retries them.
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.lock = threading.Lock()
+        self.run_id: Optional[str] = None
+        self.shard = ""
+        self.test_cases: List[str] = []
+        self.completed: List[dict] = []
+
+    def exists(self) -> bool:
+        return os.path.isfile(self.path)
+
+    def load(self) -> None:
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            raise CheckpointError(f"Failed to read checkpoint {self.path}: {str(e)}")
+        self.run_id = data.get("run_id")
+        self.shard = data.get("shard", "")
+        self.test_cases = data.get("test_cases", [])
+        self.completed = data.get("completed", [])
+
+    def start(self, run_id: str, shard: str, test_cases: List[str]) -> None:
+        with self.lock:
+            self.run_id = run_id
+            self.shard = shard
+            self.test_cases = list(test_cases)
+            self._save()
+
+    def record(self, index: int, name: str, test: str, device: str, duration: float, result: dict) -> None:
+        with self.lock:
+            self.completed.append({
+                "index": index,
+                "name": name,
+                "test": test,
+                "device": device,
+                "duration": duration,
+                "status": "error" if "error" in result else "passed",
+                "result": result,
+            })
+            self._save()
+
+    def passed(self) -> List[dict]:
+        with self.lock:
+            return [entry for entry in self.completed if entry["status"] == "passed"]
+
+    def done(self, device: Optional[str] = None) -> Set[Tuple[int, str]]:
+        # (index, test) pairs that passed, on the given device or on any device
+        return {
+            (entry["index"], entry["test"]) for entry in self.passed()
+            if device is None or entry["device"] == device
+        }
+
+    def _save(self) -> None:
+        temporary = f"{self.path}.tmp"
+        try:
+            with open(temporary, 'w', encoding='utf-8') as f:
+                json.dump({
+                    "run_id": self.run_id,
+                    "shard": self.shard,
+                    "test_cases": self.test_cases,
+                    "completed": self.completed,
+                }, f, default=str)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporary, self.path)
+        except OSError as e:
+            raise CheckpointError(f"Failed to write checkpoint {self.path}: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,120 @@
+import re
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Iterator, List, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .device_controller import DeviceController
+    from .async_device_controller import AsyncDeviceController
+
+Predicate = Callable[['DeviceController'], bool]
+AsyncPredicate = Callable[['AsyncDeviceController'], Awaitable[bool]]
+
+@dataclass
+class PollStrategy:
+    initial: float = 0.05
+    factor: float = 1.5
+    maximum: float = 1.0
+
+    def intervals(self) -> Iterator[float]:
+        interval = self.initial
+        while True:
+            yield interval
+            interval = min(interval * self.factor, self.maximum)
+
+    def delays(self, timeout: float) -> Iterator[float]:
+        # How long to wait before each check: nothing before the first, then the intervals cut off at the deadline
+        deadline = time.monotonic() + timeout
+        yield 0.0
+        for interval in self.intervals():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            yield min(interval, remaining)
+
+WIFI_STATE_PATTERN = re.compile(r"WiFi: (\d+)")
+
+def wifi_enabled(network_state: str) -> bool:
+    # settings wifi_on is 0 when off and 1 or 2 (on in airplane mode) when on. Mobile data is not checked,
+    # because a wifi-only device or one without a SIM never reports it as on.
+    match = WIFI_STATE_PATTERN.search(network_state)
+    return match is not None and match.group(1) != "0"
+
+def device_responsive() -> Predicate:
+    def check(device: 'DeviceController') -> bool:
+        return "Device ready" in device.execute_command("shell echo 'Device ready'")
+    return check
+
+def _activity_targets(package_name: str, activity_name: Optional[str]) -> List[str]:
+    targets = [f"{package_name}/"]
+    if activity_name:
+        targets = [f"{package_name}/{activity_name}"]
+        if activity_name.startswith(f"{package_name}."):
+            targets.append(f"{package_name}/{activity_name[len(package_name):]}")
+    return targets
+
+def activity_resumed(package_name: str, activity_name: Optional[str] = None) -> Predicate:
+    targets = _activity_targets(package_name, activity_name)
+
+    def check(device: 'DeviceController') -> bool:
+        from .device_controller import DeviceControllerError
+        try:
+            current = device.get_current_activity(max_age=0)
+        except DeviceControllerError:
+            return False
+        return any(target in current for target in targets)
+    return check
+
+def network_state(enabled: bool) -> Predicate:
+    def check(device: 'DeviceController') -> bool:
+        if wifi_enabled(device.get_network_state(max_age=0)) != enabled:
+            return False
+        return device.is_network_connected(max_age=0) if enabled else True
+    return check
+
+def screen_awake() -> Predicate:
+    def check(device: 'DeviceController') -> bool:
+        return device.is_screen_on(max_age=0)
+    return check
+
+def negate(predicate: Predicate) -> Predicate:
+    def check(device: 'DeviceController') -> bool:
+        return not predicate(device)
+    return check
+
+
+# Counterparts for AsyncDeviceController, awaited by its wait_until
+
+def async_device_responsive() -> AsyncPredicate:
+    async def check(device: 'AsyncDeviceController') -> bool:
+        return "Device ready" in await device.shell("echo 'Device ready'")
+    return check
+
+def async_activity_resumed(package_name: str, activity_name: Optional[str] = None) -> AsyncPredicate:
+    targets = _activity_targets(package_name, activity_name)
+
+    async def check(device: 'AsyncDeviceController') -> bool:
+        from .device_controller import DeviceControllerError
+        try:
+            current = await device.get_current_activity(max_age=0)
+        except DeviceControllerError:
+            return False
+        return any(target in current for target in targets)
+    return check
+
+def async_network_state(enabled: bool) -> AsyncPredicate:
+    async def check(device: 'AsyncDeviceController') -> bool:
+        if wifi_enabled(await device.get_network_state(max_age=0)) != enabled:
+            return False
+        return await device.is_network_connected(max_age=0) if enabled else True
+    return check
+
+def async_screen_awake() -> AsyncPredicate:
+    async def check(device: 'AsyncDeviceController') -> bool:
+        return await device.is_screen_on(max_age=0)
+    return check
+
+def async_negate(predicate: AsyncPredicate) -> AsyncPredicate:
+    async def check(device: 'AsyncDeviceController') -> bool:
+        return not await predicate(device)
+    return check
\ No newline at end of file
@@ -1,72 +1,313 @@
 import subprocess
 import logging
+import os
+import re
+import shlex
 import time
-from typing import Optional
+from dataclasses import dataclass
+from typing import BinaryIO, Callable, Dict, List, Optional, Sequence
 
 from droid.types import Configuration
+from .adb_connection import AdbSocketConnection, AdbConnectionError
+from . import conditions, tracing
+from .cache import TTLCache
+from .conditions import PollStrategy, Predicate
+from .tracing import Tracer
+from .ui_hierarchy import UiHierarchy, UiHierarchyError, UiHierarchyParser
 
 class DeviceControllerError(Exception):
     pass
 
+BATCH_MARKER = "___droid_sherlock_batch___"
+# Legacy `adb shell` runs under a pty, which turns line endings into \r\n
+BATCH_PATTERN = re.compile(rf"(.*?){BATCH_MARKER}:(\d+):(\d+)\r?\n", re.DOTALL)
+
+@dataclass
+class CommandResult:
+    exit_code: int
+    output: str
+
+    @property
+    def ok(self) -> bool:
+        return self.exit_code == 0
+
+def build_batch_script(commands: Sequence[str]) -> str:
+    # Each command's stdout is followed by a marker carrying its index and exit code, so failures do not abort the batch
+    return "; ".join(f"{command}; echo {BATCH_MARKER}:{index}:$?" for index, command in enumerate(commands))
+
+def parse_batch_output(commands: Sequence[str], script: str, output: str) -> List[CommandResult]:
+    results = []
+    for match in BATCH_PATTERN.finditer(output):
+        captured, index, exit_code = match.groups()
+        if int(index) != len(results):
+            break
+        results.append(CommandResult(int(exit_code), captured))
+    if len(results) != len(commands):
+        raise DeviceControllerError(f"Batch returned {len(results)} of {len(commands)} results: {script}")
+    return results
+
+DEVICE_PROPERTY_COMMANDS = (
+    "getprop ro.product.manufacturer",
+    "getprop ro.product.model",
+    "getprop ro.build.version.release",
+    "wm size",
+)
+
+def parse_device_properties(results: Sequence[CommandResult]) -> Dict[str, str]:
+    manufacturer, model, android_version, screen_size = (result.output.strip() for result in results)
+    # `wm size` reports the physical size and, when overridden, an override size on a later line
+    sizes = re.findall(r"(\d+x\d+)", screen_size)
+    return {
+        "manufacturer": manufacturer,
+        "model": model,
+        "android_version": android_version,
+        "screen_size": sizes[-1] if sizes else "",
+    }
+
+def format_device_info(properties: Dict[str, str]) -> str:
+    return f"{properties['manufacturer']} {properties['model']} (Android {properties['android_version']})"
+
+# Device shell commands and output parsing shared by DeviceController and AsyncDeviceController, which
+# differ only in how they run the commands
+CURRENT_ACTIVITY_COMMAND = "dumpsys activity activities | grep mResumedActivity"
+SCREEN_STATE_COMMAND = "dumpsys power | grep 'mWakefulness='"
+NETWORK_CONNECTED_COMMAND = "dumpsys connectivity | grep 'Active default network'"
+NETWORK_STATE_COMMANDS = ("settings get global wifi_on", "settings get global mobile_data")
+ENABLE_NETWORK_COMMANDS = ("svc wifi enable", "svc data enable")
+DISABLE_NETWORK_COMMANDS = ("svc wifi disable", "svc data disable")
+UNLOCK_COMMANDS = (
+    "dumpsys power | grep -q 'mWakefulness=Awake' || input keyevent 26",  # Power button
+    "input keyevent 82",  # Menu button to unlock
+)
+# ":0" is what Settings writes when the proxy is removed; deleting the key only applies after a reboot
+NO_HTTP_PROXY = ":0"
+
+def launch_command(package_name: str, activity_name: str, wait: bool) -> str:
+    wait_flag = "-W " if wait else ""
+    return f"am start {wait_flag}-n {package_name}/{activity_name}"
+
+def parse_launch_timings(output: str) -> Dict[str, int]:
+    return {key: int(value) for key, value in re.findall(r"^(\w+Time): (\d+)", output, re.MULTILINE)}
+
+def restore_commands(package_name: str) -> List[str]:
+    return [*ENABLE_NETWORK_COMMANDS, f"am force-stop {package_name}"]
+
+def http_proxy_command(proxy: str) -> str:
+    return f"settings put global http_proxy {proxy}"
+
+def parse_screen_on(output: str) -> bool:
+    return "Awake" in output
+
+def parse_network_connected(output: str) -> bool:
+    return "none" not in output
+
+def parse_network_state(results: Sequence[CommandResult]) -> str:
+    wifi, data = (result.output.strip() for result in results)
+    return f"WiFi: {wifi}, Mobile Data: {data}"
+
+def check_console_output(command: str, output: str) -> str:
+    if output.startswith("KO"):
+        raise DeviceControllerError(f"Emulator console rejected '{command}': {output.strip()}")
+    return output
+
 class DeviceController:
     def __init__(self, config: Configuration) -> None:
         self.device_id = config.device_id
         self.config = config
         self.logger = logging.getLogger(__name__)
+        self.connection = self._create_connection()
+        self.listeners: Dict[str, List[Callable[..., None]]] = {}
+        # Immutable properties are read once per session; volatile state expires after state_ttl
+        # and is invalidated by the calls that change it, both before and after the change so a read
+        # that races the command cannot cache the old value
+        self.properties: Optional[Dict[str, str]] = None
+        self.state = TTLCache(config.state_ttl)
+        self.last_seen: Optional[float] = None
+        self.tracer: Optional[Tracer] = None
+
+    def subscribe(self, event: str, callback: Callable[..., None]) -> None:
+        self.listeners.setdefault(event, []).append(callback)
+
+    def unsubscribe(self, event: str, callback: Callable[..., None]) -> None:
+        if callback in self.listeners.get(event, []):
+            self.listeners[event].remove(callback)
+
+    def _notify(self, event: str, **kwargs) -> None:
+        for callback in list(self.listeners.get(event, [])):
+            try:
+                callback(**kwargs)
+            except Exception as e:
+                self.logger.error(f"Listener for {event} failed: {str(e)}")
+
+    def _create_connection(self) -> Optional[AdbSocketConnection]:
+        if self.config.connection_mode == "socket":
+            return AdbSocketConnection(self.device_id, self.config.adb_host, self.config.adb_port)
+        return None
 
     def execute_command(self, command: str) -> str:
+        if self.connection is not None and command.startswith("shell "):
+            # The device shell parses the command, so quoting and pipes reach it unchanged
+            return self._execute_shell_command(command[len("shell "):])
         full_command = f"adb -s {self.device_id} {command}"
+        with tracing.span(self.tracer, command, "adb", device=self.device_id):
+            try:
+                self.logger.debug(f"Executing command: {full_command}")
+                result = subprocess.run(full_command, shell=True, check=True, capture_output=True, text=True)
+                self.last_seen = time.monotonic()
+                self.logger.debug(f"Command output: {result.stdout}")
+                return result.stdout
+            except subprocess.CalledProcessError as e:
+                error_msg = f"Error executing command: {full_command}\nError message: {e.stderr}"
+                self.logger.error(error_msg)
+                raise DeviceControllerError(error_msg)
+
+    def _execute_shell_command(self, shell_command: str) -> str:
+        with tracing.span(self.tracer, f"shell {shell_command}", "adb", device=self.device_id, mode="socket"):
+            try:
+                self.logger.debug(f"Executing shell command on {self.device_id}: {shell_command}")
+                exit_code, stdout, stderr = self.connection.shell(shell_command)
+                self.last_seen = time.monotonic()
+            except AdbConnectionError as e:
+                error_msg = f"Error executing shell command: {shell_command}\nError message: {str(e)}"
+                self.logger.error(error_msg)
+                raise DeviceControllerError(error_msg)
+            if exit_code != 0:
+                error_msg = f"Error executing shell command: {shell_command}\nExit code: {exit_code}\nError message: {stderr}"
+                self.logger.error(error_msg)
+                raise DeviceControllerError(error_msg)
+        self.logger.debug(f"Command output: {stdout}")
+        return stdout
+
+    def execute_batch(self, commands: Sequence[str]) -> List[CommandResult]:
+        # Runs several device shell commands in one `adb shell` round trip
+        script = build_batch_script(commands)
+        if self.connection is not None:
+            return parse_batch_output(commands, script, self._execute_shell_command(script))
+        return parse_batch_output(commands, script, self.execute_command(f"shell {shlex.quote(script)}"))
+
+    def _check_batch(self, commands: Sequence[str]) -> List[CommandResult]:
+        results = self.execute_batch(commands)
+        for command, result in zip(commands, results):
+            if not result.ok:
+                raise DeviceControllerError(f"Command failed with exit code {result.exit_code}: {command}")
+        return results
+
+    def exec_out(self, command: str, stream: Optional[BinaryIO] = None) -> bytes:
+        with tracing.span(self.tracer, f"exec-out {command}", "adb", device=self.device_id):
+            return self._exec_out(command, stream)
+
+    def _exec_out(self, command: str, stream: Optional[BinaryIO] = None) -> bytes:
+        if self.connection is not None:
+            try:
+                self.logger.debug(f"Executing exec-out command on {self.device_id}: {command}")
+                output = self.connection.exec_out(command, stream)
+                self.last_seen = time.monotonic()
+                return output
+            except (AdbConnectionError, OSError) as e:
+                error_msg = f"Error executing exec-out command: {command}\nError message: {str(e)}"
+                self.logger.error(error_msg)
+                raise DeviceControllerError(error_msg)
+        full_command = f"adb -s {self.device_id} exec-out {command}"
         try:
             self.logger.debug(f"Executing command: {full_command}")
-            result = subprocess.run(full_command, shell=True, check=True, capture_output=True, text=True)
-            self.logger.debug(f"Command output: {result.stdout}")
-            return result.stdout
+            result = subprocess.run(full_command, shell=True, check=True,
+                                    stdout=stream if stream is not None else subprocess.PIPE, stderr=subprocess.PIPE)
+            self.last_seen = time.monotonic()
+            return result.stdout or b""
         except subprocess.CalledProcessError as e:
-            error_msg = f"Error executing command: {full_command}\nError message: {e.stderr}"
+            error_msg = f"Error executing command: {full_command}\nError message: {e.stderr.decode(errors='replace')}"
             self.logger.error(error_msg)
             raise DeviceControllerError(error_msg)
 
-    def launch_app(self, package_name: str, activity_name: str) -> None:
+    def open_stream(self, command: str) -> subprocess.Popen:
+        args = ["adb", "-s", self.device_id] + shlex.split(command)
         try:
-            self.execute_command(f"shell am start -n {package_name}/{activity_name}")
+            self.logger.debug(f"Opening stream: {' '.join(args)}")
+            return subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                    text=True, errors="replace", bufsize=1)
+        except OSError as e:
+            raise DeviceControllerError(f"Failed to open stream '{command}': {str(e)}")
+
+    def launch_app(self, package_name: str, activity_name: str, wait: bool = False) -> Dict[str, int]:
+        try:
+            self.state.invalidate("current_activity")
+            self._notify("app_launching", package_name=package_name, activity_name=activity_name)
+            output = self.execute_command(f"shell {launch_command(package_name, activity_name, wait)}")
+            self.state.invalidate("current_activity")
             self.logger.info(f"Launched app: {package_name}/{activity_name}")
+            self._notify("app_launched", package_name=package_name, activity_name=activity_name)
+            if not wait:
+                return {}
+            timings = parse_launch_timings(output)
+            self.logger.info(f"Launch timings: {timings}")
+            return timings
         except DeviceControllerError as e:
             raise DeviceControllerError(f"Failed to launch app: {str(e)}")
 
     def force_stop_app(self, package_name: str) -> None:
         try:
             self.execute_command(f"shell am force-stop {package_name}")
+            self.state.invalidate("current_activity")
             self.logger.info(f"Force stopped app: {package_name}")
+            self._notify("app_stopped", package_name=package_name)
         except DeviceControllerError as e:
             raise DeviceControllerError(f"Failed to force stop app: {str(e)}")
 
-    def get_current_activity(self) -> str:
+    def get_current_activity(self, max_age: Optional[float] = None) -> str:
         try:
-            return self.execute_command("shell dumpsys activity activities | grep mResumedActivity")
+            return self.state.get_or_load(
+                "current_activity",
+                lambda: self.execute_command(f"shell {CURRENT_ACTIVITY_COMMAND}"),
+                max_age
+            )
         except DeviceControllerError as e:
             raise DeviceControllerError(f"Failed to get current activity: {str(e)}")
 
-    def capture_screenshot(self, filename: str) -> None:
+    def capture_screenshot(self, filename: str) -> str:
+        path = os.path.join(self.config.run_dir, filename)
         try:
-            self.execute_command(f"shell screencap -p /sdcard/{filename}")
-            self.execute_command(f"pull /sdcard/{filename} {self.config.run_dir}")
-            self.execute_command(f"shell rm /sdcard/{filename}")
+            with open(path, 'wb') as f:
+                self.exec_out("screencap -p", f)
             self.logger.info(f"Captured screenshot: {filename}")
+            return path
+        except (DeviceControllerError, OSError) as e:
+            if os.path.exists(path):
+                os.remove(path)
+            raise DeviceControllerError(f"Failed to capture screenshot: {str(e)}")
+
+    def capture_screenshot_bytes(self, raw: bool = False) -> bytes:
+        try:
+            return self.exec_out("screencap" if raw else "screencap -p")
         except DeviceControllerError as e:
             raise DeviceControllerError(f"Failed to capture screenshot: {str(e)}")
 
-    def is_screen_on(self) -> bool:
+    def dump_ui_hierarchy(self) -> UiHierarchy:
+        # uiautomator writes the dump to /dev/tty; over the socket connection it is parsed as it streams in
+        parser = UiHierarchyParser()
+        try:
+            if self.connection is not None:
+                self.exec_out("uiautomator dump /dev/tty", parser)
+            else:
+                parser.feed(self.exec_out("uiautomator dump /dev/tty"))
+            return parser.close()
+        except (DeviceControllerError, UiHierarchyError) as e:
+            raise DeviceControllerError(f"Failed to dump UI hierarchy: {str(e)}")
+
+    def is_screen_on(self, max_age: Optional[float] = None) -> bool:
         try:
-            result = self.execute_command("shell dumpsys power | grep 'mWakefulness='")
-            return "Awake" in result
+            return self.state.get_or_load(
+                "screen_on",
+                lambda: parse_screen_on(self.execute_command(f"shell {SCREEN_STATE_COMMAND}")),
+                max_age
+            )
         except DeviceControllerError as e:
             raise DeviceControllerError(f"Failed to check screen state: {str(e)}")
 
     def unlock_screen(self) -> None:
         try:
-            if not self.is_screen_on():
-                self.execute_command("shell input keyevent 26")  # Power button
-            self.execute_command("shell input keyevent 82")  # Menu button to unlock
+            self.state.invalidate("screen_on", "current_activity")
+            self._check_batch(UNLOCK_COMMANDS)
+            self.state.invalidate("screen_on", "current_activity")
             self.logger.info("Unlocked device screen")
         except DeviceControllerError as e:
             raise DeviceControllerError(f"Failed to unlock screen: {str(e)}")
@@ -74,6 +315,7 @@ class DeviceController:
     def clear_app_data(self, package_name: str) -> None:
         try:
             self.execute_command(f"shell pm clear {package_name}")
+            self.state.invalidate("current_activity")
             self.logger.info(f"Cleared app data: {package_name}")
         except DeviceControllerError as e:
             raise DeviceControllerError(f"Failed to clear app data: {str(e)}")
@@ -94,44 +336,142 @@ class DeviceController:
 
     def disable_network(self) -> None:
         try:
-            self.execute_command("shell svc wifi disable")
-            self.execute_command("shell svc data disable")
+            self.state.invalidate("network_state", "network_connected")
+            self._check_batch(DISABLE_NETWORK_COMMANDS)
+            self.state.invalidate("network_state", "network_connected")
             self.logger.info("Disabled network connections")
         except DeviceControllerError as e:
             raise DeviceControllerError(f"Failed to disable network: {str(e)}")
 
     def enable_network(self) -> None:
         try:
-            self.execute_command("shell svc wifi enable")
-            self.execute_command("shell svc data enable")
+            self.state.invalidate("network_state", "network_connected")
+            self._check_batch(ENABLE_NETWORK_COMMANDS)
+            self.state.invalidate("network_state", "network_connected")
             self.logger.info("Enabled network connections")
         except DeviceControllerError as e:
             raise DeviceControllerError(f"Failed to enable network: {str(e)}")
 
-    def get_network_state(self) -> str:
+    def emulator_console(self, command: str) -> str:
+        try:
+            output = self.execute_command(f"emu {command}")
+        except DeviceControllerError as e:
+            raise DeviceControllerError(f"Emulator console command '{command}' failed: {str(e)}")
+        return check_console_output(command, output)
+
+    def set_http_proxy(self, proxy: str) -> None:
+        try:
+            self.state.invalidate("network_connected")
+            self.execute_command(f"shell {http_proxy_command(proxy)}")
+            self.state.invalidate("network_connected")
+            self.logger.info(f"Set global HTTP proxy to {proxy}")
+        except DeviceControllerError as e:
+            raise DeviceControllerError(f"Failed to set HTTP proxy: {str(e)}")
+
+    def clear_http_proxy(self) -> None:
+        try:
+            self.state.invalidate("network_connected")
+            self.execute_command(f"shell {http_proxy_command(NO_HTTP_PROXY)}")
+            self.state.invalidate("network_connected")
+            self.logger.info("Cleared global HTTP proxy")
+        except DeviceControllerError as e:
+            raise DeviceControllerError(f"Failed to clear HTTP proxy: {str(e)}")
+
+    def reverse_port(self, device_port: int, host_port: int) -> None:
+        try:
+            self.execute_command(f"reverse tcp:{device_port} tcp:{host_port}")
+            self.logger.info(f"Forwarding device port {device_port} to host port {host_port}")
+        except DeviceControllerError as e:
+            raise DeviceControllerError(f"Failed to reverse port {device_port}: {str(e)}")
+
+    def remove_reverse_port(self, device_port: int) -> None:
+        try:
+            self.execute_command(f"reverse --remove tcp:{device_port}")
+        except DeviceControllerError as e:
+            raise DeviceControllerError(f"Failed to remove reverse port {device_port}: {str(e)}")
+
+    def restore_defaults(self, package_name: str) -> None:
         try:
-            wifi_state = self.execute_command("shell settings get global wifi_on").strip()
-            data_state = self.execute_command("shell settings get global mobile_data").strip()
-            return f"WiFi: {wifi_state}, Mobile Data: {data_state}"
+            self.state.invalidate()
+            self._check_batch(restore_commands(package_name))
+            self.state.invalidate()
+            self.logger.info(f"Enabled network connections and force stopped app: {package_name}")
+            self._notify("app_stopped", package_name=package_name)
+        except DeviceControllerError as e:
+            raise DeviceControllerError(f"Failed to restore device defaults: {str(e)}")
+
+    def get_network_state(self, max_age: Optional[float] = None) -> str:
+        try:
+            return self.state.get_or_load(
+                "network_state",
+                lambda: parse_network_state(self._check_batch(NETWORK_STATE_COMMANDS)),
+                max_age
+            )
         except DeviceControllerError as e:
             raise DeviceControllerError(f"Failed to get network state: {str(e)}")
 
+    def is_network_connected(self, max_age: Optional[float] = None) -> bool:
+        try:
+            return self.state.get_or_load(
+                "network_connected",
+                lambda: parse_network_connected(self.execute_command(f"shell {NETWORK_CONNECTED_COMMAND}")),
+                max_age
+            )
+        except DeviceControllerError:
+            return False
+
+    def get_device_properties(self) -> Dict[str, str]:
+        if self.properties is not None:
+            return self.properties
+        try:
+            self.properties = parse_device_properties(self._check_batch(DEVICE_PROPERTY_COMMANDS))
+            return self.properties
+        except DeviceControllerError as e:
+            raise DeviceControllerError(f"Failed to get device properties: {str(e)}")
+
+    def get_screen_size(self) -> str:
+        return self.get_device_properties()["screen_size"]
+
     def get_device_info(self) -> str:
         try:
-            manufacturer = self.execute_command("shell getprop ro.product.manufacturer").strip()
-            model = self.execute_command("shell getprop ro.product.model").strip()
-            android_version = self.execute_command("shell getprop ro.build.version.release").strip()
-            return f"{manufacturer} {model} (Android {android_version})"
+            return format_device_info(self.get_device_properties())
         except DeviceControllerError as e:
             raise DeviceControllerError(f"Failed to get device info: {str(e)}")
 
+    def wait_until(self, predicate: Predicate, timeout: float = 30, poll: Optional[PollStrategy] = None,
+                   description: str = "condition") -> float:
+        with tracing.span(self.tracer, description, "wait", device=self.device_id):
+            start_time = time.monotonic()
+            for delay in (poll or PollStrategy()).delays(timeout):
+                time.sleep(delay)
+                try:
+                    if predicate(self):
+                        elapsed = time.monotonic() - start_time
+                        self.logger.info(f"Reached {description} after {elapsed:.2f} seconds")
+                        return elapsed
+                except DeviceControllerError as e:
+                    self.logger.debug(f"Still waiting for {description}: {str(e)}")
+            raise DeviceControllerError(f"Timed out after {timeout} seconds waiting for {description}")
+
+    def wait_for_activity(self, package_name: str, activity_name: Optional[str] = None, timeout: float = 30) -> float:
+        return self.wait_until(conditions.activity_resumed(package_name, activity_name), timeout,
+                               description=f"resumed activity {package_name}/{activity_name or ''}")
+
+    def wait_for_app_stopped(self, package_name: str, timeout: float = 30) -> float:
+        return self.wait_until(conditions.negate(conditions.activity_resumed(package_name)), timeout,
+                               description=f"{package_name} stopped")
+
+    def wait_for_network(self, enabled: bool, timeout: float = 30) -> float:
+        state = "enabled" if enabled else "disabled"
+        return self.wait_until(conditions.network_state(enabled), timeout, description=f"network {state}")
+
+    def wait_for_screen_on(self, timeout: float = 30) -> float:
+        return self.wait_until(conditions.screen_awake(), timeout, description="screen awake")
+
     def wait_for_device(self, timeout: int = 60) -> None:
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            try:
-                self.execute_command("shell echo 'Device ready'")
-                self.logger.info("Device is ready")
-                return
-            except DeviceControllerError:
-                time.sleep(1)
-        raise DeviceControllerError(f"Device not ready after {timeout} seconds")
\ No newline at end of file
+        if self.last_seen is not None and time.monotonic() - self.last_seen < self.config.liveness_window:
+            return
+        try:
+            self.wait_until(conditions.device_responsive(), timeout, description="device ready")
+        except DeviceControllerError:
+            raise DeviceControllerError(f"Device not ready after {timeout} seconds")
\ No newline at end of file
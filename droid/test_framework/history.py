@@ -0,0 +1,203 @@
+import datetime
+import json
+import logging
+import os
+import sqlite3
+from typing import Any, Iterator, List, Optional, Sequence, Tuple
+
+from .report import REPORT_FILE, load_run
+
+HISTORY_FILE = "history.db"
+
+class HistoryError(Exception):
+    pass
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    started_at TEXT,
+    duration REAL,
+    completed INTEGER NOT NULL,
+    app_package TEXT,
+    app_activity TEXT,
+    metadata TEXT
+);
+CREATE TABLE IF NOT EXISTS run_devices (
+    run_id TEXT NOT NULL,
+    device TEXT NOT NULL,
+    device_info TEXT
+);
+CREATE TABLE IF NOT EXISTS tests (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL,
+    test_index INTEGER,
+    name TEXT NOT NULL,
+    test TEXT NOT NULL,
+    device TEXT,
+    status TEXT,
+    duration REAL,
+    result TEXT
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    test_id INTEGER NOT NULL,
+    run_id TEXT NOT NULL,
+    test TEXT NOT NULL,
+    device TEXT,
+    name TEXT NOT NULL,
+    value REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS plugin_timings (
+    run_id TEXT NOT NULL,
+    test TEXT,
+    device TEXT,
+    plugin TEXT NOT NULL,
+    status TEXT,
+    duration REAL
+);
+CREATE TABLE IF NOT EXISTS artifacts (
+    test_id INTEGER NOT NULL,
+    run_id TEXT NOT NULL,
+    test TEXT NOT NULL,
+    device TEXT,
+    name TEXT NOT NULL,
+    path TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS run_devices_run ON run_devices (run_id);
+CREATE INDEX IF NOT EXISTS run_devices_device ON run_devices (device, run_id);
+CREATE INDEX IF NOT EXISTS tests_test_device_run ON tests (test, device, run_id);
+CREATE INDEX IF NOT EXISTS tests_all_devices ON tests (test, run_id);
+CREATE INDEX IF NOT EXISTS tests_run ON tests (run_id);
+CREATE INDEX IF NOT EXISTS metrics_lookup ON metrics (test, name, device, run_id);
+CREATE INDEX IF NOT EXISTS metrics_all_devices ON metrics (test, name, run_id);
+CREATE INDEX IF NOT EXISTS metrics_run ON metrics (run_id);
+CREATE INDEX IF NOT EXISTS plugin_timings_lookup ON plugin_timings (plugin, device, run_id);
+CREATE INDEX IF NOT EXISTS plugin_timings_all_devices ON plugin_timings (plugin, run_id);
+CREATE INDEX IF NOT EXISTS plugin_timings_run ON plugin_timings (run_id);
+CREATE INDEX IF NOT EXISTS artifacts_run ON artifacts (run_id);
+"""
+
+def flatten_result(result: dict, prefix: str = "") -> Iterator[Tuple[str, Any]]:
+    for key, value in result.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            yield from flatten_result(value, f"{name}/")
+        else:
+            yield name, value
+
+def _started_at(run_id: str) -> Optional[str]:
+    try:
+        return datetime.datetime.strptime(run_id[:15], "%Y%m%d_%H%M%S").isoformat()
+    except ValueError:
+        return None
+
+class HistoryStore:
+    # Run ids are timestamps, so ordering by run_id is chronological
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+        try:
+            self.connection = sqlite3.connect(path)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.executescript(SCHEMA)
+        except sqlite3.Error as e:
+            raise HistoryError(f"Failed to open history store {path}: {str(e)}")
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def record_run(self, run_dir: str) -> str:
+        run = load_run(run_dir, types=("run", "test", "plugin", "run_end"))
+        if run["run"] is None:
+            raise HistoryError(f"No run record in {os.path.join(run_dir, REPORT_FILE)}")
+        header = run["run"]
+        run_id = str(header["run_id"])
+        try:
+            with self.connection:
+                # Re-recording a run (e.g. after a resume) replaces its earlier rows
+                for table in ("run_devices", "tests", "metrics", "plugin_timings", "artifacts"):
+                    self.connection.execute(f"DELETE FROM {table} WHERE run_id = ?", (run_id,))
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (run_id, _started_at(run_id), run.get("duration"), int(run["completed"]),
+                     header.get("app_package"), header.get("app_activity"), json.dumps(header.get("metadata") or {}))
+                )
+                self.connection.executemany(
+                    "INSERT INTO run_devices VALUES (?, ?, ?)",
+                    [(run_id, device, info) for device, info in (header.get("devices") or {}).items()]
+                )
+                for record in run["tests"]:
+                    self._record_test(run_id, record)
+                self.connection.executemany(
+                    "INSERT INTO plugin_timings VALUES (?, ?, ?, ?, ?, ?)",
+                    [(run_id, record.get("test"), record.get("device"), record["plugin"], record.get("status"),
+                      record.get("duration")) for record in run["plugins"]]
+                )
+        except sqlite3.Error as e:
+            raise HistoryError(f"Failed to record run {run_id}: {str(e)}")
+        self.logger.info(f"Recorded run {run_id} in {self.path}")
+        return run_id
+
+    def _record_test(self, run_id: str, record: dict) -> None:
+        cursor = self.connection.execute(
+            "INSERT INTO tests (run_id, test_index, name, test, device, status, duration, result) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (run_id, record.get("index"), record["name"], record["test"], record.get("device"), record.get("status"),
+             record.get("duration"), json.dumps(record.get("result"), default=str))
+        )
+        test_id = cursor.lastrowid
+        metrics = []
+        artifacts = []
+        for name, value in flatten_result(record.get("result") or {}):
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                metrics.append((test_id, run_id, record["test"], record.get("device"), name, float(value)))
+            elif isinstance(value, str) and os.path.isfile(value):
+                artifacts.append((test_id, run_id, record["test"], record.get("device"), name, value))
+        self.connection.executemany("INSERT INTO metrics VALUES (?, ?, ?, ?, ?, ?)", metrics)
+        self.connection.executemany("INSERT INTO artifacts VALUES (?, ?, ?, ?, ?, ?)", artifacts)
+
+    def _query(self, sql: str, parameters: Sequence[Any]) -> List[sqlite3.Row]:
+        self.connection.row_factory = sqlite3.Row
+        try:
+            return self.connection.execute(sql, parameters).fetchall()
+        except sqlite3.Error as e:
+            raise HistoryError(f"History query failed: {str(e)}")
+
+    def runs(self, limit: int = 50, device: Optional[str] = None) -> List[sqlite3.Row]:
+        device_filter = "WHERE run_id IN (SELECT run_id FROM run_devices WHERE device = ?)" if device else ""
+        parameters = ([device] if device else []) + [limit]
+        return self._query(f"SELECT * FROM runs {device_filter} ORDER BY run_id DESC LIMIT ?", parameters)
+
+    def metric_trend(self, test: str, metric: str, device: Optional[str] = None,
+                     limit: int = 50) -> List[sqlite3.Row]:
+        # e.g. metric_trend("StartupTest", "cold/total_time/p90", "emulator-5554")
+        device_filter = "AND device = ?" if device else ""
+        parameters = [test, metric] + ([device] if device else []) + [limit]
+        return self._query(
+            f"SELECT run_id, device, value FROM metrics WHERE test = ? AND name = ? {device_filter} "
+            f"ORDER BY run_id DESC LIMIT ?", parameters
+        )
+
+    def metric_names(self, test: str) -> List[str]:
+        return [row["name"] for row in self._query(
+            "SELECT DISTINCT name FROM metrics WHERE test = ? ORDER BY name", (test,)
+        )]
+
+    def test_history(self, test: str, device: Optional[str] = None, limit: int = 50) -> List[sqlite3.Row]:
+        device_filter = "AND device = ?" if device else ""
+        parameters = [test] + ([device] if device else []) + [limit]
+        return self._query(
+            f"SELECT run_id, device, status, duration FROM tests WHERE test = ? {device_filter} "
+            f"ORDER BY run_id DESC LIMIT ?", parameters
+        )
+
+    def plugin_timings(self, plugin: str, device: Optional[str] = None, limit: int = 50) -> List[sqlite3.Row]:
+        device_filter = "AND device = ?" if device else ""
+        parameters = [plugin] + ([device] if device else []) + [limit]
+        return self._query(
+            f"SELECT run_id, test, device, status, duration FROM plugin_timings WHERE plugin = ? {device_filter} "
+            f"ORDER BY run_id DESC LIMIT ?", parameters
+        )
+
+    def artifacts(self, run_id: str) -> List[sqlite3.Row]:
+        return self._query("SELECT test, device, name, path FROM artifacts WHERE run_id = ? ORDER BY test, name",
+                           (run_id,))
\ No newline at end of file
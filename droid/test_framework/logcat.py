@@ -0,0 +1,186 @@
+import gzip
+import logging
+import re
+import sys
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+from .device_controller import DeviceController, DeviceControllerError
+
+class LogcatError(Exception):
+    pass
+
+# logcat -v threadtime: "MM-DD HH:MM:SS.mmm  PID  TID L TAG     : message"
+THREADTIME_PATTERN = re.compile(r"^\d\d-\d\d \d\d:\d\d:\d\d\.\d+\s+(\d+)\s+(\d+)\s+([VDIWEFA])\s+(.*?)\s*: ?(.*)$")
+START_PROC_PATTERN = re.compile(r"Start proc (\d+):([\w.]+)")
+
+EVENT_KINDS = ("crash", "anr", "strictmode")
+
+class LogRecord:
+    __slots__ = ("seq", "timestamp", "pid", "level", "tag", "message", "kind")
+
+    def __init__(self, seq: int, timestamp: float, pid: int, level: str, tag: str, message: str,
+                 kind: Optional[str]) -> None:
+        self.seq = seq
+        self.timestamp = timestamp
+        self.pid = pid
+        self.level = level
+        self.tag = tag
+        self.message = message
+        self.kind = kind
+
+    def to_dict(self) -> dict:
+        return {"pid": self.pid, "level": self.level, "tag": self.tag, "message": self.message, "kind": self.kind}
+
+class LogcatMonitor:
+    def __init__(self, device: DeviceController, package_name: str, spill_path: str,
+                 max_records: int = 20000, max_events: int = 1000) -> None:
+        self.device = device
+        self.package_name = package_name
+        self.spill_path = spill_path
+        self.logger = logging.getLogger(__name__)
+        self.lock = threading.Lock()
+        self.app_pids: Set[int] = set()
+        self.next_seq = 0
+        self.records: Deque[LogRecord] = deque(maxlen=max_records)
+        self.by_level: Dict[str, Deque[LogRecord]] = {}
+        self.by_tag: Dict[str, Deque[LogRecord]] = {}
+        self.events: Deque[LogRecord] = deque(maxlen=max_events)
+        self.index_size = max_events
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.process = None
+
+    def start(self) -> None:
+        if self.thread is not None:
+            return
+        self.device.subscribe("app_launched", self._on_app_launched)
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._read_loop, name=f"logcat-{self.device.device_id}", daemon=True)
+        self.thread.start()
+        self.logger.info(f"Started logcat capture into {self.spill_path}")
+
+    def stop(self) -> None:
+        if self.thread is None:
+            return
+        self.device.unsubscribe("app_launched", self._on_app_launched)
+        self.stop_event.set()
+        if self.process is not None:
+            self.process.terminate()
+        self.thread.join()
+        self.thread = None
+        self.logger.info(f"Stopped logcat capture, {self.next_seq} app records seen")
+
+    def checkpoint(self) -> int:
+        with self.lock:
+            return self.next_seq
+
+    def query(self, since: int = 0, level: Optional[str] = None, tag: Optional[str] = None,
+              kind: Optional[str] = None) -> List[LogRecord]:
+        with self.lock:
+            if kind is not None:
+                source: Deque[LogRecord] = self.events
+            elif tag is not None:
+                source = self.by_tag.get(tag, deque())
+            elif level is not None:
+                source = self.by_level.get(level, deque())
+            else:
+                source = self.records
+            records = self._tail_since(source, since)
+        return [
+            record for record in records
+            if (level is None or record.level == level)
+            and (tag is None or record.tag == tag)
+            and (kind is None or record.kind == kind)
+        ]
+
+    def events_since(self, since: int) -> dict:
+        return self.take_events(since)[0]
+
+    def take_events(self, since: int) -> Tuple[dict, int]:
+        # The summary of events since the checkpoint plus the checkpoint to pass next time, read under one lock
+        # so an event that arrives in between is counted exactly once
+        with self.lock:
+            events = self._tail_since(self.events, since)
+            checkpoint = self.next_seq
+        summary: dict = {kind: 0 for kind in EVENT_KINDS}
+        for record in events:
+            summary[record.kind] += 1
+        summary["events"] = [record.to_dict() for record in events[:20]]
+        return summary, checkpoint
+
+    def _tail_since(self, records: Deque[LogRecord], since: int) -> List[LogRecord]:
+        # Records are appended in sequence order, so only the tail after the checkpoint is visited
+        tail = []
+        for record in reversed(records):
+            if record.seq < since:
+                break
+            tail.append(record)
+        tail.reverse()
+        return tail
+
+    def _on_app_launched(self, package_name: str, **_) -> None:
+        if package_name != self.package_name:
+            return
+        try:
+            pids = self.device.execute_command(f"shell pidof {package_name}").split()
+        except DeviceControllerError:
+            return
+        with self.lock:
+            self.app_pids.update(int(pid) for pid in pids if pid.isdigit())
+
+    def _read_loop(self) -> None:
+        with gzip.open(self.spill_path, 'at', compresslevel=6) as spill:
+            while not self.stop_event.is_set():
+                try:
+                    self.process = self.device.open_stream(
+                        "logcat -v threadtime -T 1 -b main -b system -b crash")
+                except DeviceControllerError as e:
+                    self.logger.error(f"Logcat stream failed to start: {str(e)}")
+                    self.stop_event.wait(1)
+                    continue
+                for line in self.process.stdout:
+                    spill.write(line)
+                    self._ingest(line)
+                self.process.wait()
+                if not self.stop_event.is_set():
+                    self.logger.warning("Logcat stream ended unexpectedly, restarting")
+                    self.stop_event.wait(1)
+
+    def _ingest(self, line: str) -> None:
+        match = THREADTIME_PATTERN.match(line)
+        if match is None:
+            return
+        pid, _, level, tag, message = match.groups()
+        pid = int(pid)
+        if tag == "ActivityManager":
+            started = START_PROC_PATTERN.search(message)
+            if started and started.group(2) == self.package_name:
+                with self.lock:
+                    self.app_pids.add(int(started.group(1)))
+        kind = self._classify(level, tag, message)
+        with self.lock:
+            if pid not in self.app_pids and kind is None:
+                return
+            if pid not in self.app_pids and self.package_name not in message:
+                return
+            record = LogRecord(self.next_seq, time.time(), pid, level, sys.intern(tag), message.rstrip("\n"), kind)
+            self.next_seq += 1
+            self.records.append(record)
+            self.by_level.setdefault(level, deque(maxlen=self.index_size)).append(record)
+            self.by_tag.setdefault(record.tag, deque(maxlen=self.index_size)).append(record)
+            if kind is not None:
+                self.events.append(record)
+
+    def _classify(self, level: str, tag: str, message: str) -> Optional[str]:
+        if tag == "AndroidRuntime" and message.startswith("FATAL EXCEPTION"):
+            return "crash"
+        if tag == "libc" and message.startswith("Fatal signal"):
+            return "crash"
+        if tag == "ActivityManager" and message.startswith("ANR in"):
+            return "anr"
+        if tag == "StrictMode" or message.startswith("StrictMode policy violation"):
+            return "strictmode"
+        return None
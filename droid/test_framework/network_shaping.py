@@ -0,0 +1,276 @@
+import logging
+import queue
+import random
+import socket
+import socketserver
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+from .device_controller import DeviceController, DeviceControllerError
+
+class NetworkShapingError(Exception):
+    pass
+
+@dataclass(frozen=True)
+class NetworkProfile:
+    name: str
+    latency_ms: float = 0.0   # added round-trip time
+    down_kbps: float = 0.0    # 0 means unlimited
+    up_kbps: float = 0.0
+    loss: float = 0.0         # fraction of segments that need a retransmission
+
+    @classmethod
+    def from_option(cls, option: Union[str, Dict[str, Any]]) -> 'NetworkProfile':
+        if isinstance(option, str):
+            if option not in PROFILES:
+                raise NetworkShapingError(f"Unknown network profile '{option}' (available: {', '.join(PROFILES)})")
+            return PROFILES[option]
+        try:
+            return cls(**option)
+        except TypeError as e:
+            raise NetworkShapingError(f"Invalid network profile {option}: {str(e)}")
+
+# Roughly the emulator's own presets, plus lossy variants the emulator console cannot express
+PROFILES: Dict[str, NetworkProfile] = {profile.name: profile for profile in (
+    NetworkProfile("unlimited"),
+    NetworkProfile("wifi", latency_ms=20, down_kbps=30000, up_kbps=15000),
+    NetworkProfile("lte", latency_ms=70, down_kbps=12000, up_kbps=5000),
+    NetworkProfile("3g", latency_ms=200, down_kbps=1600, up_kbps=750),
+    NetworkProfile("edge", latency_ms=400, down_kbps=240, up_kbps=200),
+    NetworkProfile("gprs", latency_ms=700, down_kbps=80, up_kbps=40),
+    NetworkProfile("lossy_3g", latency_ms=200, down_kbps=1600, up_kbps=750, loss=0.03),
+    NetworkProfile("satellite", latency_ms=1200, down_kbps=1000, up_kbps=250, loss=0.01),
+)}
+
+CHUNK_SIZE = 16384
+# Minimum delay a lost segment adds before it is retransmitted (Linux TCP's minimum RTO)
+MIN_RETRANSMIT = 0.2
+
+class ShapingProxy(socketserver.ThreadingTCPServer):
+    # A local HTTP proxy (CONNECT tunnels and plain absolute-URI requests) that delays, rate limits and
+    # "loses" traffic according to the current profile. TCP cannot drop bytes, so a lost segment is
+    # modelled as the retransmission delay it would have cost. The profile can be swapped while running.
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, profile: Optional[NetworkProfile] = None) -> None:
+        super().__init__((host, port), ShapingProxyHandler)
+        self.profile = profile or PROFILES["unlimited"]
+        self.logger = logging.getLogger(__name__)
+        self.lock = threading.Lock()
+        self.stats = {"connections": 0, "bytes_up": 0, "bytes_down": 0, "retransmits": 0}
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def start(self) -> None:
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.serve_forever, name="shaping-proxy", daemon=True)
+            self.thread.start()
+            self.logger.info(f"Shaping proxy listening on {self.server_address[0]}:{self.port}")
+
+    def stop(self) -> None:
+        if self.thread is not None:
+            self.shutdown()
+            self.thread.join()
+            self.thread = None
+        self.server_close()
+
+    def count(self, key: str, amount: int = 1) -> None:
+        with self.lock:
+            self.stats[key] += amount
+
+    def reset_stats(self) -> Dict[str, int]:
+        with self.lock:
+            stats = dict(self.stats)
+            self.stats = {key: 0 for key in stats}
+        return stats
+
+class ShapingProxyHandler(socketserver.BaseRequestHandler):
+    server: ShapingProxy
+
+    def handle(self) -> None:
+        self.server.count("connections")
+        request = self._read_request()
+        if request is None:
+            return
+        head, body = request
+        request_line, *header_lines = head.split(b"\r\n")
+        try:
+            method, target, version = request_line.decode("latin-1").split(" ", 2)
+            if method == "CONNECT":
+                host, _, port = target.rpartition(":")
+                upstream = socket.create_connection((host, int(port)), timeout=30)
+                upstream.settimeout(None)
+                self.request.sendall(f"{version} 200 Connection Established\r\n\r\n".encode("latin-1"))
+                self._relay(upstream, body)
+            else:
+                url = urlsplit(target)
+                upstream = socket.create_connection((url.hostname, url.port or 80), timeout=30)
+                upstream.settimeout(None)
+                path = url.path or "/"
+                if url.query:
+                    path += f"?{url.query}"
+                # One upstream per client connection, so keep-alive across hosts is not offered
+                kept = [line for line in header_lines
+                        if not line.lower().startswith((b"proxy-connection:", b"connection:"))]
+                forwarded = b"\r\n".join([f"{method} {path} {version}".encode("latin-1"), *kept,
+                                           b"Connection: close", b"", b""])
+                self._relay(upstream, forwarded + body)
+        except (OSError, ValueError) as e:
+            self.server.logger.debug(f"Proxy request failed: {str(e)}")
+            try:
+                self.request.sendall(b"HTTP/1.1 502 Bad Gateway\r\nContent-Length: 0\r\n\r\n")
+            except OSError:
+                pass
+
+    def _read_request(self) -> Optional[Tuple[bytes, bytes]]:
+        # Returns the request head and whatever followed it in the same reads (the start of a body)
+        data = b""
+        while b"\r\n\r\n" not in data:
+            chunk = self.request.recv(CHUNK_SIZE)
+            if not chunk or len(data) > 65536:
+                return None
+            data += chunk
+        head, _, body = data.partition(b"\r\n\r\n")
+        return head, body
+
+    def _relay(self, upstream: socket.socket, initial: bytes) -> None:
+        try:
+            upload = threading.Thread(target=self._pump, args=(self.request, upstream, "up", initial), daemon=True)
+            upload.start()
+            self._pump(upstream, self.request, "down", b"")
+            # Closing both sockets once the download side ends unblocks a client that never closes its end
+            upload.join(5)
+        finally:
+            upstream.close()
+
+    def _pump(self, source: socket.socket, target: socket.socket, direction: str, initial: bytes) -> None:
+        # The reader stamps each chunk with its arrival time; the writer releases it after half the added
+        # round trip, no earlier than the link is free again at the profile's bandwidth. The queue is
+        # bounded so a fast sender is held back by TCP flow control instead of buffering here.
+        chunks: queue.Queue = queue.Queue(maxsize=4)
+        stopped = threading.Event()
+
+        def put(data: Optional[bytes]) -> bool:
+            # Gives up once the writer has stopped, so the reader is not left blocked on a full queue
+            while not stopped.is_set():
+                try:
+                    chunks.put((time.monotonic(), data), timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def read() -> None:
+            if initial and not put(initial):
+                return
+            try:
+                while True:
+                    data = source.recv(CHUNK_SIZE)
+                    if not data or not put(data):
+                        break
+            except OSError:
+                pass
+            put(None)
+
+        reader = threading.Thread(target=read, daemon=True)
+        reader.start()
+        link_free = 0.0
+        try:
+            while True:
+                arrived, data = chunks.get()
+                if data is None:
+                    break
+                profile = self.server.profile
+                send_at = max(arrived + profile.latency_ms / 2000, link_free)
+                if profile.loss > 0 and random.random() < profile.loss:
+                    self.server.count("retransmits")
+                    send_at += max(MIN_RETRANSMIT, 2 * profile.latency_ms / 1000)
+                kbps = profile.up_kbps if direction == "up" else profile.down_kbps
+                link_free = send_at + (len(data) * 8 / (kbps * 1000) if kbps > 0 else 0.0)
+                delay = link_free - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                self.server.count(f"bytes_{direction}", len(data))
+                target.sendall(data)
+        except OSError:
+            pass
+        finally:
+            stopped.set()
+            try:
+                target.shutdown(socket.SHUT_WR)
+            except OSError:
+                pass
+
+class NetworkShaper:
+    # Applies profiles through the emulator console (`adb emu network speed/delay`) on emulators, or by
+    # pointing the device's global HTTP proxy at a local ShapingProxy through `adb reverse`. The proxy
+    # listens on an ephemeral host port, so shapers for several devices do not collide; each device
+    # reaches it on proxy_port.
+    # The emulator console has no packet loss setting; use mode "proxy" for lossy profiles.
+    def __init__(self, device: DeviceController, mode: str = "auto", proxy_port: int = 8119) -> None:
+        if mode == "auto":
+            mode = "emulator" if device.device_id.startswith("emulator-") else "proxy"
+        if mode not in ("emulator", "proxy"):
+            raise NetworkShapingError(f"mode must be 'auto', 'emulator' or 'proxy', got '{mode}'")
+        self.device = device
+        self.mode = mode
+        self.proxy_port = proxy_port
+        self.proxy: Optional[ShapingProxy] = None
+        self.profile: Optional[NetworkProfile] = None
+        self.logger = logging.getLogger(__name__)
+
+    def apply(self, profile: NetworkProfile) -> None:
+        try:
+            if self.mode == "emulator":
+                self._apply_emulator(profile)
+            else:
+                self._apply_proxy(profile)
+        except (DeviceControllerError, OSError) as e:
+            raise NetworkShapingError(f"Failed to apply network profile {profile.name}: {str(e)}")
+        self.profile = profile
+        self.logger.info(f"Applied network profile {profile} via {self.mode}")
+
+    def _apply_emulator(self, profile: NetworkProfile) -> None:
+        if profile.loss > 0:
+            self.logger.warning(f"Emulator console cannot emulate loss; ignoring loss={profile.loss} of {profile.name}")
+        speed = f"{profile.up_kbps:g}:{profile.down_kbps:g}" if profile.up_kbps and profile.down_kbps else "full"
+        # The console delay is one-way, in milliseconds
+        delay = f"{profile.latency_ms / 2:g}" if profile.latency_ms else "none"
+        self.device.emulator_console(f"network speed {speed}")
+        self.device.emulator_console(f"network delay {delay}")
+
+    def _apply_proxy(self, profile: NetworkProfile) -> None:
+        if self.proxy is None:
+            self.proxy = ShapingProxy("127.0.0.1", 0, profile)
+            self.proxy.start()
+            self.device.reverse_port(self.proxy_port, self.proxy.port)
+            self.device.set_http_proxy(f"127.0.0.1:{self.proxy_port}")
+        self.proxy.profile = profile
+
+    def stats(self) -> Dict[str, int]:
+        # Traffic seen by the proxy since the last call; all zero in emulator mode
+        return self.proxy.reset_stats() if self.proxy is not None else {}
+
+    def reset(self) -> None:
+        try:
+            if self.mode == "emulator":
+                self.device.emulator_console("network speed full")
+                self.device.emulator_console("network delay none")
+            elif self.proxy is not None:
+                self.device.clear_http_proxy()
+                self.device.remove_reverse_port(self.proxy_port)
+        except DeviceControllerError as e:
+            raise NetworkShapingError(f"Failed to reset network shaping: {str(e)}")
+        finally:
+            if self.proxy is not None:
+                self.proxy.stop()
+                self.proxy = None
+            self.profile = None
+        self.logger.info("Reset network shaping")
\ No newline at end of file
@@ -0,0 +1,101 @@
+import importlib
+import inspect
+import logging
+from importlib.metadata import entry_points
+from typing import Dict, List, Optional, Type
+
+# Names usable in a configuration's `plugins` and `test_cases` lists, mapped to "module:Class" so that
+# only the classes a run actually uses get imported
+BUILTINS: Dict[str, Dict[str, str]] = {
+    "plugins": {
+        "example_plugin": "droid.plugins.example_plugin:ExamplePlugin",
+        "screenshot_plugin": "droid.plugins.screenshot_plugin:ScreenShotPlugin",
+        "screen_record_plugin": "droid.plugins.screen_record_plugin:ScreenRecordPlugin",
+        "resource_sampler_plugin": "droid.plugins.resource_sampler_plugin:ResourceSamplerPlugin",
+        "ui_hierarchy_plugin": "droid.plugins.ui_hierarchy_plugin:UiHierarchyPlugin",
+    },
+    "test_cases": {
+        "example_test": "droid.test_cases.example_test:ExampleTest",
+        "network_test": "droid.test_cases.network_test:NetworkTest",
+        "network_matrix_test": "droid.test_cases.network_matrix_test:NetworkMatrixTest",
+        "startup_test": "droid.test_cases.startup_test:StartupTest",
+    },
+}
+
+# Third-party packages register their classes under these entry point groups, e.g. in pyproject.toml:
+#   [project.entry-points."droid.plugins"]
+#   my_plugin = "my_package.my_plugin:MyPlugin"
+ENTRY_POINT_GROUPS = {
+    "plugins": "droid.plugins",
+    "test_cases": "droid.test_cases",
+}
+
+class RegistryError(Exception):
+    pass
+
+class Registry:
+    # Resolves a name in this order: an explicit "module:Class" path, a built-in name, an installed entry
+    # point, and finally a module droid.<kind>.<name> scanned for a subclass (for files dropped into the
+    # package without being registered). Entry points are only looked up for names that are not built in.
+    def __init__(self, kind: str, base_class: Type) -> None:
+        if kind not in BUILTINS:
+            raise RegistryError(f"Unknown registry kind '{kind}'")
+        self.kind = kind
+        self.base_class = base_class
+        self.logger = logging.getLogger(__name__)
+        self.classes: Dict[str, Type] = {}
+        self._entry_points: Optional[Dict[str, str]] = None
+
+    def entry_points(self) -> Dict[str, str]:
+        if self._entry_points is None:
+            self._entry_points = {
+                entry_point.name: entry_point.value
+                for entry_point in entry_points(group=ENTRY_POINT_GROUPS[self.kind])
+            }
+        return self._entry_points
+
+    def names(self) -> List[str]:
+        return sorted(set(BUILTINS[self.kind]) | set(self.entry_points()))
+
+    def load(self, name: str) -> Type:
+        if name not in self.classes:
+            self.classes[name] = self._resolve(name)
+        return self.classes[name]
+
+    def _resolve(self, name: str) -> Type:
+        if ":" in name:
+            return self._load_path(name)
+        if name in BUILTINS[self.kind]:
+            return self._load_path(BUILTINS[self.kind][name])
+        if name in self.entry_points():
+            return self._load_path(self.entry_points()[name])
+        return self._scan_module(name)
+
+    def _load_path(self, path: str) -> Type:
+        module_name, _, class_name = path.partition(":")
+        try:
+            cls = getattr(importlib.import_module(module_name), class_name)
+        except ImportError as e:
+            raise RegistryError(f"Failed to import {module_name}: {str(e)}")
+        except AttributeError:
+            raise RegistryError(f"{module_name} has no class {class_name}")
+        if not (isinstance(cls, type) and issubclass(cls, self.base_class)):
+            raise RegistryError(f"{path} is not a {self.base_class.__name__}")
+        if inspect.isabstract(cls):
+            raise RegistryError(f"{path} is abstract")
+        return cls
+
+    def _scan_module(self, name: str) -> Type:
+        module_name = f"droid.{self.kind}.{name}"
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError as e:
+            raise RegistryError(f"Unknown {self.kind[:-1]} '{name}' (available: {', '.join(self.names())}): {str(e)}")
+        class_objects = [
+            obj for obj in module.__dict__.values()
+            if isinstance(obj, type) and issubclass(obj, self.base_class) and not inspect.isabstract(obj)
+        ]
+        if not class_objects:
+            raise RegistryError(f"No {self.kind[:-1]} class found in {module_name}")
+        self.logger.debug(f"Found unregistered {self.kind[:-1]} {name} by scanning {module_name}")
+        return class_objects[-1]
\ No newline at end of file
@@ -0,0 +1,130 @@
+import json
+import logging
+import os
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+REPORT_FILE = "report.jsonl"
+TEXT_REPORT_FILE = "test_report.txt"
+
+class ReportError(Exception):
+    pass
+
+def merge_named_results(entries: Iterable[Tuple[str, dict]]) -> dict:
+    results: dict = {}
+    for name, result in entries:
+        unique_name, repeat = name, 1
+        while unique_name in results:
+            repeat += 1
+            unique_name = f"{name} #{repeat}"
+        results[unique_name] = result
+    return results
+
+class ReportSink:
+    # Every record is one JSON line, flushed as soon as it is written, so a crashed run keeps all finished results
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+        try:
+            self.file = open(path, 'a', encoding='utf-8')
+        except OSError as e:
+            raise ReportError(f"Failed to open report file {path}: {str(e)}")
+
+    def write(self, record_type: str, **fields) -> None:
+        # "type" is always the first key so readers can skip record types without parsing them
+        line = json.dumps({"type": record_type, **fields}, default=str)
+        with self.lock:
+            if self.file.closed:
+                return
+            self.file.write(line + "\n")
+            self.file.flush()
+
+    def run_started(self, run_id: str, app_package: str, app_activity: str, devices: Dict[str, str],
+                    metadata: Dict[str, str], pool_mode: str = "distribute") -> None:
+        self.write("run", run_id=run_id, app_package=app_package, app_activity=app_activity,
+                   devices=devices, metadata=metadata, pool_mode=pool_mode)
+
+    def test_completed(self, index: int, name: str, test: str, device: str, duration: float, result: dict) -> None:
+        self.write("test", index=index, name=name, test=test, device=device, duration=duration,
+                   status="error" if "error" in result else "passed", result=result)
+
+    def plugin_completed(self, test: Optional[str], device: str, plugin: str, duration: float, result: dict) -> None:
+        self.write("plugin", test=test, device=device, plugin=plugin, duration=duration,
+                   status="error" if "error" in result else "passed", result=result)
+
+    def run_completed(self, run_id: str, duration: float) -> None:
+        self.write("run_end", run_id=run_id, duration=duration)
+
+    def close(self) -> None:
+        with self.lock:
+            self.file.close()
+
+def read_records(path: str, types: Optional[Sequence[str]] = None) -> Iterator[dict]:
+    prefixes = tuple(f'{{"type": "{record_type}"' for record_type in types) if types else None
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if prefixes is not None and not line.startswith(prefixes):
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # The last line of a run that crashed mid-write may be truncated
+                continue
+
+def load_run(run_dir: str, types: Optional[Sequence[str]] = ("run", "test", "run_end")) -> dict:
+    run: dict = {"run_dir": run_dir, "run": None, "tests": [], "plugins": [], "completed": False}
+    # A resumed run appends the retry of a failed test after the failed attempt; the later record wins, and
+    # the plugin records of the failed attempt are dropped with it. A test is one entry per device when
+    # every device runs the suite, and one entry overall when devices share it, since the retry may run
+    # elsewhere. Reports written before pool_mode was recorded keep one entry per device.
+    tests: Dict[Tuple[int, Optional[str]], Tuple[dict, List[dict]]] = {}
+    # Each device runs one test at a time, so its plugin records belong to its next test record
+    pending: Dict[Optional[str], List[dict]] = {}
+    per_device = True
+    for record in read_records(os.path.join(run_dir, REPORT_FILE), types):
+        record_type = record["type"]
+        if record_type == "run":
+            run["run"] = record
+            per_device = record.get("pool_mode", "replicate") == "replicate"
+            # Plugin records not followed by their test were cut off by an interruption and are rerun
+            pending = {}
+        elif record_type == "test":
+            key = (record["index"], record["device"] if per_device else None)
+            tests[key] = (record, pending.pop(record["device"], []))
+        elif record_type == "plugin":
+            pending.setdefault(record.get("device"), []).append(record)
+        elif record_type == "run_end":
+            run["completed"] = True
+            run["duration"] = record["duration"]
+    run["tests"] = [record for record, _ in tests.values()]
+    plugins = [plugin for _, plugins in tests.values() for plugin in plugins]
+    run["plugins"] = plugins + [plugin for records in pending.values() for plugin in records]
+    return run
+
+def load_runs(root: str = "test_results", types: Optional[Sequence[str]] = ("run", "test", "run_end")) -> List[dict]:
+    runs = []
+    with os.scandir(root) as entries:
+        run_dirs = sorted(entry.path for entry in entries if entry.is_dir())
+    for run_dir in run_dirs:
+        if os.path.isfile(os.path.join(run_dir, REPORT_FILE)):
+            runs.append(load_run(run_dir, types))
+    return runs
+
+def render_text_report(run_dir: str) -> str:
+    run = load_run(run_dir)
+    header = run["run"] or {}
+    tests = sorted(run["tests"], key=lambda record: record["index"])
+    results = merge_named_results((record["name"], record["result"]) for record in tests)
+    report_path = os.path.join(run_dir, TEXT_REPORT_FILE)
+    with open(report_path, 'w') as f:
+        f.write(f"=== Test Results for Run {header.get('run_id')} ===\n")
+        for device_id, device_info in header.get("devices", {}).items():
+            f.write(f"Device: {device_id} - {device_info}\n")
+        f.write(f"App Package: {header.get('app_package')}\n")
+        f.write(f"App Activity: {header.get('app_activity')}\n\n")
+        for test_name, test_result in results.items():
+            f.write(f"\n{test_name}:\n")
+            for key, value in test_result.items():
+                f.write(f"  {key}: {value}\n")
+    return report_path
@@ -0,0 +1,95 @@
+import logging
+import struct
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List
+
+class ScreenshotFormatError(Exception):
+    pass
+
+# screencap raw pixel formats and their (bytes per pixel, PNG color type). RGBX_8888 is written as RGB,
+# since its fourth byte is undefined and would otherwise become alpha.
+PIXEL_FORMATS = {
+    1: (4, 6),  # RGBA_8888
+    2: (4, 2),  # RGBX_8888
+    3: (3, 2),  # RGB_888
+}
+
+@dataclass
+class RawFrame:
+    width: int
+    height: int
+    pixel_format: int
+    pixels: bytes
+
+def parse_raw_screencap(data: bytes) -> RawFrame:
+    if len(data) < 12:
+        raise ScreenshotFormatError(f"Raw screencap too short: {len(data)} bytes")
+    width, height, pixel_format = struct.unpack_from("<III", data)
+    if pixel_format not in PIXEL_FORMATS:
+        raise ScreenshotFormatError(f"Unsupported screencap pixel format: {pixel_format}")
+    bytes_per_pixel = PIXEL_FORMATS[pixel_format][0]
+    pixel_bytes = width * height * bytes_per_pixel
+    # Android 9+ appends a 4 byte color space field to the 12 byte header
+    header_size = len(data) - pixel_bytes
+    if header_size not in (12, 16):
+        raise ScreenshotFormatError(f"Raw screencap size mismatch for {width}x{height}: {len(data)} bytes")
+    return RawFrame(width, height, pixel_format, data[header_size:])
+
+def encode_png(frame: RawFrame, compression_level: int = 1) -> bytes:
+    bytes_per_pixel, color_type = PIXEL_FORMATS[frame.pixel_format]
+    pixels = frame.pixels
+    if bytes_per_pixel == 4 and color_type == 2:
+        pixels = _drop_padding(pixels)
+        bytes_per_pixel = 3
+    stride = frame.width * bytes_per_pixel
+    scanlines = b"".join(
+        b"\x00" + pixels[offset:offset + stride] for offset in range(0, stride * frame.height, stride)
+    )
+    header = struct.pack(">IIBBBBB", frame.width, frame.height, 8, color_type, 0, 0, 0)
+    return b"".join([
+        b"\x89PNG\r\n\x1a\n",
+        _png_chunk(b"IHDR", header),
+        _png_chunk(b"IDAT", zlib.compress(scanlines, compression_level)),
+        _png_chunk(b"IEND", b""),
+    ])
+
+def _drop_padding(pixels: bytes) -> bytes:
+    rgb = bytearray(len(pixels) // 4 * 3)
+    for channel in range(3):
+        rgb[channel::3] = pixels[channel::4]
+    return bytes(rgb)
+
+def _png_chunk(tag: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I", len(payload)) + tag + payload + struct.pack(">I", zlib.crc32(tag + payload))
+
+class ScreenshotEncoder:
+    def __init__(self, max_workers: int = 1) -> None:
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="png-encoder")
+        self.pending: List[Future] = []
+        self.logger = logging.getLogger(__name__)
+
+    def submit(self, raw: bytes, path: str) -> Future:
+        future = self.executor.submit(self._encode_to_file, raw, path)
+        self.pending.append(future)
+        return future
+
+    def _encode_to_file(self, raw: bytes, path: str) -> str:
+        png = encode_png(parse_raw_screencap(raw))
+        with open(path, 'wb') as f:
+            f.write(png)
+        self.logger.info(f"Encoded screenshot: {path}")
+        return path
+
+    def flush(self) -> None:
+        pending, self.pending = self.pending, []
+        for future in pending:
+            try:
+                future.result()
+            except Exception as e:
+                self.logger.error(f"Failed to encode screenshot: {str(e)}")
+
+    def close(self) -> None:
+        self.flush()
+        self.executor.shutdown()
@@ -0,0 +1,61 @@
+import math
+import random
+import statistics
+from typing import Callable, Dict, List, Sequence, Tuple
+
+def percentile(values: Sequence[float], q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        raise ValueError("percentile of empty sequence")
+    position = (len(ordered) - 1) * q / 100.0
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    if lower == upper:
+        return float(ordered[lower])
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+def bootstrap_ci(values: Sequence[float], statistic: Callable[[Sequence[float]], float] = statistics.median,
+                 confidence: float = 0.95, resamples: int = 2000, seed: int = 0) -> Tuple[float, float]:
+    rng = random.Random(seed)
+    size = len(values)
+    estimates = sorted(statistic([values[rng.randrange(size)] for _ in range(size)]) for _ in range(resamples))
+    tail = (1.0 - confidence) / 2 * 100
+    return percentile(estimates, tail), percentile(estimates, 100 - tail)
+
+def summarize(values: Sequence[float], confidence: float = 0.95) -> Dict[str, float]:
+    ci_low, ci_high = bootstrap_ci(values, confidence=confidence)
+    return {
+        "n": len(values),
+        "mean": statistics.mean(values),
+        "median": statistics.median(values),
+        "p90": percentile(values, 90),
+        "stdev": statistics.stdev(values) if len(values) > 1 else 0.0,
+        "median_ci_low": ci_low,
+        "median_ci_high": ci_high,
+    }
+
+def mann_whitney_greater(current: Sequence[float], baseline: Sequence[float]) -> Tuple[float, float]:
+    # One-sided Mann-Whitney U test that `current` tends to be larger than `baseline`,
+    # using the normal approximation with tie and continuity corrections
+    n1, n2 = len(current), len(baseline)
+    ranked: List[Tuple[float, int]] = sorted([(value, 0) for value in current] + [(value, 1) for value in baseline])
+    ranks = [0.0] * len(ranked)
+    tie_term = 0.0
+    index = 0
+    while index < len(ranked):
+        end = index
+        while end + 1 < len(ranked) and ranked[end + 1][0] == ranked[index][0]:
+            end += 1
+        for position in range(index, end + 1):
+            ranks[position] = (index + end) / 2 + 1
+        ties = end - index + 1
+        tie_term += ties ** 3 - ties
+        index = end + 1
+    rank_sum = sum(rank for rank, (_, group) in zip(ranks, ranked) if group == 0)
+    u = rank_sum - n1 * (n1 + 1) / 2
+    total = n1 + n2
+    variance = n1 * n2 / 12 * ((total + 1) - tie_term / (total * (total - 1)))
+    if variance <= 0:
+        return u, 1.0
+    z = (u - n1 * n2 / 2 - 0.5) / math.sqrt(variance)
+    return u, 0.5 * math.erfc(z / math.sqrt(2))
@@ -1,32 +1,79 @@
-import importlib
 import os
 import logging
+import queue
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from functools import reduce
-from typing import List, Type
+from typing import ContextManager, Iterator, List, Optional, Tuple, Type
+from . import tracing
 from .device_controller import DeviceController, DeviceControllerError
 from .app_analyzer import AppAnalyzer, AppAnalyzerError
+from .logcat import LogcatMonitor
+from .report import REPORT_FILE, ReportSink, render_text_report
+from .visual_diff import INDEX_FILE, VisualDiff, VisualIndex
+from .history import HISTORY_FILE, HistoryError, HistoryStore
+from .artifact_store import ARTIFACT_DIR, ArtifactStore
+from .registry import Registry, RegistryError
+from .checkpoint import CHECKPOINT_FILE, Checkpoint, CheckpointError
+from .tracing import TRACE_FILE, TRACE_SUMMARY_FILE, Tracer, TracingError
 from droid.types import Configuration
-from droid.plugins import BasePlugin
-from droid.test_cases import BaseTest
+from droid.plugins import AsyncBasePlugin, BasePlugin
+from droid.test_cases import AsyncBaseTest, BaseTest
 
 class TestRunnerError(Exception):
     pass
 
+@dataclass
+class DeviceSession:
+    config: Configuration
+    device: DeviceController
+    analyzer: AppAnalyzer
+    logcat: Optional[LogcatMonitor] = None
+
 class TestRunner:
+    supports_async = False
+
     def __init__(self, config: Configuration, verbose: bool) -> None:
         self.config = config
         self._setup_logging(verbose)
         try:
-            self.device = self._initialize_device_controller()
-            self.device.wait_for_device()
-            self.plugins = self._load_plugins()
-            self.analyzer = AppAnalyzer(self.device, self.plugins)
+            self.checkpoint = self._load_checkpoint()
+            self.plugin_classes = self._load_plugins()
+            # (position in config.test_cases, class); the position is the test's index in reports and checkpoints
             self.test_cases = self._load_test_cases()
+            self.test_case_classes = [test_class for _, test_class in self.test_cases]
+            self._check_async_support()
+            self.report = ReportSink(os.path.join(self.config.run_dir, REPORT_FILE))
+            self.visual_diff: Optional[VisualDiff] = None
+            if self.config.visual_diff:
+                # One index next to all run directories, so every run is compared against earlier ones
+                index_path = os.path.join(os.path.dirname(self.config.run_dir), INDEX_FILE)
+                self.visual_diff = VisualDiff(self.config, VisualIndex(index_path))
+            self.artifact_store: Optional[ArtifactStore] = None
+            if self.config.artifact_store:
+                options = self.config.options_for("artifact_store")
+                self.artifact_store = ArtifactStore(
+                    os.path.join(os.path.dirname(self.config.run_dir), ARTIFACT_DIR),
+                    compress_threshold=int(options.get("compress_threshold_kb", 1024)) * 1024,
+                    workers=int(options.get("workers", 2))
+                )
+            self.tracer: Optional[Tracer] = None
+            if self.config.tracing:
+                self.tracer = Tracer(max_spans=int(self.config.options_for("tracing").get("max_spans", 1_000_000)))
+            self.sessions = [self._create_session(device_id) for device_id in self.config.device_ids()]
+            self.device = self.sessions[0].device
+            self.analyzer = self.sessions[0].analyzer
+            self.plugins = self.analyzer.plugins
         except Exception as e:
             self.logger.error(f"Error during TestRunner initialization: {str(e)}")
             raise TestRunnerError(f"TestRunner initialization failed: {str(e)}")
 
+    @property
+    def pooled(self) -> bool:
+        return len(self.config.device_ids()) > 1
+
     def _setup_logging(self, verbose: bool) -> None:
         log_file = os.path.join(self.config.run_dir, "test_run.log")
         file_handler = logging.FileHandler(filename=log_file)
@@ -41,63 +88,106 @@ class TestRunner:
         )
         self.logger = logging.getLogger(__name__)
 
-    def _initialize_device_controller(self) -> DeviceController:
+    def _create_session(self, device_id: str) -> DeviceSession:
+        config = self.config.for_device(device_id) if self.pooled else self.config
+        device = self._initialize_device_controller(config)
+        device.tracer = self.tracer
+        device.wait_for_device()
+        plugins = [plugin_class() for plugin_class in self.plugin_classes]
+        logcat = None
+        if config.logcat:
+            logcat = LogcatMonitor(device, config.app_package, os.path.join(config.run_dir, "logcat.txt.gz"))
+        analyzer = AppAnalyzer(device, plugins, logcat)
+        analyzer.report = self.report
+        analyzer.tracer = self.tracer
+        return DeviceSession(config, device, analyzer, logcat)
+
+    def _initialize_device_controller(self, config: Configuration) -> DeviceController:
         try:
-            return DeviceController(self.config)
+            return DeviceController(config)
         except Exception as e:
             raise TestRunnerError(f"Failed to initialize DeviceController: {str(e)}")
 
-    def _load_plugins(self) -> List[BasePlugin]:
-        return self._load_classes('plugins', BasePlugin)
+    def _load_checkpoint(self) -> Checkpoint:
+        checkpoint = Checkpoint(os.path.join(self.config.run_dir, CHECKPOINT_FILE))
+        if self.config.resume and checkpoint.exists():
+            checkpoint.load()
+            # A resumed run keeps its shard even when --shard is not repeated
+            if checkpoint.shard and not self.config.shard:
+                self.config.shard = checkpoint.shard
+            if checkpoint.test_cases != list(self.config.test_cases) or checkpoint.shard != self.config.shard:
+                raise TestRunnerError(f"Run {self.config.run_id} was started with test cases {checkpoint.test_cases} "
+                                      f"and shard '{checkpoint.shard}'; resume it with the same ones")
+            self.logger.info(f"Resuming run {self.config.run_id}: {len(checkpoint.passed())} completed tests will be skipped")
+        elif self.config.resume:
+            self.logger.warning(f"No checkpoint found in {self.config.run_dir}; running all tests again")
+        checkpoint.start(self.config.run_id, self.config.shard, self.config.test_cases)
+        return checkpoint
+
+    def _load_plugins(self) -> List[Type[BasePlugin]]:
+        return self._load_classes('plugins', BasePlugin, self.config.plugins)
+
+    def _load_test_cases(self) -> List[Tuple[int, Type[BaseTest]]]:
+        # Shard i of N takes every Nth configured test case starting at the ith, so shards of the same
+        # configuration never overlap and together cover every test case
+        shard_index, shard_count = self.config.shard_spec
+        positions = range(shard_index - 1, len(self.config.test_cases), shard_count)
+        if shard_count > 1:
+            self.logger.info(f"Shard {shard_index}/{shard_count}: running {len(positions)} of "
+                             f"{len(self.config.test_cases)} test cases")
+        names = [self.config.test_cases[position] for position in positions]
+        loaded = self._load_indexed('test_cases', BaseTest, names)
+        return [(positions[offset], test_class) for offset, test_class in loaded]
 
-    def _load_test_cases(self) -> List[BaseTest]:
-        return self._load_classes('test_cases', BaseTest)
+    def _check_async_support(self) -> None:
+        async_classes = [
+            cls.__name__ for cls in self.plugin_classes + self.test_case_classes
+            if issubclass(cls, (AsyncBasePlugin, AsyncBaseTest))
+        ]
+        if async_classes and not self.supports_async:
+            raise TestRunnerError(f"{', '.join(async_classes)} require the async runner (--async)")
 
-    def _load_classes(self, module_type: str, base_class: Type) -> List:
+    def _load_classes(self, module_type: str, base_class: Type, names: List[str]) -> List[Type]:
+        return [cls for _, cls in self._load_indexed(module_type, base_class, names)]
+
+    def _load_indexed(self, module_type: str, base_class: Type, names: List[str]) -> List[Tuple[int, Type]]:
+        # Classes that fail to load are left out, so each one comes with its position in names
+        registry = Registry(module_type, base_class)
         classes = []
-        for name in getattr(self.config, module_type):
+        for position, name in enumerate(names):
             try:
-                module = importlib.import_module(f"droid.{module_type}.{name}")
-                class_objects = [
-                    obj for obj in module.__dict__.values()
-                    if isinstance(obj, type) and issubclass(obj, base_class) and obj != base_class
-                ]
-                if class_objects:
-                    classes.append(class_objects[-1]())
-                    self.logger.info(f"Loaded {module_type[:-1]}: {class_objects[-1].__name__}")
-                else:
-                    self.logger.warning(f"No {module_type[:-1]} class found in {name}")
-            except ImportError as e:
+                cls = registry.load(name)
+                classes.append((position, cls))
+                self.logger.info(f"Loaded {module_type[:-1]}: {cls.__name__}")
+            except RegistryError as e:
                 self.logger.error(f"Failed to load {module_type[:-1]} {name}: {str(e)}")
         return classes
 
     def run(self) -> None:
         try:
             self.logger.info(f"Starting test run {self.config.run_id}")
-            self.logger.info(f"Device info: {self.device.get_device_info()}")
-            
-            results = {}
-            for test_case in self.test_cases:
-                test_name = test_case.__class__.__name__
-                self.logger.info(f"Running test case: {test_name}")
-                try:
-                    self.device.wait_for_device()
-                    test_result = test_case.run(self.device, self.analyzer)
-                    results[test_name] = test_result
-                    saved_artifacts = self._save_artifacts(test_name, test_result)
-                    if saved_artifacts > 0:
-                        self.logger.info(f"Saved {saved_artifacts} artifacts for test case: {test_name}")
-                    else:
-                        self.logger.info(f"No artifacts to save for test case: {test_name}")
-
-                except (DeviceControllerError, AppAnalyzerError) as e:
-                    self.logger.error(f"Error in test case {test_name}: {str(e)}")
-                    results[test_name] = {"error": str(e)}
-                except Exception as e:
-                    self.logger.error(f"Unexpected error in test case {test_name}: {str(e)}")
-                    results[test_name] = {"error": f"Unexpected error: {str(e)}"}
+            start_time = time.monotonic()
+            devices = {}
+            with self._phase("device_info"):
+                for session in self.sessions:
+                    devices[session.config.device_id] = session.device.get_device_info()
+                    self.logger.info(f"Device info: {devices[session.config.device_id]}")
+                    if session.logcat is not None:
+                        session.logcat.start()
+            self.report.run_started(self.config.run_id, self.config.app_package, self.config.app_activity,
+                                    devices, self.config.metadata, self.config.pool_mode)
 
-            self._generate_report(results)
+            with self._phase("tests"):
+                self._schedule()
+            if self.artifact_store is not None:
+                with self._phase("artifact_flush"):
+                    self.artifact_store.flush()
+
+            self.report.run_completed(self.config.run_id, time.monotonic() - start_time)
+            with self._phase("report"):
+                self._generate_report()
+            with self._phase("history"):
+                self._record_history()
             self.logger.info(f"Test run {self.config.run_id} completed. Results saved in {self.config.run_dir}")
         except Exception as e:
             self.logger.error(f"Test run failed: {str(e)}")
@@ -105,7 +195,103 @@ class TestRunner:
         finally:
             self.cleanup()
 
-    def _save_artifacts(self, test_name: str, test_result: dict) -> int:
+    def _schedule(self) -> None:
+        work_queues = self._work_queues()
+        if not self.pooled:
+            self._run_session(self.sessions[0], work_queues[0])
+            return
+        with ThreadPoolExecutor(max_workers=len(self.sessions), thread_name_prefix="device") as executor:
+            futures = [executor.submit(self._run_session, session, work)
+                       for session, work in zip(self.sessions, work_queues)]
+            for future in futures:
+                future.result()
+
+    def _work_queues(self) -> List[queue.Queue]:
+        # One queue per session: its own in replicate mode, otherwise a single queue all devices pull from
+        if self.pooled:
+            self.logger.info(f"Running in device pool mode '{self.config.pool_mode}' on {len(self.sessions)} devices")
+        if self.config.pool_mode == "replicate":
+            return [self._build_work_queue(session.config.device_id) for session in self.sessions]
+        return [self._build_work_queue()] * len(self.sessions)
+
+    def _build_work_queue(self, device_id: Optional[str] = None) -> queue.Queue:
+        # Replicated queues skip what passed on their own device; otherwise a pass on any device counts
+        done = self.checkpoint.done(device_id)
+        work: queue.Queue = queue.Queue()
+        for index, test_class in self.test_cases:
+            if (index, test_class.__name__) in done:
+                self.logger.info(f"Skipping {test_class.__name__}: already completed in run {self.config.run_id}")
+                continue
+            work.put((index, test_class))
+        return work
+
+    def _take_work(self, work: queue.Queue) -> Iterator[Tuple[int, Type[BaseTest]]]:
+        while True:
+            try:
+                yield work.get_nowait()
+            except queue.Empty:
+                return
+
+    def _result_name(self, session: DeviceSession, test_class: Type[BaseTest]) -> str:
+        return f"{session.config.device_id}/{test_class.__name__}" if self.pooled else test_class.__name__
+
+    def _run_session(self, session: DeviceSession, work: queue.Queue) -> None:
+        for index, test_class in self._take_work(work):
+            result_name = self._result_name(session, test_class)
+            start_time = time.monotonic()
+            with tracing.span(self.tracer, result_name, "test", device=session.config.device_id):
+                test_result = self._run_test_case(session, test_class())
+            self._test_completed(session, index, test_class, time.monotonic() - start_time, test_result)
+
+    def _test_completed(self, session: DeviceSession, index: int, test_class: Type[BaseTest], duration: float,
+                        test_result: dict) -> None:
+        test_name, result_name = test_class.__name__, self._result_name(session, test_class)
+        device_id = session.config.device_id
+        if self.pooled:
+            test_result["device"] = device_id
+        self.report.test_completed(index, result_name, test_name, device_id, duration, test_result)
+        try:
+            self.checkpoint.record(index, result_name, test_name, device_id, duration, test_result)
+        except CheckpointError as e:
+            self.logger.error(f"Failed to record checkpoint for {result_name}: {str(e)}")
+
+    def _test_started(self, session: DeviceSession, test_case: BaseTest) -> str:
+        test_name = test_case.__class__.__name__
+        self.logger.info(f"Running test case: {test_name} on device {session.config.device_id}")
+        session.analyzer.test_name = test_name
+        return test_name
+
+    def _test_failed(self, test_name: str, error: Exception) -> dict:
+        if isinstance(error, (DeviceControllerError, AppAnalyzerError)):
+            self.logger.error(f"Error in test case {test_name}: {str(error)}")
+            return {"error": str(error)}
+        self.logger.error(f"Unexpected error in test case {test_name}: {str(error)}")
+        return {"error": f"Unexpected error: {str(error)}"}
+
+    def _run_test_case(self, session: DeviceSession, test_case: BaseTest) -> dict:
+        test_name = self._test_started(session, test_case)
+        try:
+            session.device.wait_for_device()
+            with self._phase("execute", test=test_name):
+                test_result = test_case.run(session.device, session.analyzer)
+            with self._phase("plugin_flush", test=test_name):
+                session.analyzer.flush()
+            with self._phase("save_artifacts", test=test_name):
+                self._save_test_artifacts(test_name, test_result, session.config.run_dir)
+            with self._phase("visual_diff", test=test_name):
+                self._check_visual_diff(session, test_name, test_result)
+        except Exception as e:
+            test_result = self._test_failed(test_name, e)
+        return test_result
+
+    def _save_test_artifacts(self, test_name: str, test_result: dict, run_dir: str) -> None:
+        saved_artifacts = self._save_artifacts(test_name, test_result, run_dir)
+        if saved_artifacts > 0:
+            self.logger.info(f"Saved {saved_artifacts} artifacts for test case: {test_name}")
+        else:
+            self.logger.info(f"No artifacts to save for test case: {test_name}")
+
+    def _save_artifacts(self, test_name: str, test_result: dict, run_dir: str) -> int:
         artifacts = []
         objs = []
         for key, val in test_result.items():
@@ -113,8 +299,12 @@ class TestRunner:
                 artifacts.append((key, val))
             elif isinstance(val, dict):
                 objs.append(val)
-        if len(artifacts) > 0:
-            artifact_dir = os.path.join(self.config.run_dir, test_name)
+        if len(artifacts) > 0 and self.artifact_store is not None:
+            for key, value in artifacts:
+                test_result[key] = self.artifact_store.add(value, run_dir, test_name, key)
+                self.logger.info(f"Stored {os.path.basename(value)} artifact for test case: {test_name}")
+        elif len(artifacts) > 0:
+            artifact_dir = os.path.join(run_dir, test_name)
             os.makedirs(artifact_dir, exist_ok=True)
             for key, value in artifacts:
                 base_name = os.path.basename(value)
@@ -122,26 +312,65 @@ class TestRunner:
                 os.rename(value, new_path)
                 test_result[key] = new_path
                 self.logger.info(f"Saved {base_name} artifact for test case: {test_name}")
-        return reduce(lambda val, curr: val + self._save_artifacts(test_name, curr), objs, len(artifacts))
-
-
-    def _generate_report(self, results: dict) -> None:
-        report_path = os.path.join(self.config.run_dir, "test_report.txt")
-        with open(report_path, 'w') as f:
-            f.write(f"=== Test Results for Run {self.config.run_id} ===\n")
-            f.write(f"Device: {self.device.get_device_info()}\n")
-            f.write(f"App Package: {self.config.app_package}\n")
-            f.write(f"App Activity: {self.config.app_activity}\n\n")
-            for test_name, test_result in results.items():
-                f.write(f"\n{test_name}:\n")
-                for key, value in test_result.items():
-                    f.write(f"  {key}: {value}\n")
-        self.logger.info(f"Test report generated: {report_path}")
+        return reduce(lambda val, curr: val + self._save_artifacts(test_name, curr, run_dir), objs, len(artifacts))
 
-    def cleanup(self) -> None:
+
+    def _check_visual_diff(self, session: DeviceSession, test_name: str, test_result: dict) -> None:
+        if self.visual_diff is None:
+            return
+        # Reported under visual_diff, so a failure here does not replace the result of a test that ran
         try:
-            self.logger.info("Performing test run cleanup")
-            self.device.enable_network()
-            self.device.force_stop_app(self.config.app_package)
+            test_result["visual_diff"] = self.visual_diff.check(test_name, test_result, session.config.device_id)
         except Exception as e:
-            self.logger.error(f"Error during cleanup: {str(e)}")
\ No newline at end of file
+            self.logger.error(f"Visual diff failed for test case {test_name}: {str(e)}")
+            test_result["visual_diff"] = {"error": str(e)}
+
+    def _phase(self, name: str, task=None, **args) -> ContextManager:
+        return tracing.span(self.tracer, name, "phase", task, **args)
+
+    def _generate_report(self) -> None:
+        report_path = render_text_report(self.config.run_dir)
+        self.logger.info(f"Test report generated: {report_path}")
+
+    def _record_history(self) -> None:
+        if not self.config.history:
+            return
+        # The history database lives next to all run directories and is filled from this run's report.jsonl
+        history_path = os.path.join(os.path.dirname(self.config.run_dir), HISTORY_FILE)
+        try:
+            store = HistoryStore(history_path)
+            try:
+                store.record_run(self.config.run_dir)
+            finally:
+                store.close()
+            self.logger.info(f"Recorded run history in {history_path}")
+        except HistoryError as e:
+            self.logger.error(f"Failed to record run history: {str(e)}")
+
+    def _export_trace(self) -> None:
+        if self.tracer is None:
+            return
+        trace_path = os.path.join(self.config.run_dir, TRACE_FILE)
+        try:
+            self.tracer.export(trace_path)
+            self.tracer.write_summary(os.path.join(self.config.run_dir, TRACE_SUMMARY_FILE),
+                                      int(self.config.options_for("tracing").get("top", 10)))
+            self.logger.info(f"Trace written to {trace_path}")
+        except TracingError as e:
+            self.logger.error(f"Failed to export trace: {str(e)}")
+
+    def cleanup(self) -> None:
+        self.logger.info("Performing test run cleanup")
+        with self._phase("cleanup"):
+            for session in self.sessions:
+                session.analyzer.close()
+                if session.logcat is not None:
+                    session.logcat.stop()
+                try:
+                    session.device.restore_defaults(self.config.app_package)
+                except Exception as e:
+                    self.logger.error(f"Error during cleanup of device {session.config.device_id}: {str(e)}")
+            if self.artifact_store is not None:
+                self.artifact_store.close()
+        self.report.close()
+        self._export_trace()
\ No newline at end of file
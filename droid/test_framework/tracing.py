@@ -0,0 +1,125 @@
+import contextlib
+import heapq
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, ContextManager, Deque, Dict, List, Optional, Tuple
+
+TRACE_FILE = "trace.json"
+TRACE_SUMMARY_FILE = "trace_summary.txt"
+
+class TracingError(Exception):
+    pass
+
+# (name, category, track, start_ns, duration_ns, args)
+SpanRecord = Tuple[str, str, int, int, int, Dict[str, Any]]
+
+class Tracer:
+    # Spans are appended to a bounded in-memory buffer (deque appends are atomic, so no lock on the hot path)
+    # and only formatted when the trace is exported at the end of the run
+    def __init__(self, max_spans: int = 1_000_000) -> None:
+        self.origin = time.perf_counter_ns()
+        self.spans: Deque[SpanRecord] = deque(maxlen=max_spans)
+        self.tracks: Dict[int, str] = {}
+        # Guards tracks, which is only written the first time a thread or task records a span
+        self.lock = threading.Lock()
+
+    def _track(self, task: Any = None) -> int:
+        # Spans nest per thread, or per asyncio task for code running on an event loop
+        if task is None:
+            thread = threading.current_thread()
+            ident, name = thread.ident or 0, thread.name
+        else:
+            ident, name = id(task), task.get_name()
+        if ident not in self.tracks:
+            with self.lock:
+                self.tracks.setdefault(ident, name)
+        return ident
+
+    def span(self, name: str, category: str, task: Any = None, **args: Any) -> 'Span':
+        return Span(self, name, category, self._track(task), args)
+
+    def slowest(self, category: str = "adb", limit: int = 10) -> List[SpanRecord]:
+        return heapq.nlargest(limit, (span for span in self.spans if span[1] == category), key=lambda span: span[4])
+
+    def totals(self, category: str = "adb", limit: int = 10) -> List[Tuple[str, int, int, int]]:
+        # (name, count, total_ns, max_ns) for the names that took the most time overall
+        totals: Dict[str, List[int]] = {}
+        for name, span_category, _, _, duration, _ in self.spans:
+            if span_category == category:
+                entry = totals.setdefault(name, [0, 0, 0])
+                entry[0] += 1
+                entry[1] += duration
+                entry[2] = max(entry[2], duration)
+        return heapq.nlargest(limit, ((name, *entry) for name, entry in totals.items()), key=lambda entry: entry[2])
+
+    def export(self, path: str) -> None:
+        # Chrome trace-event format, viewable in chrome://tracing or Perfetto
+        pid = os.getpid()
+        with self.lock:
+            tracks = list(self.tracks.items())
+        events = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": track, "args": {"name": name}}
+            for track, name in tracks
+        ]
+        for name, category, track, start, duration, args in list(self.spans):
+            events.append({
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": (start - self.origin) / 1000,
+                "dur": duration / 1000,
+                "pid": pid,
+                "tid": track,
+                "args": args,
+            })
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, default=str)
+        except OSError as e:
+            raise TracingError(f"Failed to write trace {path}: {str(e)}")
+
+    def write_summary(self, path: str, limit: int = 10) -> None:
+        lines = [f"=== Slowest commands (top {limit}) ==="]
+        for name, _, _, _, duration, args in self.slowest("adb", limit):
+            device = f" [{args['device']}]" if "device" in args else ""
+            lines.append(f"{duration / 1e6:10.1f} ms  {name[:120]}{device}")
+        for category, title in (("adb", "Commands"), ("test", "Tests"), ("plugin", "Plugins"),
+                                ("phase", "Phases"), ("wait", "Waits")):
+            lines.append(f"\n=== {title} by total time (top {limit}) ===")
+            for name, count, total, longest in self.totals(category, limit):
+                lines.append(f"{total / 1e6:10.1f} ms  {count:5d} calls  max {longest / 1e6:.1f} ms  {name[:120]}")
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write("\n".join(lines) + "\n")
+        except OSError as e:
+            raise TracingError(f"Failed to write trace summary {path}: {str(e)}")
+
+class Span:
+    # A plain context manager rather than @contextmanager, which costs several times more per span
+    __slots__ = ("tracer", "name", "category", "track", "args", "start")
+
+    def __init__(self, tracer: Tracer, name: str, category: str, track: int, args: Dict[str, Any]) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.track = track
+        self.args = args
+        self.start = 0
+
+    def __enter__(self) -> Dict[str, Any]:
+        self.start = time.perf_counter_ns()
+        return self.args
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        duration = time.perf_counter_ns() - self.start
+        if exc_type is not None and "error" not in self.args:
+            self.args["error"] = exc_type.__name__
+        self.tracer.spans.append((self.name, self.category, self.track, self.start, duration, self.args))
+
+def span(tracer: Optional[Tracer], name: str, category: str, task: Any = None, **args: Any) -> ContextManager:
+    if tracer is None:
+        return contextlib.nullcontext(args)
+    return tracer.span(name, category, task, **args)
\ No newline at end of file
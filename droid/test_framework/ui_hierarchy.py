@@ -0,0 +1,238 @@
+import hashlib
+import re
+from xml.parsers import expat
+from typing import Dict, Iterator, List, Optional, Tuple
+
+class UiHierarchyError(Exception):
+    pass
+
+# Boolean attributes of a uiautomator node, packed into UiNode.flags in this order
+FLAG_NAMES = ("checkable", "checked", "clickable", "enabled", "focusable", "focused", "scrollable",
+              "long-clickable", "password", "selected")
+FLAG_BITS = tuple((name, 1 << bit) for bit, name in enumerate(FLAG_NAMES))
+COLUMNS = ("depth", "class", "resource-id", "text", "content-desc", "package", "bounds", "flags")
+BOUNDS_PATTERN = re.compile(r"\[(-?\d+),(-?\d+)\]\[(-?\d+),(-?\d+)\]")
+END_TAG = b"</hierarchy>"
+
+class UiNode:
+    # Nodes are stored in document order, so a node's subtree is the slice nodes[index:end]
+    __slots__ = ("index", "parent", "position", "depth", "class_name", "resource_id", "text", "content_desc",
+                 "package", "bounds", "flags", "children", "end", "digest")
+
+    def __init__(self, index: int, parent: int, position: int, depth: int, attrib: Dict[str, str]) -> None:
+        self.index = index
+        self.parent = parent
+        self.position = position
+        self.depth = depth
+        self.class_name = attrib.get("class", "")
+        self.resource_id = attrib.get("resource-id", "")
+        self.text = attrib.get("text", "")
+        self.content_desc = attrib.get("content-desc", "")
+        self.package = attrib.get("package", "")
+        match = BOUNDS_PATTERN.fullmatch(attrib.get("bounds", ""))
+        self.bounds = tuple(map(int, match.groups())) if match else (0, 0, 0, 0)
+        self.flags = sum(bit for name, bit in FLAG_BITS if attrib.get(name) == "true")
+        self.children: List[int] = []
+        self.end = index + 1
+        self.digest = b""
+
+    def flag(self, name: str) -> bool:
+        return bool(self.flags & (1 << FLAG_NAMES.index(name)))
+
+    @property
+    def center(self) -> Tuple[int, int]:
+        left, top, right, bottom = self.bounds
+        return (left + right) // 2, (top + bottom) // 2
+
+    def same_attributes(self, other: 'UiNode') -> bool:
+        return self.row()[1:] == other.row()[1:]
+
+    def row(self, depth: int = 0) -> list:
+        # One row of the table format in COLUMNS, with the depth relative to a subtree root
+        left, top, right, bottom = self.bounds
+        return [self.depth - depth, self.class_name, self.resource_id, self.text, self.content_desc, self.package,
+                f"[{left},{top}][{right},{bottom}]", self.flags]
+
+    def to_dict(self) -> dict:
+        return {
+            "class": self.class_name, "resource-id": self.resource_id, "text": self.text,
+            "content-desc": self.content_desc, "package": self.package, "bounds": list(self.bounds),
+            **{name: self.flag(name) for name in FLAG_NAMES},
+        }
+
+class UiHierarchy:
+    def __init__(self, nodes: List[UiNode], rotation: int = 0) -> None:
+        self.nodes = nodes
+        self.rotation = rotation
+        self.by_resource_id: Dict[str, List[int]] = {}
+        self.by_text: Dict[str, List[int]] = {}
+        self.by_class: Dict[str, List[int]] = {}
+        # Empty values are indexed too, so find(text="") matches nodes without text
+        for node in nodes:
+            for index, value in ((self.by_resource_id, node.resource_id), (self.by_text, node.text),
+                                 (self.by_class, node.class_name)):
+                index.setdefault(value, []).append(node.index)
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def __iter__(self) -> Iterator[UiNode]:
+        return iter(self.nodes)
+
+    @property
+    def roots(self) -> List[UiNode]:
+        return [node for node in self.nodes if node.parent < 0]
+
+    def find(self, resource_id: Optional[str] = None, text: Optional[str] = None,
+             class_name: Optional[str] = None) -> List[UiNode]:
+        # Exact matches on every given attribute; starts from the smallest index bucket and filters the rest
+        buckets = [index.get(value, []) for index, value in ((self.by_resource_id, resource_id),
+                                                            (self.by_text, text), (self.by_class, class_name))
+                   if value is not None]
+        if not buckets:
+            return list(self.nodes)
+        candidates = min(buckets, key=len)
+        return [
+            self.nodes[i] for i in candidates
+            if (resource_id is None or self.nodes[i].resource_id == resource_id)
+            and (text is None or self.nodes[i].text == text)
+            and (class_name is None or self.nodes[i].class_name == class_name)
+        ]
+
+    def find_one(self, resource_id: Optional[str] = None, text: Optional[str] = None,
+                 class_name: Optional[str] = None) -> Optional[UiNode]:
+        found = self.find(resource_id, text, class_name)
+        return found[0] if found else None
+
+    def exists(self, resource_id: Optional[str] = None, text: Optional[str] = None,
+               class_name: Optional[str] = None) -> bool:
+        return self.find_one(resource_id, text, class_name) is not None
+
+    def subtree(self, node: UiNode) -> List[UiNode]:
+        return self.nodes[node.index:node.end]
+
+    def path(self, node: UiNode) -> str:
+        # Child positions from the root, e.g. "0/2/1"; stable between dumps of the same layout
+        positions = [node.position]
+        while node.parent >= 0:
+            node = self.nodes[node.parent]
+            positions.append(node.position)
+        return "/".join(str(position) for position in reversed(positions))
+
+    def to_table(self, root: Optional[UiNode] = None) -> List[list]:
+        if root is None:
+            return [node.row() for node in self.nodes]
+        return [node.row(root.depth) for node in self.subtree(root)]
+
+    def diff(self, previous: 'UiHierarchy') -> dict:
+        # Subtrees whose hash matches the previous dump are skipped. A node that keeps its class and
+        # resource-id is compared child by child; anything else is stored as a whole replaced subtree.
+        # Paths of replaced and updated nodes refer to this dump, paths of removed nodes to the previous one.
+        changes: dict = {"replaced": [], "updated": [], "removed": []}
+        self._diff_children(previous, [node.index for node in previous.roots],
+                            [node.index for node in self.roots], changes)
+        return changes
+
+    def _diff_children(self, previous: 'UiHierarchy', old_children: List[int], new_children: List[int],
+                       changes: dict) -> None:
+        unmatched: Dict[bytes, List[int]] = {}
+        for i in old_children:
+            unmatched.setdefault(previous.nodes[i].digest, []).append(i)
+        added = []
+        for i in new_children:
+            same = unmatched.get(self.nodes[i].digest)
+            if same:
+                same.pop(0)
+            else:
+                added.append(i)
+        left_over = {i for indexes in unmatched.values() for i in indexes}
+        removed = [i for i in old_children if i in left_over]
+        for i in added:
+            node = self.nodes[i]
+            counterpart = next((j for j in removed if previous.nodes[j].class_name == node.class_name
+                                and previous.nodes[j].resource_id == node.resource_id), None)
+            if counterpart is None:
+                changes["replaced"].append({"path": self.path(node), "nodes": self.to_table(node)})
+                continue
+            removed.remove(counterpart)
+            old = previous.nodes[counterpart]
+            if not node.same_attributes(old):
+                changes["updated"].append({"path": self.path(node), "node": node.row(node.depth)})
+            self._diff_children(previous, old.children, node.children, changes)
+        changes["removed"].extend(previous.path(previous.nodes[i]) for i in removed)
+
+class UiHierarchyParser:
+    # Incremental parser for `uiautomator dump` output. Feed it chunks as they arrive (it can also be
+    # passed as the stream of DeviceController.exec_out). Expat callbacks fill the node table directly,
+    # so no element tree is ever built.
+    def __init__(self) -> None:
+        self.parser = expat.ParserCreate()
+        self.parser.buffer_text = True
+        self.parser.StartElementHandler = self._start
+        self.parser.EndElementHandler = self._end
+        self.nodes: List[UiNode] = []
+        self.stack: List[UiNode] = []
+        self.rotation = 0
+        self.root_count = 0
+        self.finished = False
+        self.tail = b""
+        self.head = b""
+
+    def write(self, data: bytes) -> int:
+        self.feed(data)
+        return len(data)
+
+    def feed(self, data: bytes) -> None:
+        if self.finished:
+            return
+        if len(self.head) < 200:
+            self.head += data[:200 - len(self.head)]
+        # uiautomator prints a status line after the document, and a chunk may end inside the closing tag
+        data = self.tail + data
+        end = data.find(END_TAG)
+        if end >= 0:
+            data, self.tail = data[:end + len(END_TAG)], b""
+            self.finished = True
+        else:
+            split = max(len(data) - len(END_TAG) + 1, 0)
+            data, self.tail = data[:split], data[split:]
+        try:
+            self.parser.Parse(data, self.finished)
+        except expat.ExpatError as e:
+            raise UiHierarchyError(f"Invalid UI hierarchy dump: {str(e)}")
+
+    def close(self) -> UiHierarchy:
+        if not self.finished:
+            message = self.head.decode(errors="replace").strip()
+            raise UiHierarchyError(f"Incomplete UI hierarchy dump: {message or 'no output'}")
+        return UiHierarchy(self.nodes, self.rotation)
+
+    def _start(self, tag: str, attrib: Dict[str, str]) -> None:
+        if tag == "node":
+            parent = self.stack[-1] if self.stack else None
+            position = len(parent.children) if parent else self.root_count
+            node = UiNode(len(self.nodes), parent.index if parent else -1, position, len(self.stack), attrib)
+            if parent is not None:
+                parent.children.append(node.index)
+            else:
+                self.root_count += 1
+            self.nodes.append(node)
+            self.stack.append(node)
+        elif tag == "hierarchy":
+            self.rotation = int(attrib.get("rotation", 0))
+
+    def _end(self, tag: str) -> None:
+        if tag != "node":
+            return
+        node = self.stack.pop()
+        node.end = len(self.nodes)
+        digest = hashlib.blake2b(repr(node.row()[1:]).encode(), digest_size=8)
+        for child in node.children:
+            digest.update(self.nodes[child].digest)
+        node.digest = digest.digest()
+
+def parse_ui_hierarchy(data: bytes, chunk_size: int = 65536) -> UiHierarchy:
+    parser = UiHierarchyParser()
+    for offset in range(0, len(data), chunk_size):
+        parser.feed(data[offset:offset + chunk_size])
+    return parser.close()
\ No newline at end of file
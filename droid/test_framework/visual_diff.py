@@ -0,0 +1,218 @@
+import bisect
+import functools
+import json
+import logging
+import os
+import threading
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from droid.types import Configuration
+
+INDEX_FILE = "visual_index.jsonl"
+HASH_SIZE = 8
+HASH_ALGORITHMS = ("dhash", "phash")
+
+class VisualDiffError(Exception):
+    pass
+
+def _numpy() -> Any:
+    # numpy is only needed when visual diffing is enabled
+    try:
+        import numpy
+    except ImportError:
+        raise VisualDiffError("Visual diffing requires numpy (pip install numpy)")
+    return numpy
+
+def _pillow() -> Any:
+    try:
+        from PIL import Image
+    except ImportError:
+        raise VisualDiffError("Visual diffing requires Pillow (pip install Pillow)")
+    return Image
+
+def load_grayscale(path: str) -> Any:
+    np = _numpy()
+    with _pillow().open(path) as image:
+        return np.asarray(image.convert("L"), dtype=np.float32)
+
+def _area_resize(np: Any, image: Any, rows: int, cols: int) -> Any:
+    height, width = image.shape
+    if height < rows or width < cols:
+        raise VisualDiffError(f"Image of {width}x{height} is too small to hash")
+    row_edges = (np.arange(rows) * height) // rows
+    col_edges = (np.arange(cols) * width) // cols
+    sums = np.add.reduceat(np.add.reduceat(image, row_edges, axis=0), col_edges, axis=1)
+    counts = np.outer(np.diff(np.append(row_edges, height)), np.diff(np.append(col_edges, width)))
+    return sums / counts
+
+def _pack_bits(np: Any, bits: Any) -> int:
+    return int.from_bytes(np.packbits(bits.reshape(-1)).tobytes(), "big")
+
+@functools.lru_cache(maxsize=None)
+def _dct_matrix(size: int) -> Any:
+    np = _numpy()
+    n = np.arange(size)
+    return np.cos(np.pi * (2 * n[None, :] + 1) * n[:, None] / (2 * size))
+
+def dhash(image: Any) -> int:
+    np = _numpy()
+    small = _area_resize(np, image, HASH_SIZE, HASH_SIZE + 1)
+    return _pack_bits(np, small[:, 1:] > small[:, :-1])
+
+def phash(image: Any) -> int:
+    np = _numpy()
+    size = HASH_SIZE * 4
+    basis = _dct_matrix(size)
+    coefficients = (basis @ _area_resize(np, image, size, size) @ basis.T)[:HASH_SIZE, :HASH_SIZE]
+    # The DC term only reflects overall brightness, so it is left out of the median
+    return _pack_bits(np, coefficients > np.median(coefficients.reshape(-1)[1:]))
+
+def hamming(first: int, second: int) -> int:
+    return (first ^ second).bit_count()
+
+@functools.lru_cache(maxsize=None)
+def _popcount_table() -> Any:
+    np = _numpy()
+    return np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+def hamming_distances(hashes: Any, value: int) -> Any:
+    np = _numpy()
+    differing = hashes ^ np.uint64(value)
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(differing)
+    # numpy before 2.0 has no popcount ufunc
+    return _popcount_table()[differing.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+@dataclass
+class VisualEntry:
+    key: str
+    run_id: str
+    device: str
+    path: str
+    dhash: int
+    phash: int
+
+class VisualIndex:
+    # Append-only JSON Lines file shared by all runs, loaded once so lookups never reopen images
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+        self.entries: Dict[str, List[VisualEntry]] = {}
+        # Per key: entries grouped by run, and the sorted run ids, so baselines are found by bisection
+        self.runs: Dict[str, Dict[str, List[VisualEntry]]] = {}
+        self.run_ids: Dict[str, List[str]] = {}
+        self.arrays: Dict[Tuple[str, str], Tuple[List[VisualEntry], Any]] = {}
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.isfile(self.path):
+            return
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    record['dhash'] = int(record['dhash'], 16)
+                    record['phash'] = int(record['phash'], 16)
+                    self._insert(VisualEntry(**record))
+                except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+                    continue
+        self.logger.info(f"Loaded {sum(len(entries) for entries in self.entries.values())} visual hashes from {self.path}")
+
+    def _insert(self, entry: VisualEntry) -> None:
+        self.entries.setdefault(entry.key, []).append(entry)
+        runs = self.runs.setdefault(entry.key, {})
+        if entry.run_id not in runs:
+            runs[entry.run_id] = []
+            bisect.insort(self.run_ids.setdefault(entry.key, []), entry.run_id)
+        runs[entry.run_id].append(entry)
+        for algorithm in HASH_ALGORITHMS:
+            self.arrays.pop((entry.key, algorithm), None)
+
+    def add(self, entry: VisualEntry) -> None:
+        record = asdict(entry)
+        record['dhash'] = f"{entry.dhash:016x}"
+        record['phash'] = f"{entry.phash:016x}"
+        with self.lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + "\n")
+            self._insert(entry)
+
+    def baseline(self, key: str, run_id: str, device: Optional[str] = None,
+                 baseline_run: Optional[str] = None) -> Optional[VisualEntry]:
+        with self.lock:
+            if not baseline_run:
+                # Run ids are timestamps, so the latest earlier run sorts just before this one
+                run_ids = self.run_ids.get(key, [])
+                position = bisect.bisect_left(run_ids, run_id)
+                baseline_run = run_ids[position - 1] if position else None
+            entries = list(self.runs.get(key, {}).get(baseline_run, ()))
+        if not entries:
+            return None
+        same_device = [entry for entry in entries if entry.device == device]
+        return (same_device or entries)[-1]
+
+    def search(self, key: str, value: int, max_distance: int, algorithm: str = "dhash") -> List[Tuple[int, VisualEntry]]:
+        # Vectorized Hamming distance against every stored hash for the key
+        np = _numpy()
+        with self.lock:
+            cached = self.arrays.get((key, algorithm))
+            if cached is None:
+                entries = list(self.entries.get(key, ()))
+                hashes = np.array([getattr(entry, algorithm) for entry in entries], dtype=np.uint64)
+                cached = self.arrays[(key, algorithm)] = (entries, hashes)
+        entries, hashes = cached
+        distances = hamming_distances(hashes, value)
+        return [(int(distances[i]), entries[i]) for i in np.flatnonzero(distances <= max_distance)]
+
+def find_images(prefix: str, result: dict) -> Iterator[Tuple[str, str]]:
+    for name, value in result.items():
+        key = f"{prefix}/{name}"
+        if isinstance(value, str) and value.lower().endswith(".png") and os.path.isfile(value):
+            yield key, value
+        elif isinstance(value, dict):
+            yield from find_images(key, value)
+
+class VisualDiff:
+    def __init__(self, config: Configuration, index: VisualIndex) -> None:
+        _numpy()
+        _pillow()
+        self.config = config
+        self.index = index
+        self.logger = logging.getLogger(__name__)
+        options = config.options_for("visual_diff")
+        self.threshold = int(options.get("threshold", 10))
+        self.algorithm = options.get("hash", "dhash")
+        if self.algorithm not in HASH_ALGORITHMS:
+            raise VisualDiffError(f"hash must be one of {', '.join(HASH_ALGORITHMS)}, got '{self.algorithm}'")
+        # Quoted in YAML like startup_test's baseline_run, unquoted run ids parse as integers
+        self.baseline_run = str(options["baseline_run"]) if options.get("baseline_run") else None
+
+    def check(self, test_name: str, result: dict, device_id: str) -> dict:
+        report = {}
+        # Screens are keyed by test, phase and plugin path, e.g. NetworkTest/offline/ScreenShotPlugin/screenshot
+        for key, path in find_images(test_name, result):
+            try:
+                image = load_grayscale(path)
+                entry = VisualEntry(key, self.config.run_id, device_id, path, dhash(image), phash(image))
+            except (VisualDiffError, OSError, ValueError) as e:
+                self.logger.error(f"Failed to hash {path}: {str(e)}")
+                report[key] = {"error": str(e)}
+                continue
+            baseline = self.index.baseline(key, self.config.run_id, device_id, self.baseline_run)
+            self.index.add(entry)
+            if baseline is None:
+                report[key] = {"baseline": None}
+                continue
+            distance = hamming(getattr(entry, self.algorithm), getattr(baseline, self.algorithm))
+            changed = distance > self.threshold
+            if changed:
+                self.logger.warning(f"Visual change in {key}: distance {distance} from run {baseline.run_id}")
+            report[key] = {
+                "baseline": baseline.path,
+                "baseline_run": baseline.run_id,
+                "distance": distance,
+                "changed": changed,
+            }
+        return report
\ No newline at end of file
@@ -1,26 +1,84 @@
 # In droid/types.py
 
 from dataclasses import dataclass, field
-from typing import List, Dict
+from typing import Any, List, Dict, Tuple
+import copy
 import datetime
 import os
+import re
 
 @dataclass
 class Configuration:
-    device_id: str
-    app_package: str
-    app_activity: str
+    device_id: str = ""
+    app_package: str = ""
+    app_activity: str = ""
     plugins: List[str] = field(default_factory=list)
     test_cases: List[str] = field(default_factory=list)
     run_id: str = field(init=False)
     run_dir: str = field(init=False)
     start_time: datetime.datetime = field(init=False)
     metadata: Dict[str, str] = field(default_factory=dict)
+    connection_mode: str = "subprocess"
+    adb_host: str = "127.0.0.1"
+    adb_port: int = 5037
+    devices: List[str] = field(default_factory=list)
+    pool_mode: str = "distribute"
+    plugin_timeout: float = 60.0
+    options: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    logcat: bool = True
+    visual_diff: bool = False
+    history: bool = True
+    artifact_store: bool = False
+    tracing: bool = False
+    state_ttl: float = 2.0
+    liveness_window: float = 2.0
+    resume: str = ""
+    shard: str = ""
 
     def __post_init__(self):
         self.start_time = datetime.datetime.now()
-        self.run_id = self.start_time.strftime("%Y%m%d_%H%M%S")
+        shard_index, shard_count = self.shard_spec
+        if self.resume:
+            self.run_id = str(self.resume)
+        else:
+            self.run_id = self.start_time.strftime("%Y%m%d_%H%M%S")
+            if shard_count > 1:
+                self.run_id += f"_shard{shard_index}of{shard_count}"
         self.run_dir = os.path.join("test_results", self.run_id)
+        if self.resume and not os.path.isdir(self.run_dir):
+            raise ValueError(f"Cannot resume run {self.run_id}: {self.run_dir} does not exist")
+        if not self.device_id and self.devices:
+            self.device_id = self.devices[0]
         if not self.device_id or not self.app_package or not self.app_activity:
             raise ValueError("device_id, app_package, and app_activity are required fields")
-        os.makedirs(self.run_dir, exist_ok=True)
\ No newline at end of file
+        if self.connection_mode not in ("subprocess", "socket"):
+            raise ValueError(f"connection_mode must be 'subprocess' or 'socket', got '{self.connection_mode}'")
+        if self.pool_mode not in ("distribute", "replicate"):
+            raise ValueError(f"pool_mode must be 'distribute' or 'replicate', got '{self.pool_mode}'")
+        os.makedirs(self.run_dir, exist_ok=True)
+
+    @property
+    def shard_spec(self) -> Tuple[int, int]:
+        # "i/N" with 1 <= i <= N; an unsharded run is shard 1 of 1
+        if not self.shard:
+            return 1, 1
+        match = re.fullmatch(r"(\d+)/(\d+)", str(self.shard).strip())
+        if not match or not 1 <= int(match.group(1)) <= int(match.group(2)):
+            raise ValueError(f"shard must look like 'i/N' with 1 <= i <= N, got '{self.shard}'")
+        return int(match.group(1)), int(match.group(2))
+
+    def options_for(self, module: str) -> Dict[str, Any]:
+        # Per-component options are keyed by the last part of the component's module name, which is the
+        # name used in the plugins/test_cases lists, e.g. "droid.test_cases.startup_test" -> "startup_test"
+        return self.options.get(module.rsplit('.', 1)[-1], {})
+
+    def device_ids(self) -> List[str]:
+        return list(self.devices) if self.devices else [self.device_id]
+
+    def for_device(self, device_id: str) -> 'Configuration':
+        device_config = copy.copy(self)
+        device_config.device_id = device_id
+        device_config.devices = [device_id]
+        device_config.run_dir = os.path.join(self.run_dir, re.sub(r"[^\w.-]", "_", device_id))
+        os.makedirs(device_config.run_dir, exist_ok=True)
+        return device_config
\ No newline at end of file
@@ -0,0 +1,63 @@
+import argparse
+import json
+import os
+import sqlite3
+import sys
+from typing import List
+from droid.test_framework.history import HISTORY_FILE, HistoryError, HistoryStore
+from droid.test_framework.report import REPORT_FILE
+
+def _print_rows(rows: List[sqlite3.Row]) -> None:
+    for row in rows:
+        print(json.dumps(dict(row)))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Query the test run history")
+    parser.add_argument("--db", default=os.path.join("test_results", HISTORY_FILE), help="Path to the history database")
+    filters = argparse.ArgumentParser(add_help=False)
+    filters.add_argument("--limit", type=int, default=50, help="Maximum number of rows")
+    filters.add_argument("--device", help="Only rows for this device")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("runs", parents=[filters], help="List recent runs")
+    trend = commands.add_parser("trend", parents=[filters], help="Metric values over recent runs, e.g. StartupTest cold/total_time/p90")
+    trend.add_argument("test")
+    trend.add_argument("metric", nargs="?", help="Metric path; lists the available metrics when omitted")
+    tests = commands.add_parser("tests", parents=[filters], help="Status and duration of a test over recent runs")
+    tests.add_argument("test")
+    plugins = commands.add_parser("plugins", parents=[filters], help="Timings of a plugin over recent runs")
+    plugins.add_argument("plugin")
+    artifacts = commands.add_parser("artifacts", help="Artifacts recorded for a run")
+    artifacts.add_argument("run_id")
+    backfill = commands.add_parser("import", help="Record existing run directories")
+    backfill.add_argument("run_dirs", nargs="*", help="Run directories; defaults to every run under test_results")
+    args = parser.parse_args()
+
+    try:
+        store = HistoryStore(args.db)
+        if args.command == "runs":
+            _print_rows(store.runs(args.limit, args.device))
+        elif args.command == "trend" and args.metric is None:
+            print("\n".join(store.metric_names(args.test)))
+        elif args.command == "trend":
+            _print_rows(store.metric_trend(args.test, args.metric, args.device, args.limit))
+        elif args.command == "tests":
+            _print_rows(store.test_history(args.test, args.device, args.limit))
+        elif args.command == "plugins":
+            _print_rows(store.plugin_timings(args.plugin, args.device, args.limit))
+        elif args.command == "artifacts":
+            _print_rows(store.artifacts(args.run_id))
+        elif args.command == "import":
+            root = os.path.dirname(args.db) or "."
+            run_dirs = args.run_dirs or sorted(
+                entry.path for entry in os.scandir(root)
+                if entry.is_dir() and os.path.isfile(os.path.join(entry.path, REPORT_FILE))
+            )
+            for run_dir in run_dirs:
+                print(f"Recorded run {store.record_run(run_dir)}")
+        store.close()
+    except HistoryError as e:
+        print(f"Error: {str(e)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
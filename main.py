@@ -1,14 +1,16 @@
 import argparse
 import yaml
 import sys
-from typing import Any
+from typing import Any, Dict, Optional
 from droid.test_framework.test_runner import TestRunner, TestRunnerError
+from droid.test_framework.async_test_runner import AsyncTestRunner
 from droid.types import Configuration
 
-def load_config(config_file: str) -> Configuration:
+def load_config(config_file: str, overrides: Optional[Dict[str, Any]] = None) -> Configuration:
     try:
         with open(config_file, 'r') as f:
             config_dict = yaml.safe_load(f)
+        config_dict.update({key: value for key, value in (overrides or {}).items() if value is not None})
         return Configuration(**config_dict)
     except FileNotFoundError:
         print(f"Error: Configuration file '{config_file}' not found.")
@@ -19,6 +21,9 @@ def load_config(config_file: str) -> Configuration:
     except TypeError as e:
         print(f"Error: Invalid configuration structure: {e}")
         sys.exit(1)
+    except ValueError as e:
+        print(f"Error: Invalid configuration: {e}")
+        sys.exit(1)
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Android App Network Behavior Test")
@@ -26,10 +31,15 @@ def main() -> None:
     parser.add_argument("--verbose", action="store_true", help="Increase output verbosity")
     parser.add_argument("--test-cases", nargs='+', help="Specify additional test cases to run")
     parser.add_argument("--plugins", nargs='+', help="Specify additional plugins to use")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Drive all devices from one asyncio event loop")
+    parser.add_argument("--resume", metavar="RUN_ID",
+                        help="Continue an interrupted run, skipping the tests it already completed")
+    parser.add_argument("--shard", metavar="I/N", help="Run only shard I of N of the configured test cases")
     args: Any = parser.parse_args()
 
     try:
-        config = load_config(args.config)
+        config = load_config(args.config, {"resume": args.resume, "shard": args.shard})
         
         # Add command-line specified test cases and plugins
         if args.test_cases:
@@ -37,7 +47,8 @@ def main() -> None:
         if args.plugins:
             config.plugins.extend(args.plugins)
         
-        runner = TestRunner(config, verbose=args.verbose)
+        runner_class = AsyncTestRunner if args.use_async else TestRunner
+        runner = runner_class(config, verbose=args.verbose)
         runner.run()
     except TestRunnerError as e:
         print(f"TestRunner error: {str(e)}")
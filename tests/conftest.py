@@ -0,0 +1,75 @@
+import socketserver
+import struct
+import threading
+from typing import Callable, Dict, List
+
+import pytest
+
+from benchmarks.fake_adb import FakeAdb
+
+# The framework package has to be imported before droid.plugins / droid.test_cases
+import droid.test_framework  # noqa: F401
+
+def shell_v2_packet(packet_id: int, payload: bytes) -> bytes:
+    return struct.pack("<BI", packet_id, len(payload)) + payload
+
+class ScriptedAdbServer(socketserver.ThreadingTCPServer):
+    # Speaks just enough of the adb server protocol for AdbSocketConnection: a host:transport request,
+    # then one service request answered by the handler registered for its prefix ("shell,v2,raw:", "exec:", ...)
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), ScriptedAdbHandler)
+        self.services: Dict[str, Callable] = {}
+        self.requests: List[str] = []
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+class ScriptedAdbHandler(socketserver.BaseRequestHandler):
+    server: ScriptedAdbServer
+
+    def handle(self) -> None:
+        transport = self._read_request()
+        self.server.requests.append(transport)
+        self.request.sendall(b"OKAY")
+        service = self._read_request()
+        self.server.requests.append(service)
+        for prefix, handler in self.server.services.items():
+            if service.startswith(prefix):
+                self.request.sendall(b"OKAY")
+                handler(self.request, service[len(prefix):])
+                return
+        message = b"closed"
+        self.request.sendall(b"FAIL" + f"{len(message):04x}".encode() + message)
+
+    def _read_request(self) -> str:
+        length = int(self._recv(4), 16)
+        return self._recv(length).decode()
+
+    def _recv(self, size: int) -> bytes:
+        data = b""
+        while len(data) < size:
+            chunk = self.request.recv(size - len(data))
+            if not chunk:
+                raise EOFError
+            data += chunk
+        return data
+
+@pytest.fixture
+def adb_server():
+    server = ScriptedAdbServer()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def fake_adb(tmp_path, monkeypatch):
+    # A fake adb binary and server answering from canned responses; run directories go under tmp_path
+    monkeypatch.chdir(tmp_path)
+    with FakeAdb(server=True) as fake:
+        yield fake
\ No newline at end of file
@@ -0,0 +1,65 @@
+import io
+
+import pytest
+
+from droid.test_framework.adb_connection import (LEGACY_EXIT_MARKER, SHELL_V2_EXIT, SHELL_V2_STDERR,
+                                                 SHELL_V2_STDOUT, AdbConnectionError, AdbSocketConnection)
+from tests.conftest import shell_v2_packet
+
+def connect(server) -> AdbSocketConnection:
+    return AdbSocketConnection("emulator-5554", port=server.port, timeout=5)
+
+def test_shell_v2_separates_streams_and_exit_code(adb_server):
+    def shell_v2(sock, command):
+        assert command == "ls /missing"
+        data = (shell_v2_packet(SHELL_V2_STDOUT, b"out 1\n") + shell_v2_packet(SHELL_V2_STDERR, b"no such file\n")
+                + shell_v2_packet(SHELL_V2_STDOUT, b"out 2\n") + shell_v2_packet(SHELL_V2_EXIT, bytes([2])))
+        # Split packets across writes, including inside a header
+        for offset in range(0, len(data), 3):
+            sock.sendall(data[offset:offset + 3])
+    adb_server.services["shell,v2,raw:"] = shell_v2
+    connection = connect(adb_server)
+
+    assert connection.shell("ls /missing") == (2, "out 1\nout 2\n", "no such file\n")
+    assert connection.shell_v2 is True
+    assert adb_server.requests[0] == "host:transport:emulator-5554"
+
+def test_shell_v2_without_exit_packet_fails(adb_server):
+    adb_server.services["shell,v2,raw:"] = lambda sock, command: sock.sendall(shell_v2_packet(SHELL_V2_STDOUT, b"x"))
+
+    with pytest.raises(AdbConnectionError):
+        connect(adb_server).shell("true")
+
+def test_legacy_shell_fallback_reads_exit_marker(adb_server):
+    def legacy(sock, command):
+        assert command == f"getprop ro.product.model; echo {LEGACY_EXIT_MARKER}$?"
+        sock.sendall(f"Pixel 7\r\n{LEGACY_EXIT_MARKER}0\r\n".encode())
+    adb_server.services["shell:"] = legacy
+    connection = connect(adb_server)
+
+    assert connection.shell("getprop ro.product.model") == (0, "Pixel 7\n", "")
+    assert connection.shell_v2 is False
+    # Once shell v2 is known to be unsupported it is not asked for again
+    connection.shell("getprop ro.product.model")
+    assert sum(request.startswith("shell,v2,raw:") for request in adb_server.requests) == 1
+
+def test_legacy_shell_without_marker_fails(adb_server):
+    adb_server.services["shell:"] = lambda sock, command: sock.sendall(b"killed\r\n")
+
+    with pytest.raises(AdbConnectionError):
+        connect(adb_server).shell("true")
+
+def test_exec_out_returns_and_streams_binary_output(adb_server):
+    payload = bytes(range(256)) * 1024
+    adb_server.services["exec:"] = lambda sock, command: sock.sendall(payload)
+    connection = connect(adb_server)
+
+    assert connection.exec_out("screencap -p") == payload
+    stream = io.BytesIO()
+    assert connection.exec_out("screencap -p", stream) == b""
+    assert stream.getvalue() == payload
+    assert adb_server.requests[-1] == "exec:screencap -p"
+
+def test_unreachable_server_raises():
+    with pytest.raises(AdbConnectionError):
+        AdbSocketConnection("emulator-5554", port=1, timeout=1).shell("true")
\ No newline at end of file
@@ -0,0 +1,99 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from droid.plugins import BasePlugin
+from droid.test_framework.app_analyzer import AppAnalyzer
+
+class StubDevice:
+    device_id = "emulator-5554"
+    config = SimpleNamespace(plugin_timeout=0.2, options={})
+
+    def wait_for_device(self) -> None:
+        pass
+
+class HangingPlugin(BasePlugin):
+    concurrency_safe = True
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.release = threading.Event()
+        self.calls = 0
+
+    def run(self, device) -> dict:
+        self.calls += 1
+        self.release.wait(5)
+        return {"calls": self.calls}
+
+class QuickPlugin(BasePlugin):
+    concurrency_safe = True
+
+    def run(self, device) -> dict:
+        return {"ok": True}
+
+def test_timed_out_plugin_is_not_resubmitted_while_running():
+    hanging, quick = HangingPlugin(), QuickPlugin()
+    analyzer = AppAnalyzer(StubDevice(), [hanging, quick])
+    try:
+        first = analyzer.analyze_behavior()
+        assert "Timed out" in first["HangingPlugin"]["error"]
+        assert first["QuickPlugin"] == {"ok": True}
+
+        start = time.monotonic()
+        second = analyzer.analyze_behavior()
+        # Skipped right away instead of queueing behind the hung run and timing out again
+        assert time.monotonic() - start < 0.15
+        assert "still running" in second["HangingPlugin"]["error"]
+        assert second["QuickPlugin"] == {"ok": True}
+        assert hanging.calls == 1
+
+        hanging.release.set()
+        analyzer.running[0].result(1)
+        assert analyzer.analyze_behavior()["HangingPlugin"] == {"calls": 2}
+    finally:
+        hanging.release.set()
+        analyzer.close()
+
+class RecordingReport:
+    def __init__(self) -> None:
+        self.records = []
+
+    def plugin_completed(self, test_name, device_id, plugin_name, duration, result) -> None:
+        self.records.append((plugin_name, result))
+
+def test_timed_out_plugin_is_recorded_once():
+    hanging, quick = HangingPlugin(), QuickPlugin()
+    analyzer = AppAnalyzer(StubDevice(), [hanging, quick])
+    analyzer.report = RecordingReport()
+    try:
+        analyzer.analyze_behavior()
+        hanging.release.set()
+        analyzer.running[0].result(1)
+        # The late return of the timed out run writes no second record
+        records = dict(analyzer.report.records)
+        assert len(analyzer.report.records) == 2
+        assert "Timed out" in records["HangingPlugin"]["error"]
+        assert records["QuickPlugin"] == {"ok": True}
+    finally:
+        hanging.release.set()
+        analyzer.close()
+
+class SlowSequentialPlugin(BasePlugin):
+    def run(self, device) -> dict:
+        time.sleep(0.3)
+        return {"ok": True}
+
+class SlowConcurrentPlugin(SlowSequentialPlugin):
+    concurrency_safe = True
+
+    def run(self, device) -> dict:
+        time.sleep(0.35)
+        return {"ok": True}
+
+def test_sequential_plugins_do_not_use_up_concurrent_timeouts():
+    # The concurrent plugin finishes after its 0.2s timeout only because the sequential one runs first
+    analyzer = AppAnalyzer(StubDevice(), [SlowConcurrentPlugin(), SlowSequentialPlugin()])
+    try:
+        assert analyzer._run_plugins() == {"SlowConcurrentPlugin": {"ok": True}, "SlowSequentialPlugin": {"ok": True}}
+    finally:
+        analyzer.close()
\ No newline at end of file
@@ -0,0 +1,79 @@
+import gzip
+import os
+import threading
+
+from droid.test_framework.artifact_store import ArtifactStore, file_digest, open_artifact, read_manifest
+
+def write(path, data: bytes) -> str:
+    with open(path, 'wb') as f:
+        f.write(data)
+    return str(path)
+
+def test_identical_artifacts_are_stored_once(tmp_path):
+    store = ArtifactStore(str(tmp_path / "artifacts"), compress_threshold=1 << 20)
+    first = store.add(write(tmp_path / "a.txt", b"same"), str(tmp_path), "FirstTest", "log")
+    second = store.add(write(tmp_path / "b.txt", b"same"), str(tmp_path), "SecondTest", "log")
+    store.close()
+
+    assert first == second == store.object_path(file_digest(first), ".txt")
+    assert not os.path.exists(tmp_path / "a.txt") and not os.path.exists(tmp_path / "b.txt")
+    assert [(record["test"], record["name"], record["path"]) for record in read_manifest(str(tmp_path))] == [
+        ("FirstTest", "a.txt", first), ("SecondTest", "b.txt", first)]
+
+def test_only_large_uncompressed_formats_are_gzipped(tmp_path):
+    store = ArtifactStore(str(tmp_path / "artifacts"), compress_threshold=1024)
+    small = store.add(write(tmp_path / "small.txt", b"x" * 1023), str(tmp_path), "Test", "small")
+    large = store.add(write(tmp_path / "large.txt", b"y" * 1024), str(tmp_path), "Test", "large")
+    image = store.add(write(tmp_path / "large.png", b"z" * 4096), str(tmp_path), "Test", "image")
+    store.close()
+
+    assert not small.endswith(".gz") and not image.endswith(".gz")
+    assert large.endswith(".txt.gz")
+    with open_artifact(large) as f:
+        assert f.read() == b"y" * 1024
+    assert not os.path.exists(large[:-len(".gz")])
+
+def test_gz_path_is_returned_before_flush_and_exists_after(tmp_path):
+    store = ArtifactStore(str(tmp_path / "artifacts"), compress_threshold=1)
+    release = threading.Event()
+    compress = store._compress
+
+    def blocked_compress(digest, stored):
+        release.wait(5)
+        compress(digest, stored)
+
+    store._compress = blocked_compress
+    path = store.add(write(tmp_path / "trace.json", b"{}" * 100), str(tmp_path), "Test", "trace")
+
+    # Compression is still running, so only the uncompressed object exists
+    assert path.endswith(".json.gz") and not os.path.exists(path)
+    assert store.resolve(file_digest(path[:-len(".gz")]), ".json") == path[:-len(".gz")]
+    release.set()
+    store.flush()
+    assert os.path.exists(path)
+    with gzip.open(path) as f:
+        assert f.read() == b"{}" * 100
+    store.close()
+
+def test_concurrent_adds_during_compression_all_resolve_to_the_gz_object(tmp_path):
+    store = ArtifactStore(str(tmp_path / "artifacts"), compress_threshold=1, workers=4)
+    data = os.urandom(1 << 16)
+    results = []
+
+    def add(index: int) -> None:
+        for attempt in range(20):
+            name = tmp_path / f"log_{index}_{attempt}.txt"
+            results.append(store.add(write(name, data), str(tmp_path), "Test", name.name))
+
+    threads = [threading.Thread(target=add, args=(index,)) for index in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    store.close()
+
+    assert len(set(results)) == 1 and results[0].endswith(".txt.gz")
+    with open_artifact(results[0]) as f:
+        assert f.read() == data
+    assert not os.path.exists(results[0][:-len(".gz")])
+    assert sorted(os.listdir(os.path.dirname(results[0]))) == [os.path.basename(results[0])]
\ No newline at end of file
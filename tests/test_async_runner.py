@@ -0,0 +1,77 @@
+import asyncio
+
+from droid.plugins import AsyncBasePlugin, BasePlugin
+from droid.test_cases import AsyncBaseTest, BaseTest
+from droid.test_framework.async_device_controller import AsyncDeviceController
+from droid.test_framework.async_test_runner import AsyncTestRunner
+from droid.test_framework.report import load_run
+from droid.types import Configuration
+
+class ActivityPlugin(AsyncBasePlugin):
+    concurrency_safe = True
+
+    async def run(self, device) -> dict:
+        return {"activity": await device.get_current_activity()}
+
+class ModelPlugin(BasePlugin):
+    concurrency_safe = True
+
+    def run(self, device) -> dict:
+        return {"model": device.get_device_properties()["model"]}
+
+class AsyncLaunchTest(AsyncBaseTest):
+    async def run(self, device, analyzer) -> dict:
+        timings = await device.launch_app("com.example.app", "com.example.app.MainActivity", wait=True)
+        return {"timings": timings, "analysis": await analyzer.analyze_behavior()}
+
+class SyncLaunchTest(BaseTest):
+    def run(self, device, analyzer) -> dict:
+        device.launch_app("com.example.app", "com.example.app.MainActivity")
+        return {"analysis": analyzer.analyze_behavior()}
+
+def async_config(fake_adb, pool_mode: str = "replicate") -> Configuration:
+    return Configuration(app_package="com.example.app", app_activity="com.example.app.MainActivity",
+                         devices=["emu-1", "emu-2"], pool_mode=pool_mode, connection_mode="socket",
+                         adb_port=fake_adb.port, logcat=False, history=False,
+                         plugins=["tests.test_async_runner:ActivityPlugin", "tests.test_async_runner:ModelPlugin"],
+                         test_cases=["tests.test_async_runner:AsyncLaunchTest", "tests.test_async_runner:SyncLaunchTest"])
+
+def test_async_controller_batches_and_caches(fake_adb):
+    device = AsyncDeviceController(async_config(fake_adb).for_device("emu-1"))
+
+    async def scenario():
+        network = await device.get_network_state()
+        batched = fake_adb.invocations()
+        first = await device.get_current_activity()
+        second = await device.get_current_activity()
+        cached = fake_adb.invocations()
+        timings = await device.launch_app("com.example.app", "com.example.app.MainActivity", wait=True)
+        return network, batched, first, second, cached, timings
+
+    network, batched, first, second, cached, timings = asyncio.run(scenario())
+
+    # Both network settings are read in one round trip, and the second activity read comes from the cache
+    assert (network, batched) == ("WiFi: 1, Mobile Data: 1", 1)
+    assert first == second and "MainActivity" in first
+    assert cached == 2
+    assert timings == {"TotalTime": 500, "WaitTime": 510}
+
+def test_async_runner_runs_async_and_sync_tests_on_every_device(fake_adb):
+    runner = AsyncTestRunner(async_config(fake_adb), verbose=False)
+
+    runner.run()
+
+    run = load_run(runner.config.run_dir, ("run", "test", "plugin", "run_end"))
+    assert run["completed"]
+    assert sorted((test["name"], test["status"]) for test in run["tests"]) == [
+        ("emu-1/AsyncLaunchTest", "passed"), ("emu-1/SyncLaunchTest", "passed"),
+        ("emu-2/AsyncLaunchTest", "passed"), ("emu-2/SyncLaunchTest", "passed")]
+    for test in run["tests"]:
+        analysis = test["result"]["analysis"]
+        assert "MainActivity" in analysis["ActivityPlugin"]["activity"]
+        assert analysis["ModelPlugin"]["model"] == "Pixel 7"
+    assert [test["result"]["timings"]["TotalTime"] for test in run["tests"] if test["test"] == "AsyncLaunchTest"] == \
+        [500, 500]
+    assert sorted((plugin["device"], plugin["plugin"]) for plugin in run["plugins"]) == sorted(
+        (device, plugin) for device in ("emu-1", "emu-2") for plugin in ("ActivityPlugin", "ModelPlugin")
+        for _ in range(2))
\ No newline at end of file
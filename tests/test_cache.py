@@ -0,0 +1,53 @@
+import pytest
+
+from droid.test_framework import cache
+from droid.test_framework.cache import TTLCache
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    return now
+
+def test_entries_expire_after_ttl(clock):
+    state = TTLCache(2.0)
+    state.set("screen_on", True)
+
+    clock[0] += 1.9
+    assert state.get("screen_on") == (True, True)
+    clock[0] += 0.1
+    assert state.get("screen_on") == (False, None)
+
+def test_max_age_overrides_ttl(clock):
+    state = TTLCache(2.0)
+    state.set("screen_on", True)
+    clock[0] += 1.0
+
+    assert state.get("screen_on", max_age=0.5) == (False, None)
+    assert state.get("screen_on", max_age=5.0) == (True, True)
+
+def test_get_or_load_reloads_only_expired_entries(clock):
+    state = TTLCache(2.0)
+    loads = []
+
+    def loader():
+        loads.append(clock[0])
+        return len(loads)
+
+    assert state.get_or_load("activity", loader) == 1
+    assert state.get_or_load("activity", loader) == 1
+    clock[0] += 2.0
+    assert state.get_or_load("activity", loader) == 2
+    # max_age=0 always goes to the device
+    assert state.get_or_load("activity", loader, max_age=0) == 3
+    assert loads == [100.0, 102.0, 102.0]
+
+def test_invalidate_drops_given_keys_or_everything(clock):
+    state = TTLCache(2.0)
+    for key in ("screen_on", "network_state", "network_connected"):
+        state.set(key, True)
+
+    state.invalidate("network_state", "unknown")
+    assert [state.get(key)[0] for key in ("screen_on", "network_state", "network_connected")] == [True, False, True]
+    state.invalidate()
+    assert state.entries == {}
\ No newline at end of file
@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+
+from droid.test_framework import conditions
+
+class StubDevice:
+    def __init__(self, state: str, connected: bool) -> None:
+        self.state = state
+        self.connected = connected
+
+    def get_network_state(self, max_age=None) -> str:
+        return self.state
+
+    def is_network_connected(self, max_age=None) -> bool:
+        return self.connected
+
+class AsyncStubDevice(StubDevice):
+    async def get_network_state(self, max_age=None) -> str:
+        return self.state
+
+    async def is_network_connected(self, max_age=None) -> bool:
+        return self.connected
+
+@pytest.mark.parametrize("state, connected, enabled, expected", [
+    ("WiFi: 1, Mobile Data: 1", True, True, True),
+    # wifi-only device, or no SIM
+    ("WiFi: 1, Mobile Data: 0", True, True, True),
+    ("WiFi: 1, Mobile Data: null", True, True, True),
+    # wifi on while in airplane mode
+    ("WiFi: 2, Mobile Data: 0", True, True, True),
+    ("WiFi: 1, Mobile Data: 1", False, True, False),
+    ("WiFi: 0, Mobile Data: 1", True, True, False),
+    ("WiFi: 0, Mobile Data: 0", False, False, True),
+    ("WiFi: 0, Mobile Data: 1", True, False, True),
+    ("WiFi: 1, Mobile Data: 0", False, False, False),
+])
+def test_network_state(state, connected, enabled, expected):
+    assert conditions.network_state(enabled)(StubDevice(state, connected)) is expected
+    assert asyncio.run(conditions.async_network_state(enabled)(AsyncStubDevice(state, connected))) is expected
+
+def test_poll_delays_stop_at_the_deadline():
+    delays = list(conditions.PollStrategy(initial=0.01, factor=2, maximum=0.04).delays(0))
+    assert delays == [0.0]
+
+    delays = conditions.PollStrategy(initial=0.01, factor=2, maximum=0.04).delays(10)
+    assert [next(delays) for _ in range(5)] == [0.0, 0.01, 0.02, 0.04, 0.04]
\ No newline at end of file
@@ -0,0 +1,143 @@
+import subprocess
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from droid.test_framework.adb_connection import SHELL_V2_EXIT, SHELL_V2_STDOUT
+from droid.test_framework.device_controller import (BATCH_MARKER, DeviceController, DeviceControllerError,
+                                                    build_batch_script, parse_batch_output)
+from tests.conftest import shell_v2_packet
+
+def socket_controller(server, state_ttl: float = 2.0, liveness_window: float = 2.0) -> DeviceController:
+    config = SimpleNamespace(device_id="emulator-5554", connection_mode="socket", adb_host="127.0.0.1",
+                             adb_port=server.port, state_ttl=state_ttl, liveness_window=liveness_window)
+    return DeviceController(config)
+
+def reply(sock, output: str, exit_code: int = 0) -> None:
+    sock.sendall(shell_v2_packet(SHELL_V2_STDOUT, output.encode()) + shell_v2_packet(SHELL_V2_EXIT, bytes([exit_code])))
+
+def local_shell(sock, command):
+    # Runs the device command with the local shell, which is close enough to the device's for batch scripts
+    result = subprocess.run(["sh", "-c", command], capture_output=True)
+    sock.sendall(shell_v2_packet(SHELL_V2_STDOUT, result.stdout)
+                 + shell_v2_packet(SHELL_V2_EXIT, bytes([result.returncode])))
+
+def test_execute_batch_returns_each_exit_code_and_output(adb_server):
+    adb_server.services["shell,v2,raw:"] = local_shell
+    device = socket_controller(adb_server)
+
+    results = device.execute_batch(["echo Google", "false", "printf 'a\\nb\\n'", "echo"])
+
+    assert [(result.exit_code, result.output) for result in results] == [
+        (0, "Google\n"), (1, ""), (0, "a\nb\n"), (0, "\n")]
+    assert [result.ok for result in results] == [True, False, True, True]
+    # One round trip for the whole batch
+    assert sum(request.startswith("shell,v2,raw:") for request in adb_server.requests) == 1
+
+def test_parse_batch_output_accepts_crlf():
+    commands = ["getprop ro.product.manufacturer", "getprop ro.product.model"]
+    output = f"Google\r\n{BATCH_MARKER}:0:0\r\nPixel 7\r\n{BATCH_MARKER}:1:0\r\n"
+
+    results = parse_batch_output(commands, build_batch_script(commands), output)
+
+    assert [result.output.strip() for result in results] == ["Google", "Pixel 7"]
+
+def test_parse_batch_output_rejects_missing_results():
+    commands = ["true", "true", "true"]
+    # The second marker is lost, so the third result cannot be attributed either
+    output = f"{BATCH_MARKER}:0:0\n{BATCH_MARKER}:2:0\n"
+
+    with pytest.raises(DeviceControllerError):
+        parse_batch_output(commands, build_batch_script(commands), output)
+
+def test_socket_shell_keeps_device_side_quoting(adb_server):
+    adb_server.services["shell,v2,raw:"] = local_shell
+    device = socket_controller(adb_server)
+
+    output = device.execute_command("shell printf 'Active default network: 100\\nnone\\n' | grep 'Active default network'")
+
+    assert output == "Active default network: 100\n"
+    assert "shell,v2,raw:printf 'Active default network: 100\\nnone\\n' | grep 'Active default network'" in \
+        adb_server.requests
+
+def test_socket_network_check_sends_the_quoted_pipeline(adb_server):
+    received = []
+
+    def connectivity(sock, command):
+        received.append(command)
+        reply(sock, "Active default network: 100\n")
+
+    adb_server.services["shell,v2,raw:"] = connectivity
+    device = socket_controller(adb_server)
+
+    assert device.is_network_connected()
+    assert received == ["dumpsys connectivity | grep 'Active default network'"]
+
+def test_state_is_cached_until_ttl_expires(adb_server):
+    received = []
+
+    def activity(sock, command):
+        received.append(command)
+        reply(sock, f"mResumedActivity: {len(received)}\n")
+
+    adb_server.services["shell,v2,raw:"] = activity
+    device = socket_controller(adb_server, state_ttl=0.2)
+
+    assert device.get_current_activity() == device.get_current_activity() == "mResumedActivity: 1\n"
+    assert device.get_current_activity(max_age=0) == "mResumedActivity: 2\n"
+    time.sleep(0.25)
+    assert device.get_current_activity() == "mResumedActivity: 3\n"
+
+def test_launch_drops_activity_cached_while_it_ran(adb_server):
+    activity = ["com.android.launcher/.Home"]
+    device = socket_controller(adb_server)
+
+    def shell(sock, command):
+        if command.startswith("am start"):
+            # A concurrent reader caches the activity from before the launch took effect
+            assert "Home" in device.get_current_activity()
+            activity[0] = "com.example.app/.MainActivity"
+            reply(sock, "Status: ok\n")
+        else:
+            reply(sock, f"mResumedActivity: {activity[0]}\n")
+
+    adb_server.services["shell,v2,raw:"] = shell
+    device.get_current_activity()
+
+    device.launch_app("com.example.app", "com.example.app.MainActivity")
+
+    assert "MainActivity" in device.get_current_activity()
+
+def test_failed_state_change_still_drops_cached_state(adb_server):
+    received = []
+
+    def shell(sock, command):
+        received.append(command)
+        if command.startswith("dumpsys connectivity"):
+            reply(sock, "Active default network: 100\n")
+        else:
+            reply(sock, "", exit_code=1)
+
+    adb_server.services["shell,v2,raw:"] = shell
+    device = socket_controller(adb_server)
+    assert device.is_network_connected()
+
+    with pytest.raises(DeviceControllerError):
+        device.set_http_proxy("127.0.0.1:8080")
+
+    assert device.is_network_connected()
+    assert sum(command.startswith("dumpsys connectivity") for command in received) == 2
+
+def test_wait_for_device_skips_the_check_inside_the_liveness_window(adb_server):
+    adb_server.services["shell,v2,raw:"] = local_shell
+    device = socket_controller(adb_server, liveness_window=5.0)
+
+    device.wait_for_device()
+    checks = len(adb_server.requests)
+    device.wait_for_device()
+    assert len(adb_server.requests) == checks
+
+    device.last_seen = time.monotonic() - 5.0
+    device.wait_for_device()
+    assert adb_server.requests[-1] == "shell,v2,raw:echo 'Device ready'"
\ No newline at end of file
@@ -0,0 +1,102 @@
+import json
+import os
+import sys
+
+import pytest
+
+import history
+from droid.test_framework.history import HistoryError, HistoryStore, flatten_result
+from droid.test_framework.report import REPORT_FILE, ReportSink
+
+def write_run(root, run_id: str, total_times: dict, completed: bool = True) -> str:
+    # total_times: device -> StartupTest cold total time
+    run_dir = os.path.join(root, run_id)
+    os.makedirs(run_dir, exist_ok=True)
+    sink = ReportSink(os.path.join(run_dir, REPORT_FILE))
+    sink.run_started(run_id, "com.example.app", ".Main", {device: "Pixel 7" for device in total_times},
+                     {"build": "42"}, "replicate")
+    for device, total_time in total_times.items():
+        screenshot = os.path.join(run_dir, f"{device}.png")
+        with open(screenshot, 'wb') as f:
+            f.write(b"png")
+        sink.plugin_completed("StartupTest", device, "ScreenShotPlugin", 0.5, {"screenshot": screenshot})
+        sink.test_completed(0, f"{device}/StartupTest", "StartupTest", device, 3.0,
+                            {"cold": {"total_time": {"p90": total_time}, "ok": True}, "screenshot": screenshot})
+    if completed:
+        sink.run_completed(run_id, 12.5)
+    sink.close()
+    return run_dir
+
+@pytest.fixture
+def store(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.db"))
+    yield store
+    store.close()
+
+def test_flatten_result_joins_nested_keys():
+    assert dict(flatten_result({"cold": {"total_time": {"p90": 1}}, "ok": True})) == {
+        "cold/total_time/p90": 1, "ok": True}
+
+def test_record_run_stores_run_tests_plugins_and_artifacts(tmp_path, store):
+    run_dir = write_run(tmp_path, "20240101_120000", {"emu-1": 500, "emu-2": 650})
+
+    assert store.record_run(run_dir) == "20240101_120000"
+
+    [run] = store.runs()
+    assert (run["run_id"], run["started_at"], run["duration"], run["completed"]) == (
+        "20240101_120000", "2024-01-01T12:00:00", 12.5, 1)
+    assert json.loads(run["metadata"]) == {"build": "42"}
+    assert sorted((row["device"], row["status"]) for row in store.test_history("StartupTest")) == [
+        ("emu-1", "passed"), ("emu-2", "passed")]
+    assert [(row["device"], row["duration"]) for row in store.plugin_timings("ScreenShotPlugin", "emu-2")] == [
+        ("emu-2", 0.5)]
+    assert [(row["device"], row["name"]) for row in store.artifacts("20240101_120000")] == [
+        ("emu-1", "screenshot"), ("emu-2", "screenshot")]
+    # Booleans are not metrics
+    assert store.metric_names("StartupTest") == ["cold/total_time/p90"]
+
+def test_metric_trend_is_newest_first_and_filters_by_device(tmp_path, store):
+    for run_id, times in [("20240101_120000", {"emu-1": 500, "emu-2": 650}),
+                          ("20240102_120000", {"emu-1": 520}),
+                          ("20240103_120000", {"emu-1": 480, "emu-2": 700})]:
+        store.record_run(write_run(tmp_path, run_id, times))
+
+    trend = store.metric_trend("StartupTest", "cold/total_time/p90", "emu-1")
+    assert [(row["run_id"], row["value"]) for row in trend] == [
+        ("20240103_120000", 480.0), ("20240102_120000", 520.0), ("20240101_120000", 500.0)]
+    assert len(store.metric_trend("StartupTest", "cold/total_time/p90")) == 5
+    assert [row["value"] for row in store.metric_trend("StartupTest", "cold/total_time/p90", "emu-2", limit=1)] == [
+        700.0]
+    assert [row["run_id"] for row in store.runs(device="emu-2")] == ["20240103_120000", "20240101_120000"]
+
+def test_recording_a_run_again_replaces_its_rows(tmp_path, store):
+    run_dir = write_run(tmp_path, "20240101_120000", {"emu-1": 500}, completed=False)
+    store.record_run(run_dir)
+    # Resumed and finished
+    write_run(tmp_path, "20240101_120000", {"emu-1": 450})
+    store.record_run(run_dir)
+
+    assert [row["completed"] for row in store.runs()] == [1]
+    assert [row["value"] for row in store.metric_trend("StartupTest", "cold/total_time/p90")] == [450.0]
+    assert len(store.artifacts("20240101_120000")) == 1
+
+def test_record_run_without_a_report_fails(tmp_path, store):
+    os.makedirs(tmp_path / "empty")
+    open(tmp_path / "empty" / REPORT_FILE, 'w').close()
+
+    with pytest.raises(HistoryError):
+        store.record_run(str(tmp_path / "empty"))
+
+def test_import_command_records_every_run_next_to_the_database(tmp_path, monkeypatch, capsys):
+    write_run(tmp_path, "20240101_120000", {"emu-1": 500})
+    write_run(tmp_path, "20240102_120000", {"emu-1": 520})
+    os.makedirs(tmp_path / "not_a_run")
+    database = str(tmp_path / "history.db")
+
+    monkeypatch.setattr(sys, "argv", ["history.py", "--db", database, "import"])
+    history.main()
+    assert capsys.readouterr().out.splitlines() == ["Recorded run 20240101_120000", "Recorded run 20240102_120000"]
+
+    monkeypatch.setattr(sys, "argv", ["history.py", "--db", database, "trend", "StartupTest", "cold/total_time/p90"])
+    history.main()
+    assert [json.loads(line)["value"] for line in capsys.readouterr().out.splitlines()] == [520.0, 500.0]
\ No newline at end of file
@@ -0,0 +1,20 @@
+from droid.test_framework.logcat import LogcatMonitor
+
+PACKAGE = "com.example.app"
+
+def line(pid: int, level: str, tag: str, message: str) -> str:
+    return f"01-01 12:00:00.000  {pid}  {pid} {level} {tag}: {message}\n"
+
+def test_take_events_counts_each_event_once(tmp_path):
+    monitor = LogcatMonitor(None, PACKAGE, str(tmp_path / "logcat.txt.gz"))
+    monitor._ingest(line(1000, "I", "ActivityManager", f"Start proc 4242:{PACKAGE}/u0a1 for activity"))
+    monitor._ingest(line(4242, "E", "AndroidRuntime", "FATAL EXCEPTION: main"))
+
+    first, checkpoint = monitor.take_events(0)
+    monitor._ingest(line(1000, "E", "ActivityManager", f"ANR in {PACKAGE}"))
+    second, checkpoint = monitor.take_events(checkpoint)
+    third, _ = monitor.take_events(checkpoint)
+
+    assert (first["crash"], first["anr"]) == (1, 0)
+    assert (second["crash"], second["anr"]) == (0, 1)
+    assert (third["crash"], third["anr"], third["events"]) == (0, 0, [])
\ No newline at end of file
@@ -0,0 +1,66 @@
+import socket
+import socketserver
+import threading
+import time
+
+from droid.test_framework.network_shaping import NetworkProfile, NetworkShaper, ShapingProxy
+
+PAYLOAD_SIZE = 200 * 1024
+
+class PayloadHandler(socketserver.BaseRequestHandler):
+    def handle(self) -> None:
+        self.request.sendall(b"x" * PAYLOAD_SIZE)
+
+def download_through(proxy: ShapingProxy, upstream_port: int) -> bytes:
+    with socket.create_connection(("127.0.0.1", proxy.port), timeout=10) as client:
+        client.sendall(f"CONNECT 127.0.0.1:{upstream_port} HTTP/1.1\r\n\r\n".encode())
+        data = b""
+        while True:
+            chunk = client.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+    return data.partition(b"\r\n\r\n")[2]
+
+def test_proxy_limits_download_bandwidth():
+    upstream = socketserver.ThreadingTCPServer(("127.0.0.1", 0), PayloadHandler)
+    threading.Thread(target=upstream.serve_forever, daemon=True).start()
+    proxy = ShapingProxy(profile=NetworkProfile("slow", down_kbps=800))
+    proxy.start()
+    try:
+        start = time.monotonic()
+        data = download_through(proxy, upstream.server_address[1])
+        elapsed = time.monotonic() - start
+    finally:
+        proxy.stop()
+        upstream.shutdown()
+        upstream.server_close()
+
+    assert len(data) == PAYLOAD_SIZE
+    # 200 KB at 800 kbps is about 2 seconds
+    assert 1.8 < elapsed < 3.0
+    assert proxy.reset_stats()["bytes_down"] == PAYLOAD_SIZE
+
+class StubDevice:
+    device_id = "10.0.0.1:5555"
+
+    def __init__(self) -> None:
+        self.calls = []
+
+    def __getattr__(self, name: str):
+        return lambda *args: self.calls.append((name, *args))
+
+def test_proxy_mode_reverses_fixed_device_port_to_ephemeral_proxy():
+    device = StubDevice()
+    shaper = NetworkShaper(device, "proxy", proxy_port=8119)
+    shaper.apply(NetworkProfile("3g", latency_ms=200))
+    host_port = shaper.proxy.port
+    shaper.reset()
+
+    assert host_port != 8119
+    assert device.calls == [
+        ("reverse_port", 8119, host_port),
+        ("set_http_proxy", "127.0.0.1:8119"),
+        ("clear_http_proxy",),
+        ("remove_reverse_port", 8119),
+    ]
\ No newline at end of file
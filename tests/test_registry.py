@@ -0,0 +1,19 @@
+import pytest
+
+from droid.plugins import BasePlugin
+from droid.test_framework.registry import Registry, RegistryError
+
+class ConcretePlugin(BasePlugin):
+    def run(self, device) -> dict:
+        return {}
+
+def test_load_path_returns_concrete_class():
+    assert Registry("plugins", BasePlugin).load("tests.test_registry:ConcretePlugin") is ConcretePlugin
+
+def test_load_path_rejects_abstract_class():
+    with pytest.raises(RegistryError, match="abstract"):
+        Registry("plugins", BasePlugin).load("droid.plugins.base_plugin:BasePlugin")
+
+def test_load_path_rejects_other_classes():
+    with pytest.raises(RegistryError):
+        Registry("plugins", BasePlugin).load("droid.test_framework.registry:Registry")
\ No newline at end of file
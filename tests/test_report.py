@@ -0,0 +1,45 @@
+import os
+
+from droid.test_framework.report import REPORT_FILE, ReportSink, load_run
+
+ALL_TYPES = ("run", "test", "plugin", "run_end")
+
+def write_report(run_dir, pool_mode: str, retry_device: str) -> None:
+    sink = ReportSink(os.path.join(run_dir, REPORT_FILE))
+    devices = {"emu-1": "Pixel", "emu-2": "Pixel"}
+    sink.run_started("run", "com.example.app", ".Main", devices, {}, pool_mode)
+    sink.plugin_completed("Flaky", "emu-1", "ScreenShotPlugin", 1.0, {})
+    sink.test_completed(0, "emu-1/Flaky", "Flaky", "emu-1", 2.0, {"error": "boom"})
+    sink.plugin_completed("Other", "emu-2", "ScreenShotPlugin", 1.0, {})
+    sink.test_completed(1, "emu-2/Other", "Other", "emu-2", 2.0, {})
+    # Interrupted while the next test was running
+    sink.plugin_completed("Last", "emu-2", "ScreenShotPlugin", 1.0, {})
+    # Resumed: only the failed and the interrupted test run again
+    sink.run_started("run", "com.example.app", ".Main", devices, {}, pool_mode)
+    sink.plugin_completed("Flaky", retry_device, "ScreenShotPlugin", 1.0, {})
+    sink.test_completed(0, f"{retry_device}/Flaky", "Flaky", retry_device, 2.0, {})
+    sink.plugin_completed("Last", "emu-1", "ScreenShotPlugin", 1.0, {})
+    sink.test_completed(2, "emu-1/Last", "Last", "emu-1", 2.0, {})
+    sink.run_completed("run", 10.0)
+    sink.close()
+
+def test_distributed_retry_on_another_device_replaces_failed_attempt(tmp_path):
+    write_report(tmp_path, "distribute", retry_device="emu-2")
+
+    run = load_run(str(tmp_path), ALL_TYPES)
+
+    assert sorted((test["index"], test["device"], test["status"]) for test in run["tests"]) == [
+        (0, "emu-2", "passed"), (1, "emu-2", "passed"), (2, "emu-1", "passed")]
+    # One plugin record per test; the failed and the interrupted attempts' records are dropped
+    assert sorted((plugin["test"], plugin["device"]) for plugin in run["plugins"]) == [
+        ("Flaky", "emu-2"), ("Last", "emu-1"), ("Other", "emu-2")]
+
+def test_replicated_tests_are_kept_per_device(tmp_path):
+    write_report(tmp_path, "replicate", retry_device="emu-2")
+
+    run = load_run(str(tmp_path), ALL_TYPES)
+
+    # In replicate mode the retry on emu-2 is a different test than the failure on emu-1
+    assert sorted((test["index"], test["device"], test["status"]) for test in run["tests"]) == [
+        (0, "emu-1", "error"), (0, "emu-2", "passed"), (1, "emu-2", "passed"), (2, "emu-1", "passed")]
+    assert len(run["plugins"]) == 4
\ No newline at end of file
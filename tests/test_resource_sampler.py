@@ -0,0 +1,31 @@
+import math
+
+from droid.plugins.resource_sampler_plugin import COLUMNS, ResourceSamplerPlugin
+
+def add_samples(plugin: ResourceSamplerPlugin, *counters) -> None:
+    for frames, janky in counters:
+        for column, value in zip(COLUMNS, (0.0, 1000.0, math.nan, frames, janky)):
+            plugin.samples[column].append(value)
+
+def test_frames_rendered_between_windows_are_counted():
+    plugin = ResourceSamplerPlugin()
+    add_samples(plugin, (100, 10), (150, 15))
+    first = plugin.run(None)
+    add_samples(plugin, (200, 25))
+    second = plugin.run(None)
+
+    assert (first["frames"], first["janky_frames_percent"]) == (50, 10.0)
+    # The only sample of the second window is compared with the last one of the first
+    assert (second["frames"], second["janky_frames_percent"]) == (50, 20.0)
+
+def test_counter_reset_and_missing_samples_are_skipped():
+    plugin = ResourceSamplerPlugin()
+    add_samples(plugin, (100, 10), (math.nan, math.nan), (120, 12))
+    plugin.run(None)
+    # The app restarted, so its counters start again from zero
+    add_samples(plugin, (5, 1), (45, 3))
+    summary = plugin.run(None)
+
+    assert summary["frames"] == 40
+    assert summary["samples"] == 2
+    assert summary["peak_pss_kb"] == 1000.0 and summary["avg_cpu_percent"] is None
\ No newline at end of file
@@ -0,0 +1,65 @@
+import struct
+import zipfile
+from types import SimpleNamespace
+
+from droid.plugins.screen_record_plugin import ScreenRecordPlugin
+
+def raw_frame(value: int, size: int = 100) -> bytes:
+    # 1-pixel-high RGBA raw screencap whose pixels are all `value`
+    width = (size - 16) // 4
+    return struct.pack("<IIII", width, 1, 1, 0) + bytes([value]) * (width * 4)
+
+def attached_plugin(tmp_path, **options) -> ScreenRecordPlugin:
+    config = SimpleNamespace(run_dir=str(tmp_path), app_package="com.example.app",
+                             options_for=lambda module: options)
+    device = SimpleNamespace(config=config, device_id="emulator-5554",
+                             subscribe=lambda *_: None, unsubscribe=lambda *_: None)
+    plugin = ScreenRecordPlugin()
+    plugin.attach(device)
+    return plugin
+
+def test_buffer_evicts_oldest_frames_over_the_memory_limit(tmp_path):
+    plugin = attached_plugin(tmp_path, window_seconds=60)
+    plugin.max_memory = 250
+
+    for index in range(4):
+        plugin._add_frame(float(index), raw_frame(index))
+
+    assert [timestamp for timestamp, _ in plugin.frames] == [2.0, 3.0]
+    assert plugin.buffered_bytes == 200
+    assert plugin.frames_captured == 4
+    plugin.detach(plugin.device)
+
+def test_buffer_keeps_only_the_last_window(tmp_path):
+    plugin = attached_plugin(tmp_path, window_seconds=10)
+
+    for timestamp in (0.0, 5.0, 10.0, 10.5):
+        plugin._add_frame(timestamp, raw_frame(int(timestamp * 2)))
+
+    # The frame from exactly one window ago is kept
+    assert [timestamp for timestamp, _ in plugin.frames] == [5.0, 10.0, 10.5]
+    assert plugin.buffered_bytes == 300
+    plugin.detach(plugin.device)
+
+def test_unchanged_frames_are_skipped_by_crc(tmp_path):
+    plugin = attached_plugin(tmp_path)
+
+    for value in (1, 1, 1, 2, 1):
+        plugin._add_frame(0.0, raw_frame(value))
+
+    # Only consecutive duplicates are dropped; returning to an earlier screen is a change
+    assert [raw[-1] for _, raw in plugin.frames] == [1, 2, 1]
+    assert (plugin.frames_captured, plugin.frames_skipped) == (5, 2)
+    plugin.detach(plugin.device)
+
+def test_recording_names_frames_by_offset(tmp_path):
+    plugin = attached_plugin(tmp_path)
+    path = str(tmp_path / "recording.zip")
+
+    plugin._write_recording([(10.0, raw_frame(1)), (10.25, raw_frame(2))], path)
+
+    with zipfile.ZipFile(path) as archive:
+        names = archive.namelist()
+        assert names == ["frame_00000_0ms.png", "frame_00001_250ms.png"]
+        assert archive.read(names[0]).startswith(b"\x89PNG")
+    plugin.detach(plugin.device)
\ No newline at end of file
@@ -0,0 +1,76 @@
+import os
+import struct
+import zlib
+from types import SimpleNamespace
+
+import pytest
+
+from droid.plugins.screenshot_plugin import ScreenShotPlugin
+from droid.test_framework.screenshot import ScreenshotEncoder, encode_png, parse_raw_screencap
+
+def raw_screencap(width: int, height: int, pixel_format: int, pixels: bytes) -> bytes:
+    # Android 9+ header: width, height, format, color space
+    return struct.pack("<IIII", width, height, pixel_format, 0) + pixels
+
+def decode_png(png: bytes):
+    assert png[:8] == b"\x89PNG\r\n\x1a\n"
+    offset, chunks = 8, {}
+    while offset < len(png):
+        length, tag = struct.unpack_from(">I4s", png, offset)
+        chunks[tag] = png[offset + 8:offset + 8 + length]
+        offset += 12 + length
+    width, height, _, color_type = struct.unpack_from(">IIBB", chunks[b"IHDR"])
+    return width, height, color_type, zlib.decompress(chunks[b"IDAT"])
+
+def test_rgbx_is_written_as_rgb_without_padding_byte():
+    pixels = bytes([10, 20, 30, 0xAA, 40, 50, 60, 0xBB])
+    width, height, color_type, scanlines = decode_png(encode_png(parse_raw_screencap(raw_screencap(2, 1, 2, pixels))))
+
+    assert (width, height, color_type) == (2, 1, 2)
+    assert scanlines == b"\x00" + bytes([10, 20, 30, 40, 50, 60])
+
+def test_rgba_keeps_alpha():
+    pixels = bytes([1, 2, 3, 4, 5, 6, 7, 8])
+    _, _, color_type, scanlines = decode_png(encode_png(parse_raw_screencap(raw_screencap(1, 2, 1, pixels))))
+
+    assert color_type == 6
+    assert scanlines == b"\x00" + pixels[:4] + b"\x00" + pixels[4:]
+
+def test_encoder_close_shuts_down_worker(tmp_path):
+    encoder = ScreenshotEncoder()
+    path = str(tmp_path / "shot.png")
+    encoder.submit(raw_screencap(1, 1, 3, b"\x01\x02\x03"), path)
+    encoder.close()
+
+    assert decode_png(open(path, "rb").read())[3] == b"\x00\x01\x02\x03"
+    with pytest.raises(RuntimeError):
+        encoder.submit(raw_screencap(1, 1, 3, b"\x01\x02\x03"), path)
+
+def raw_device(tmp_path, *captures):
+    config = SimpleNamespace(run_dir=str(tmp_path), options_for=lambda module: {"format": "raw"})
+    frames = iter(captures)
+    return SimpleNamespace(config=config, capture_screenshot_bytes=lambda raw: next(frames))
+
+def test_raw_screenshot_is_written_by_flush(tmp_path):
+    plugin = ScreenShotPlugin()
+    device = raw_device(tmp_path, raw_screencap(1, 1, 3, b"\x01\x02\x03"))
+
+    result = plugin.run(device)
+    plugin.flush()
+
+    assert decode_png(open(result["screenshot"], "rb").read())[3] == b"\x00\x01\x02\x03"
+    plugin.detach(device)
+
+def test_failed_raw_encoding_is_reported_instead_of_a_dangling_path(tmp_path):
+    plugin = ScreenShotPlugin()
+    # Too short for the screencap header
+    device = raw_device(tmp_path, b"\x00\x01", raw_screencap(1, 1, 3, b"\x01\x02\x03"))
+
+    broken, good = plugin.run(device), plugin.run(device)
+    assert broken["screenshot"].endswith(".png")
+    plugin.flush()
+
+    assert broken["screenshot"] is None and "Failed to encode screenshot" in broken["error"]
+    assert os.path.isfile(good["screenshot"]) and "error" not in good
+    assert len(os.listdir(tmp_path)) == 1
+    plugin.detach(device)
\ No newline at end of file
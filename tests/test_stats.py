@@ -0,0 +1,54 @@
+import statistics
+
+import pytest
+
+from droid.test_framework.stats import bootstrap_ci, mann_whitney_greater, percentile, summarize
+
+def test_percentile_interpolates_linearly():
+    values = list(range(10, 0, -1))
+
+    assert percentile(values, 0) == 1
+    assert percentile(values, 50) == 5.5
+    assert percentile(values, 90) == pytest.approx(9.1)
+    assert percentile(values, 100) == 10
+    assert percentile([7], 90) == 7
+
+def test_percentile_of_nothing_is_an_error():
+    with pytest.raises(ValueError):
+        percentile([], 50)
+
+def test_bootstrap_ci_is_reproducible_and_brackets_the_median():
+    values = [480, 495, 500, 502, 510, 515, 530, 545, 560, 610]
+
+    low, high = bootstrap_ci(values)
+
+    assert (low, high) == bootstrap_ci(values)
+    assert low <= statistics.median(values) <= high
+    assert min(values) <= low and high <= max(values)
+    narrow_low, narrow_high = bootstrap_ci(values, confidence=0.5)
+    assert low <= narrow_low <= narrow_high <= high
+
+def test_bootstrap_ci_of_constant_values_is_a_point():
+    assert bootstrap_ci([5.0] * 8) == (5.0, 5.0)
+
+def test_summarize_single_value():
+    assert summarize([3.0]) == {"n": 1, "mean": 3.0, "median": 3.0, "p90": 3.0, "stdev": 0.0,
+                                "median_ci_low": 3.0, "median_ci_high": 3.0}
+
+def test_mann_whitney_separated_samples():
+    # Matches scipy.stats.mannwhitneyu(..., alternative="greater", method="asymptotic")
+    u, p = mann_whitney_greater([6, 7, 8, 9, 10], [1, 2, 3, 4, 5])
+    assert (u, p) == (25, pytest.approx(0.0060929, abs=1e-6))
+
+    u, p = mann_whitney_greater([1, 2, 3, 4, 5], [6, 7, 8, 9, 10])
+    assert (u, p) == (0, pytest.approx(0.99669, abs=1e-5))
+
+def test_mann_whitney_corrects_for_ties():
+    u, p = mann_whitney_greater([1, 2, 2, 3], [2, 2, 4])
+
+    # Ranks 1, 3.5, 3.5, 6 for the current sample; the four tied 2s shrink the variance
+    assert u == 4
+    assert p == pytest.approx(0.835279, abs=1e-6)
+
+def test_mann_whitney_identical_samples_show_no_regression():
+    assert mann_whitney_greater([500] * 5, [500] * 5) == (12.5, 1.0)
\ No newline at end of file
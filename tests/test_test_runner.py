@@ -0,0 +1,94 @@
+import os
+import threading
+from collections import Counter
+
+import pytest
+
+from benchmarks.fake_adb import FakeAdb
+from droid.test_cases import BaseTest
+# Imported as a module so pytest does not try to collect TestRunner
+from droid.test_framework import test_runner
+from droid.types import Configuration
+
+TEST_CASES = [f"tests.test_test_runner:{name}" for name in ("FirstTest", "SecondTest", "ThirdTest", "FourthTest")]
+
+class RecordingTest(BaseTest):
+    runs = []
+    lock = threading.Lock()
+
+    def run(self, device, analyzer) -> dict:
+        with RecordingTest.lock:
+            RecordingTest.runs.append((self.__class__.__name__, device.device_id))
+        artifact = os.path.join(os.getcwd(), f"{self.__class__.__name__}_{device.device_id}.txt")
+        with open(artifact, 'w') as f:
+            f.write(device.device_id)
+        return {"artifact": artifact}
+
+class FirstTest(RecordingTest):
+    pass
+
+class SecondTest(RecordingTest):
+    pass
+
+class ThirdTest(RecordingTest):
+    pass
+
+class FourthTest(RecordingTest):
+    pass
+
+@pytest.fixture(autouse=True)
+def clear_runs():
+    RecordingTest.runs = []
+
+def pool_config(fake: FakeAdb, pool_mode: str) -> Configuration:
+    return Configuration(app_package="com.example.app", app_activity="com.example.app.MainActivity",
+                         devices=["emu-1", "emu-2"], test_cases=TEST_CASES, pool_mode=pool_mode,
+                         connection_mode="socket", adb_port=fake.port, logcat=False, history=False)
+
+def test_for_device_gives_each_device_its_own_run_dir(fake_adb):
+    config = pool_config(fake_adb, "distribute")
+
+    device_config = config.for_device("192.168.0.2:5555")
+
+    assert (device_config.device_id, device_config.devices) == ("192.168.0.2:5555", ["192.168.0.2:5555"])
+    assert device_config.run_dir == os.path.join(config.run_dir, "192.168.0.2_5555")
+    assert os.path.isdir(device_config.run_dir)
+    assert (config.device_id, config.devices) == ("emu-1", ["emu-1", "emu-2"])
+
+def test_distribute_shares_one_queue_and_runs_each_test_once(fake_adb):
+    runner = test_runner.TestRunner(pool_config(fake_adb, "distribute"), verbose=False)
+
+    queues = runner._work_queues()
+    assert queues[0] is queues[1]
+    assert queues[0].qsize() == len(TEST_CASES)
+
+    runner.run()
+
+    assert Counter(name for name, _ in RecordingTest.runs) == {
+        "FirstTest": 1, "SecondTest": 1, "ThirdTest": 1, "FourthTest": 1}
+    for name, device_id in RecordingTest.runs:
+        assert os.path.isfile(os.path.join(runner.config.run_dir, device_id, name, f"{name}_{device_id}.txt"))
+
+def test_replicate_runs_every_test_on_every_device(fake_adb):
+    runner = test_runner.TestRunner(pool_config(fake_adb, "replicate"), verbose=False)
+
+    queues = runner._work_queues()
+    assert queues[0] is not queues[1]
+    assert [work.qsize() for work in queues] == [len(TEST_CASES)] * 2
+
+    runner.run()
+
+    assert sorted(RecordingTest.runs) == sorted(
+        (name, device_id) for name in ("FirstTest", "SecondTest", "ThirdTest", "FourthTest")
+        for device_id in ("emu-1", "emu-2"))
+
+def test_run_session_drains_its_queue_on_its_own_device(fake_adb):
+    runner = test_runner.TestRunner(pool_config(fake_adb, "distribute"), verbose=False)
+    session = runner.sessions[1]
+
+    runner._run_session(session, runner._work_queues()[1])
+
+    assert RecordingTest.runs == [(name, "emu-2") for name in ("FirstTest", "SecondTest", "ThirdTest", "FourthTest")]
+    assert runner.checkpoint.done() == {(index, name) for index, name in
+                                        enumerate(["FirstTest", "SecondTest", "ThirdTest", "FourthTest"])}
+    runner.cleanup()
\ No newline at end of file
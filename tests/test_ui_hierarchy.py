@@ -0,0 +1,82 @@
+import pytest
+
+from droid.test_framework.ui_hierarchy import UiHierarchyError, UiHierarchyParser, parse_ui_hierarchy
+
+STATUS_LINE = b"UI hierchary dumped to: /dev/tty\n"
+
+def node(attributes: str, children: str = "") -> str:
+    return f'<node class="android.widget.FrameLayout" package="com.example.app" {attributes}>{children}</node>'
+
+def dump(*roots: str, rotation: int = 0) -> bytes:
+    return (f"<?xml version='1.0' encoding='UTF-8' standalone='yes' ?><hierarchy rotation=\"{rotation}\">"
+            f"{''.join(roots)}</hierarchy>").encode() + STATUS_LINE
+
+SCREEN = dump(node('resource-id="root" bounds="[0,0][1080,2400]"', "".join([
+    node('resource-id="title" text="Café ✓" bounds="[0,0][1080,200]"'),
+    node('resource-id="list" scrollable="true" bounds="[0,200][1080,2400]"',
+         node('text="Row 1" clickable="true"') + node('text="Row 2" clickable="true"')),
+])), rotation=1)
+
+def test_chunk_boundaries_do_not_change_the_result():
+    expected = parse_ui_hierarchy(SCREEN, chunk_size=len(SCREEN))
+    assert len(expected) == 5
+    assert expected.rotation == 1
+    assert expected.find_one(resource_id="title").text == "Café ✓"
+    assert expected.find_one(text="Row 2").flag("clickable")
+
+    # Every chunk size splits somewhere different: inside tags, multi-byte characters and </hierarchy>
+    for chunk_size in range(1, 64):
+        hierarchy = parse_ui_hierarchy(SCREEN, chunk_size=chunk_size)
+        assert hierarchy.to_table() == expected.to_table()
+        assert [node.digest for node in hierarchy] == [node.digest for node in expected]
+
+def test_empty_values_can_be_queried():
+    hierarchy = parse_ui_hierarchy(SCREEN)
+
+    assert [node.resource_id for node in hierarchy.find(text="")] == ["root", "list"]
+    assert [node.text for node in hierarchy.find(resource_id="")] == ["Row 1", "Row 2"]
+    assert hierarchy.exists(resource_id="", text="Row 2")
+    assert not hierarchy.exists(resource_id="", text="")
+
+def test_end_tag_split_across_chunks_finishes_the_document():
+    end = SCREEN.index(b"</hierarchy>") + 5
+    parser = UiHierarchyParser()
+    parser.feed(SCREEN[:end])
+    assert not parser.finished
+    parser.feed(SCREEN[end:])
+    assert parser.finished
+    assert len(parser.close()) == 5
+
+def test_truncated_dump_raises_on_close():
+    with pytest.raises(UiHierarchyError, match="Incomplete"):
+        parse_ui_hierarchy(SCREEN[:SCREEN.index(b"</hierarchy>")])
+    with pytest.raises(UiHierarchyError, match="no output"):
+        parse_ui_hierarchy(b"")
+
+@pytest.mark.parametrize("data", [b"ERROR: could not get idle state.\n", b"<hierarchy><node></hierarchy>"])
+def test_invalid_dump_raises(data):
+    with pytest.raises(UiHierarchyError):
+        parse_ui_hierarchy(data)
+
+def test_diff_of_identical_dumps_is_empty():
+    assert parse_ui_hierarchy(SCREEN).diff(parse_ui_hierarchy(SCREEN)) == {"replaced": [], "updated": [], "removed": []}
+
+def test_diff_reports_updated_replaced_and_removed_nodes():
+    previous = parse_ui_hierarchy(SCREEN)
+    current = parse_ui_hierarchy(dump(node('resource-id="root" bounds="[0,0][1080,2400]"', "".join([
+        node('resource-id="title" text="Offline" bounds="[0,0][1080,200]"'),
+        node('resource-id="list" scrollable="true" bounds="[0,200][1080,2400]"',
+             node('text="Row 1" clickable="true"')),
+        node('resource-id="banner" text="Retry"', node('resource-id="retry" text="Retry"')),
+    ])), rotation=1))
+
+    changes = current.diff(previous)
+
+    # Only the title's attributes changed, so it is updated in place rather than stored as a subtree
+    assert [change["path"] for change in changes["updated"]] == ["0/0"]
+    assert changes["updated"][0]["node"][3] == "Offline"
+    # The new banner is stored whole, with depths relative to its root
+    assert [(change["path"], [row[0] for row in change["nodes"]]) for change in changes["replaced"]] == [
+        ("0/2", [0, 1])]
+    # Row 2 only exists in the previous dump, so its path refers to that one
+    assert changes["removed"] == ["0/1/1"]
\ No newline at end of file
@@ -0,0 +1,94 @@
+import struct
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("PIL")
+
+from droid.test_framework.screenshot import encode_png, parse_raw_screencap
+from droid.test_framework.visual_diff import (VisualDiff, VisualEntry, VisualIndex, dhash, hamming,
+                                              hamming_distances, load_grayscale, phash)
+
+def write_rgb_png(path, pixels) -> str:
+    height, width, _ = pixels.shape
+    # RGB_888 raw screencap, written by the framework's own encoder
+    raw = struct.pack("<IIII", width, height, 3, 0) + pixels.astype(np.uint8).tobytes()
+    with open(path, "wb") as f:
+        f.write(encode_png(parse_raw_screencap(raw)))
+    return str(path)
+
+def gradient(width: int = 64, height: int = 48):
+    return np.tile(np.arange(width, dtype=np.float32) * 4, (height, 1))
+
+def test_load_grayscale_weights_channels(tmp_path):
+    pixels = np.array([[[255, 0, 0], [0, 255, 0]], [[0, 0, 255], [200, 200, 200]]])
+
+    image = load_grayscale(write_rgb_png(tmp_path / "screen.png", pixels))
+
+    assert image.shape == (2, 2)
+    assert image.reshape(-1).tolist() == pytest.approx([76, 150, 29, 200], abs=1)
+
+def test_dhash_follows_horizontal_gradient():
+    assert dhash(gradient()) == 2 ** 64 - 1
+    assert dhash(gradient()[:, ::-1]) == 0
+
+def test_phash_ignores_brightness_but_not_layout():
+    image = np.random.default_rng(7).uniform(0, 200, (48, 64)).astype(np.float32)
+
+    assert phash(image) == phash(image + 20)
+    assert hamming(phash(image), phash(image[::-1])) > 10
+
+def test_hash_rejects_images_smaller_than_the_grid():
+    with pytest.raises(Exception, match="too small"):
+        dhash(np.zeros((4, 4), dtype=np.float32))
+
+def test_hamming_distances_match_scalar_hamming():
+    values = [0, 1, 0xFF, 2 ** 64 - 1, 0x0123456789ABCDEF]
+    hashes = np.array(values, dtype=np.uint64)
+
+    assert hamming_distances(hashes, 0xF0).tolist() == [hamming(value, 0xF0) for value in values]
+
+def entry(run_id: str, device: str = "emulator-5554", value: int = 0) -> VisualEntry:
+    return VisualEntry("Test/ScreenShotPlugin/screenshot", run_id, device, f"{run_id}.png", value, value)
+
+def test_baseline_is_the_latest_earlier_run_on_the_same_device(tmp_path):
+    index = VisualIndex(str(tmp_path / "visual_index.jsonl"))
+    for run_id, device in [("20240101_000000", "emulator-5554"), ("20240102_000000", "emulator-5554"),
+                           ("20240102_000000", "emulator-5556"), ("20240104_000000", "emulator-5554")]:
+        index.add(entry(run_id, device))
+
+    baseline = index.baseline("Test/ScreenShotPlugin/screenshot", "20240103_000000", "emulator-5554")
+
+    assert (baseline.run_id, baseline.device) == ("20240102_000000", "emulator-5554")
+    # Another device's screen is only used when the run has none from this one
+    assert index.baseline("Test/ScreenShotPlugin/screenshot", "20240103_000000", "emulator-5558").device == \
+        "emulator-5556"
+    assert index.baseline("Test/ScreenShotPlugin/screenshot", "20240101_000000") is None
+    pinned = index.baseline("Test/ScreenShotPlugin/screenshot", "20240104_000000", baseline_run="20240101_000000")
+    assert pinned.run_id == "20240101_000000"
+
+def test_index_is_reloaded_from_disk(tmp_path):
+    path = str(tmp_path / "visual_index.jsonl")
+    VisualIndex(path).add(entry("20240101_000000", value=0xFF))
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("not json\n")
+
+    index = VisualIndex(path)
+
+    assert index.baseline("Test/ScreenShotPlugin/screenshot", "20240102_000000").dhash == 0xFF
+    assert [(distance, found.run_id) for distance, found in
+            index.search("Test/ScreenShotPlugin/screenshot", 0xF0, 4)] == [(4, "20240101_000000")]
+
+def test_check_compares_with_the_previous_run(tmp_path):
+    path = write_rgb_png(tmp_path / "screen.png", np.repeat(gradient()[..., None], 3, axis=2))
+    index = VisualIndex(str(tmp_path / "visual_index.jsonl"))
+    result = {"ScreenShotPlugin": {"screenshot": path}}
+
+    def check(run_id: str) -> dict:
+        config = SimpleNamespace(run_id=run_id, options_for=lambda module: {"threshold": 5})
+        return VisualDiff(config, index).check("Test", result, "emulator-5554")
+
+    assert check("20240101_000000") == {"Test/ScreenShotPlugin/screenshot": {"baseline": None}}
+    assert check("20240102_000000")["Test/ScreenShotPlugin/screenshot"] == {
+        "baseline": path, "baseline_run": "20240101_000000", "distance": 0, "changed": False}
\ No newline at end of file